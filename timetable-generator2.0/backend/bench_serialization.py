@@ -0,0 +1,117 @@
+# backend/bench_serialization.py
+"""
+Benchmarks rendering timetable responses: the plain dict + orjson path the
+timetable endpoints use (response_cache.render_json) against the previous
+Pydantic path (FormattedDay objects, response_model validation,
+jsonable_encoder, JSONResponse), and checks that both produce the same bytes.
+
+    python bench_serialization.py                       # ./timetable.db + synthetic sizes
+    python bench_serialization.py --no-db --classes 1000 20000 --repeat 5
+"""
+import argparse
+import random
+import time
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+import schemas
+from response_cache import render_json
+
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
+
+
+def synthetic_timetable(num_classes: int, classes_per_slot: int = 10, seed: int = 0):
+    """A full-timetable shaped payload with `num_classes` classes."""
+    rng = random.Random(seed)
+    num_slots = max(1, num_classes // classes_per_slot)
+    timetable = [{"day": day, "timeslots": []} for day in DAYS]
+    for slot in range(num_slots):
+        start = 8 + slot // len(DAYS) % 9
+        timetable[slot % len(DAYS)]["timeslots"].append({
+            "id": slot + 1, "start_time": start, "end_time": start + 1, "duration": 1,
+            "slot_type": "Lecture", "scheduled_classes": [
+                {
+                    "event_name": f"Course {rng.randrange(500)} - Lecture {rng.randrange(4) + 1}",
+                    "room_name": f"Room {rng.randrange(200)}",
+                    "teacher_name": f"Teacher {rng.randrange(300)}",
+                    "batches": [f"Batch {rng.randrange(100)}" for _ in range(rng.randrange(1, 4))],
+                }
+                for _ in range(classes_per_slot)
+            ],
+        })
+    return {"message": "Full timetable fetched successfully!", "timetable": timetable}
+
+
+def db_timetable(database_url: str):
+    """The /timetable/full/ payload of the database's active version, or None if there is none."""
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from fastapi import HTTPException
+    import main
+
+    db = sessionmaker(bind=create_engine(database_url))()
+    try:
+        return main.build_full_timetable(db)
+    except HTTPException:
+        return None
+    finally:
+        db.close()
+
+
+def pydantic_render(payload) -> bytes:
+    """What the endpoints did before: build the nested models, validate the response, encode."""
+    built = {
+        "message": payload["message"],
+        "timetable": [
+            schemas.FormattedDay(day=day["day"], timeslots=[
+                schemas.FormattedTimeslot(**{**ts, "scheduled_classes": [
+                    schemas.FormattedClass(**c) for c in ts["scheduled_classes"]
+                ]})
+                for ts in day["timeslots"]
+            ])
+            for day in payload["timetable"]
+        ],
+    }
+    validated = schemas.FormattedTimetableResponse.model_validate(jsonable_encoder(built))
+    return JSONResponse(content=jsonable_encoder(validated)).body
+
+
+def best_of(fn, payload, repeat: int):
+    best, result = None, None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn(payload)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--classes", type=int, nargs="+", default=[1000, 10000, 50000],
+                        help="synthetic timetable sizes (scheduled classes)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--no-db", action="store_true", help="skip the database's active timetable")
+    parser.add_argument("--database-url", default="sqlite:///./timetable.db")
+    args = parser.parse_args()
+
+    cases = []
+    if not args.no_db:
+        payload = db_timetable(args.database_url)
+        if payload is None:
+            print("database has no active timetable; skipping it")
+        else:
+            cases.append(("db", payload))
+    cases += [(f"synthetic {n}", synthetic_timetable(n)) for n in args.classes]
+
+    print(f"{'case':<18} {'bytes':>10} {'pydantic ms':>12} {'orjson ms':>10} {'speedup':>8}  identical")
+    for label, payload in cases:
+        slow, slow_body = best_of(pydantic_render, payload, args.repeat)
+        fast, fast_body = best_of(render_json, payload, args.repeat)
+        print(f"{label:<18} {len(fast_body):>10} {slow * 1000:>12.1f} {fast * 1000:>10.1f} "
+              f"{slow / fast:>7.1f}x  {slow_body == fast_body}")
+
+
+if __name__ == "__main__":
+    main()
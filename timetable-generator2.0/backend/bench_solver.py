@@ -0,0 +1,175 @@
+# backend/bench_solver.py
+"""
+Benchmarks solver options against the current database and synthetic
+instances shaped like the output of /admin/auto-prepare/.
+
+    python bench_solver.py                          # db + synthetic, all variants
+    python bench_solver.py --no-db --pairs 2 4      # synthetic only
+    python bench_solver.py --variants default smallest_domain --time-limit 20
+    python bench_solver.py --variants default low_memory --memory   # + tracemalloc peak
+"""
+import argparse
+import itertools
+import tracemalloc
+from types import SimpleNamespace
+
+import grid_solver
+import solver
+
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
+
+ENGINES = {
+    "slots": solver.create_timetable_solver,
+    "grid": grid_solver.create_grid_timetable_solver,
+}
+
+# limits used by the load-limit variants
+BENCH_LOAD_LIMITS = {
+    "batch": {"max_daily_hours": 5, "max_consecutive_hours": 3},
+    "teacher": {"max_daily_hours": 4, "max_consecutive_hours": 2},
+}
+
+# label -> extra kwargs for the engine's solve function ("engine" picks the engine, default "slots")
+VARIANTS = {
+    "default": {},
+    "smallest_domain": {"search_strategy": "smallest_domain"},
+    "room_type_hour": {"redundant_constraints": ["room_type_hour"]},
+    "batch_daily": {"redundant_constraints": ["batch_daily"]},
+    "teacher_daily": {"redundant_constraints": ["teacher_daily"]},
+    "all_redundant": {"redundant_constraints": list(solver.REDUNDANT_CONSTRAINTS)},
+    "low_memory": {"low_memory": True},
+    "load_limits": {"load_limits": BENCH_LOAD_LIMITS},
+    "low_memory_load_limits": {"low_memory": True, "load_limits": BENCH_LOAD_LIMITS},
+    "grid": {"engine": "grid"},
+}
+
+# keeps database sessions alive so relationships can still lazy-load
+_open_sessions = []
+
+
+# ==========================================================
+# ====================  INSTANCES  =========================
+# ==========================================================
+def load_db_instance(database_url: str = "sqlite:///./timetable.db"):
+    """Loads the problem the same way /generate-timetable/ does."""
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from loader import load_problem
+
+    engine = create_engine(database_url)
+    db = sessionmaker(bind=engine)()
+    _open_sessions.append(db)
+    return load_problem(db)
+
+
+def synthetic_instance(pairs: int):
+    """
+    Builds an in-memory instance with `pairs` batch pairs, two 4-credit, two
+    3-credit and one lab course, and the Mon–Fri slot grid of auto-prepare.
+    """
+    ids = itertools.count(1)
+
+    timeslots = []
+    for day in DAYS:
+        for hour in range(9, 17):
+            if hour != 12:
+                timeslots.append(SimpleNamespace(id=next(ids), day=day, start_time=hour, end_time=hour + 1,
+                                                 duration=1, slot_type="Lecture"))
+        for hour in [9, 10, 13, 14, 15]:
+            timeslots.append(SimpleNamespace(id=next(ids), day=day, start_time=hour, end_time=hour + 2,
+                                             duration=2, slot_type="Lab"))
+
+    rooms = []
+    for room_type, count, capacity in [("Lecture_X", max(2, pairs), 70),
+                                       ("Tutorial_Y", max(2, pairs), 40),
+                                       ("Lab", pairs // 2 + 1, 70)]:
+        for i in range(count):
+            rooms.append(SimpleNamespace(id=next(ids), name=f"{room_type}{i + 1}",
+                                         capacity=capacity, room_type=room_type))
+
+    batches = [SimpleNamespace(id=next(ids), name=f"F{i + 1}", size=30) for i in range(2 * pairs)]
+
+    teachers = []
+    courses = []
+    for name, credits in [("AA", 4), ("BB", 4), ("CC", 3), ("DD", 3), ("LL", 2)]:
+        course_teachers = [SimpleNamespace(id=next(ids), name=f"{name}{i + 1}", max_hours=16)
+                           for i in range(2 + pairs // 3)]
+        teachers.extend(course_teachers)
+        courses.append(SimpleNamespace(id=next(ids), name=name, credit_hours=credits, teachers=course_teachers))
+
+    events = []
+
+    def add_event(name, duration, room_type, course, event_batches):
+        events.append(SimpleNamespace(id=next(ids), name=name, duration=duration, required_room_type=room_type,
+                                      total_size=sum(b.size for b in event_batches), course=course,
+                                      course_id=course.id, batches=event_batches))
+
+    for b1, b2 in zip(batches[::2], batches[1::2]):
+        for course in courses:
+            if course.credit_hours in (3, 4):
+                for i in range(1, 4):
+                    add_event(f"{course.name} Lecture {i} ({b1.name}+{b2.name})", 1, "Lecture_X", course, [b1, b2])
+            if course.credit_hours == 4:
+                for b in (b1, b2):
+                    add_event(f"{course.name} Tutorial ({b.name})", 1, "Tutorial_Y", course, [b])
+            if course.credit_hours == 2:
+                add_event(f"{course.name} ({b1.name}+{b2.name})", 2, "Lab", course, [b1, b2])
+
+    return {"events": events, "rooms": rooms, "timeslots": timeslots, "teachers": teachers}
+
+
+# ==========================================================
+# ======================  RUNNER  ==========================
+# ==========================================================
+def _seconds(value):
+    return "-" if value is None else f"{value:.2f}"
+
+
+def run(instances, variants, time_limit: float, measure_memory: bool = False):
+    """
+    Solves every instance with every variant. With measure_memory, the Python
+    heap peak of each solve is traced (slower; CP-SAT's own C++ memory is not
+    included).
+    """
+    header = (f"{'instance':<14}{'variant':<24}{'status':<12}{'build s':>9}{'solve s':>9}"
+              f"{'first s':>9}{'vars':>9}{'cons':>10}{'peak MB':>9}")
+    print(header)
+    print("-" * len(header))
+    for instance_name, db_data in instances:
+        for label in variants:
+            stats = {}
+            if measure_memory:
+                tracemalloc.start()
+            options = dict(VARIANTS[label])
+            solve = ENGINES[options.pop("engine", "slots")]
+            solve(db_data, time_limit_seconds=time_limit, stats=stats, **options)
+            peak = None
+            if measure_memory:
+                peak = tracemalloc.get_traced_memory()[1] / 2 ** 20
+                tracemalloc.stop()
+            print(f"{instance_name:<14}{label:<24}{stats.get('status', 'ABORTED'):<12}"
+                  f"{stats.get('build_seconds', 0):>9.2f}{stats.get('solve_seconds', 0):>9.2f}"
+                  f"{_seconds(stats.get('first_solution_seconds')):>9}"
+                  f"{stats.get('num_variables', 0):>9}{stats.get('num_constraints', 0):>10}"
+                  f"{'-' if peak is None else f'{peak:.1f}':>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default="sqlite:///./timetable.db", help="database to load an instance from")
+    parser.add_argument("--no-db", action="store_true", help="skip the database instance")
+    parser.add_argument("--pairs", type=int, nargs="*", default=[2, 3], help="synthetic instance sizes (batch pairs)")
+    parser.add_argument("--variants", nargs="*", default=list(VARIANTS), choices=list(VARIANTS))
+    parser.add_argument("--time-limit", type=float, default=30.0)
+    parser.add_argument("--memory", action="store_true", help="trace peak Python memory per solve")
+    args = parser.parse_args()
+
+    instances = [(f"synthetic-{p}", synthetic_instance(p)) for p in args.pairs]
+    if not args.no_db:
+        instances.insert(0, ("database", load_db_instance(args.db)))
+
+    run(instances, args.variants, args.time_limit, measure_memory=args.memory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+# backend/bulk.py
+from sqlalchemy import insert, tuple_
+from sqlalchemy.orm import Session
+
+from models import Course, Batch, SchedulableEvent, event_batches_table
+
+
+def bulk_create(db: Session, model, rows, key_columns):
+    """
+    Creates `rows` (dicts of column values) the way the single create
+    endpoints do, but with one SELECT for the duplicates, one executemany
+    INSERT for the rest and one SELECT for their ids (the key is unique, so no
+    RETURNING ordering is needed), in the caller's transaction:
+    - a row whose `key_columns` match an existing row is not inserted and
+      reports that row's id as "existing";
+    - repeats inside `rows` are inserted once; later copies report the id of
+      the first as "existing".
+    Returns [(id, status)] in the order of `rows`.
+    """
+    if not rows:
+        return []
+
+    keys = [tuple(row[c] for c in key_columns) for row in rows]
+    columns = [getattr(model, c) for c in key_columns]
+
+    def ids_by_key(wanted):
+        if len(columns) == 1:
+            match = columns[0].in_({key[0] for key in wanted})
+        else:
+            match = tuple_(*columns).in_(set(wanted))
+        return {tuple(found[1:]): found[0] for found in db.query(model.id, *columns).filter(match)}
+
+    existing = ids_by_key(keys)
+
+    new_rows = {}  # key -> row, first occurrence only
+    for key, row in zip(keys, rows):
+        if key not in existing:
+            new_rows.setdefault(key, row)
+
+    created = {}
+    if new_rows:
+        db.execute(insert(model), list(new_rows.values()))
+        created = ids_by_key(new_rows)
+
+    results = []
+    for key in keys:
+        if key in created:
+            results.append((created.pop(key), "created"))
+            existing[key] = results[-1][0]
+        else:
+            results.append((existing[key], "existing"))
+    return results
+
+
+def bulk_create_events(db: Session, events):
+    """
+    Creates schedulable events (schemas.SchedulableEventCreate) with their
+    batch links: course and batch ids are checked with one query each, valid
+    events go in one INSERT ... RETURNING (ids in parameter order; backends
+    without a row sentinel, like SQLite, run it row by row) and their links in
+    one executemany INSERT. Events are never deduplicated (neither are single
+    creates). Returns [(id, status, detail)] in input order; invalid events get
+    (None, "error", reason) and are skipped.
+    """
+    if not events:
+        return []
+
+    course_ids = {e.course_id for e in events}
+    batch_ids = {b for e in events for b in e.batch_ids}
+    known_courses = {row[0] for row in db.query(Course.id).filter(Course.id.in_(course_ids))}
+    known_batches = {row[0] for row in db.query(Batch.id).filter(Batch.id.in_(batch_ids))}
+
+    valid = []
+    results = []
+    for event in events:
+        if event.course_id not in known_courses:
+            results.append((None, "error", "Course not found"))
+        elif not set(event.batch_ids) <= known_batches:
+            results.append((None, "error", "One or more batch IDs not found"))
+        else:
+            valid.append((len(results), event))
+            results.append(None)
+
+    if valid:
+        ids = db.execute(
+            insert(SchedulableEvent).returning(SchedulableEvent.id, sort_by_parameter_order=True),
+            [event.model_dump(exclude={"batch_ids"}) for _, event in valid],
+        ).scalars().all()
+        links = []
+        for (index, event), event_id in zip(valid, ids):
+            results[index] = (event_id, "created", None)
+            links.extend({"event_id": event_id, "batch_id": b} for b in dict.fromkeys(event.batch_ids))
+        if links:
+            db.execute(insert(event_batches_table), links)
+    return results
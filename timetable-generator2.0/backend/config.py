@@ -0,0 +1,55 @@
+# backend/config.py
+"""
+Runtime settings, read once from the environment (and a .env file next to
+the process, if present). Defaults suit a single-machine SQLite setup.
+
+    DATABASE_URL=postgresql://timetable:secret@db/timetable   # default sqlite:///./timetable.db
+    DB_POOL_SIZE=10 DB_MAX_OVERFLOW=20                        # Postgres connection pool
+    TENANTS=default,college-a                                 # one database per tenant (X-Tenant header)
+    QUERY_STATS_HEADERS=1                                     # dev: per-request query counts
+"""
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def _int(name: str, default: int) -> int:
+    return int(os.environ.get(name, default))
+
+
+def _flag(name: str) -> bool:
+    return os.environ.get(name, "").lower() in ("1", "true", "yes")
+
+
+def _list(name: str, default: str) -> list:
+    return [item.strip() for item in os.environ.get(name, default).split(",") if item.strip()]
+
+
+DATABASE_URL = os.environ.get("DATABASE_URL", "sqlite:///./timetable.db")
+
+# --- Tenants: "default" uses DATABASE_URL, the others TENANT_DATABASE_URL with {tenant} filled in ---
+TENANTS = _list("TENANTS", "default")
+TENANT_DATABASE_URL = os.environ.get("TENANT_DATABASE_URL", "sqlite:///./tenants/{tenant}.db")
+
+# --- Connection pool (server databases; SQLite files use SQLAlchemy's defaults) ---
+DB_POOL_SIZE = _int("DB_POOL_SIZE", 10)
+DB_MAX_OVERFLOW = _int("DB_MAX_OVERFLOW", 20)
+DB_POOL_TIMEOUT = _int("DB_POOL_TIMEOUT", 30)  # seconds to wait for a free connection
+DB_POOL_RECYCLE = _int("DB_POOL_RECYCLE", 1800)  # seconds before a connection is replaced
+
+# --- SQLite pragmas, applied on every new connection ---
+SQLITE_CACHE_SIZE_KB = _int("SQLITE_CACHE_SIZE_KB", 64 * 1024)
+SQLITE_MMAP_SIZE = _int("SQLITE_MMAP_SIZE", 256 * 1024 * 1024)
+SQLITE_BUSY_TIMEOUT_MS = _int("SQLITE_BUSY_TIMEOUT_MS", 5000)
+
+# --- Solver ---
+SOLVER_WORKERS = _int("SOLVER_WORKERS", 2)  # solver processes per API process
+GENERATION_CONCURRENCY = _int("GENERATION_CONCURRENCY", 1)  # generations running at once per tenant
+# CP-SAT search workers per solve, so a tenant's solves take at most
+# GENERATION_CONCURRENCY * SOLVER_CPUS cores; 0 = one per core (no cap)
+SOLVER_CPUS = _int("SOLVER_CPUS", 4)
+
+# --- Development ---
+QUERY_STATS_HEADERS = _flag("QUERY_STATS_HEADERS")  # X-DB-Query-Count / X-DB-Time-Ms response headers
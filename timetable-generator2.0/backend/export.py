@@ -0,0 +1,106 @@
+# backend/export.py
+import csv
+import io
+import zlib
+
+from sqlalchemy import select
+
+from models import Teacher, Batch, Room, Timeslot, SchedulableEvent, ScheduledClass, event_batches_table
+from response_cache import render_json
+
+EXPORT_FIELDS = [
+    "id", "day", "start_time", "end_time", "slot_type",
+    "event_id", "event_name", "teacher_id", "teacher_name", "room_id", "room_name", "batches",
+]
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+CHUNK_ROWS = 500  # rows fetched per cursor round-trip, and lines per chunk sent
+
+
+def export_statement(version_id: int):
+    """One row per (scheduled class, batch) of the version, in class id order."""
+    return (
+        select(
+            ScheduledClass.id, Timeslot.day, Timeslot.start_time, Timeslot.end_time, Timeslot.slot_type,
+            ScheduledClass.event_id, SchedulableEvent.name, ScheduledClass.teacher_id, Teacher.name,
+            ScheduledClass.room_id, Room.name, Batch.name,
+        )
+        .join(Timeslot, Timeslot.id == ScheduledClass.timeslot_id)
+        .join(SchedulableEvent, SchedulableEvent.id == ScheduledClass.event_id)
+        .outerjoin(Teacher, Teacher.id == ScheduledClass.teacher_id)
+        .outerjoin(Room, Room.id == ScheduledClass.room_id)
+        .outerjoin(event_batches_table, event_batches_table.c.event_id == ScheduledClass.event_id)
+        .outerjoin(Batch, Batch.id == event_batches_table.c.batch_id)
+        .where(ScheduledClass.version_id == version_id)
+        .order_by(ScheduledClass.id, event_batches_table.c.batch_id)
+    )
+
+
+async def export_classes(async_engine, version_id: int):
+    """
+    Yields one dict (EXPORT_FIELDS) per scheduled class of the version,
+    reading from a server-side cursor CHUNK_ROWS rows at a time, so memory
+    does not grow with the timetable. Uses a connection of its own, as the
+    response is still streaming after the request's session is gone.
+    """
+    async with async_engine.connect() as conn:
+        result = await conn.stream(export_statement(version_id).execution_options(yield_per=CHUNK_ROWS))
+        current = None
+        async for row in result:
+            if current is None or current["id"] != row[0]:
+                if current is not None:
+                    yield current
+                current = dict(zip(EXPORT_FIELDS, row[:-1]), batches=[])
+            if row[-1] is not None:
+                current["batches"].append(row[-1])
+        if current is not None:
+            yield current
+
+
+async def export_lines(classes, export_format: str):
+    """NDJSON: one JSON object per line. CSV: a header, then batches joined with ';'."""
+    if export_format == "ndjson":
+        async for scheduled in classes:
+            yield render_json(scheduled) + b"\n"
+        return
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+
+    def csv_line(values):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerow(values)
+        return buffer.getvalue().encode()
+
+    yield csv_line(EXPORT_FIELDS)
+    async for scheduled in classes:
+        yield csv_line([*(scheduled[f] for f in EXPORT_FIELDS[:-1]), ";".join(scheduled["batches"])])
+
+
+async def chunked(lines, size: int = CHUNK_ROWS):
+    """Joins `size` lines per chunk, so the response is not written line by line."""
+    chunk = []
+    async for line in lines:
+        chunk.append(line)
+        if len(chunk) >= size:
+            yield b"".join(chunk)
+            chunk = []
+    if chunk:
+        yield b"".join(chunk)
+
+
+async def gzipped(chunks):
+    compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)  # gzip container
+    async for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def accepts_gzip(accept_encoding: str) -> bool:
+    for coding in accept_encoding.split(","):
+        name, _, params = coding.strip().partition(";")
+        if name.strip().lower() == "gzip" and params.replace(" ", "") not in ("q=0", "q=0.0"):
+            return True
+    return False
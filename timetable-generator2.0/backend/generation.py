@@ -0,0 +1,161 @@
+# backend/generation.py
+import asyncio
+import hashlib
+import json
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+
+from sqlalchemy import inspect
+
+
+def _columns(obj):
+    return [getattr(obj, attr.key) for attr in inspect(obj).mapper.column_attrs]
+
+
+def problem_hash(db_data, options) -> str:
+    """
+    sha256 of what a solve depends on: the column values of every row in
+    db_data (see loader.load_problem), each event's course teachers and
+    batches, and the solver `options`. Equal hashes mean equal timetables
+    are wanted.
+    """
+    problem = {"options": options}
+    for name, rows in db_data.items():
+        problem[name] = [_columns(row) for row in sorted(rows, key=lambda row: row.id)]
+    problem["event_links"] = [
+        [event.id, _columns(event.course) if event.course else None,
+         sorted(t.id for t in event.course.teachers) if event.course else [],
+         sorted(b.id for b in event.batches)]
+        for event in sorted(db_data["events"], key=lambda event: event.id)
+    ]
+    encoded = json.dumps(problem, sort_keys=True, default=str).encode()
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class WorkerSlots:
+    """
+    The `size` workers of a solver pool shared by several datasets, handed
+    out round-robin: a freed slot goes to the dataset that has waited
+    longest for its turn (FIFO within a dataset), so a dataset
+    with many solves queued cannot hold the pool while others wait. Solves
+    only reach the pool once they hold a slot, so none sits in its FIFO
+    queue. Must be used from one event loop.
+    """
+
+    def __init__(self, size: int):
+        self.free = size
+        self._waiting = OrderedDict()  # dataset -> deque of futures; the next dataset to serve first
+
+    def waiting(self, dataset) -> int:
+        return len(self._waiting.get(dataset, ()))
+
+    async def acquire(self, dataset):
+        if self.free and not self._waiting:
+            self.free -= 1
+            return
+        slot = asyncio.get_running_loop().create_future()
+        self._waiting.setdefault(dataset, deque()).append(slot)
+        try:
+            await slot
+        except asyncio.CancelledError:
+            if slot.done() and not slot.cancelled():
+                self.release(dataset)  # handed over just as we were cancelled
+            elif slot in self._waiting.get(dataset, ()):
+                self._waiting[dataset].remove(slot)
+                if not self._waiting[dataset]:
+                    del self._waiting[dataset]
+            raise
+
+    def release(self, dataset):
+        """Frees `dataset`'s slot: its next solve goes behind the other datasets' waiting ones."""
+        if dataset in self._waiting:
+            self._waiting.move_to_end(dataset)
+        while self._waiting:
+            dataset, queue = next(iter(self._waiting.items()))
+            slot = queue.popleft()
+            if queue:
+                self._waiting.move_to_end(dataset)
+            else:
+                del self._waiting[dataset]
+            if not slot.done():
+                slot.set_result(None)
+                return
+        self.free += 1
+
+
+class GenerationCoordinator:
+    """
+    Single-flight for timetable generation:
+    - requests for the same (dataset, problem hash) while a generation is in
+      flight join it and get its result (or its exception) instead of
+      solving again;
+    - different problems of one dataset queue on a semaphore, so at most
+      `max_concurrent` generations per dataset run at a time;
+    - running generations take one of the `workers` solver slots through
+      worker() for their solve, shared fairly across datasets (WorkerSlots).
+    Generations run as their own tasks, so a client that disconnects does
+    not cancel a solve others are waiting on. Must be used from one event
+    loop.
+    """
+
+    def __init__(self, max_concurrent: int = 1, workers: int = 1):
+        self.max_concurrent = max_concurrent
+        self.slots = WorkerSlots(workers)
+        self._in_flight = {}  # (dataset, problem_hash) -> asyncio.Task
+        self._limits = {}  # dataset -> asyncio.Semaphore
+        self._running = {}  # dataset -> generations holding the semaphore
+        self._waiters = {}  # dataset -> requests waiting on an in-flight generation
+
+    def stats(self, dataset) -> dict:
+        """
+        Queue state of `dataset`: generations running (solving on a worker,
+        or publishing), waiting for a solver worker within the dataset's
+        quota, queued behind the quota, and the requests waiting on them.
+        """
+        admitted = self._running.get(dataset, 0)
+        waiting_for_worker = self.slots.waiting(dataset)
+        in_flight = sum(1 for d, _ in self._in_flight if d == dataset)
+        return {
+            "max_concurrent": self.max_concurrent,
+            "running": admitted - waiting_for_worker,
+            "waiting_for_worker": waiting_for_worker,
+            "queued": in_flight - admitted,
+            "waiting_requests": self._waiters.get(dataset, 0),
+        }
+
+    @asynccontextmanager
+    async def worker(self, dataset):
+        """Holds one of the shared solver slots for the block; the generation's solve runs inside it."""
+        await self.slots.acquire(dataset)
+        try:
+            yield
+        finally:
+            self.slots.release(dataset)
+
+    async def run(self, dataset, key, generate):
+        """Returns `await generate()`, or the result of the identical generation already running."""
+        task = self._in_flight.get((dataset, key))
+        if task is None:
+            task = asyncio.ensure_future(self._limited(dataset, generate))
+            self._in_flight[(dataset, key)] = task
+            task.add_done_callback(lambda done: self._finished(dataset, key, done))
+        self._waiters[dataset] = self._waiters.get(dataset, 0) + 1
+        try:
+            return await asyncio.shield(task)
+        finally:
+            self._waiters[dataset] -= 1
+
+    async def _limited(self, dataset, generate):
+        limit = self._limits.setdefault(dataset, asyncio.Semaphore(self.max_concurrent))
+        async with limit:
+            self._running[dataset] = self._running.get(dataset, 0) + 1
+            try:
+                return await generate()
+            finally:
+                self._running[dataset] -= 1
+
+    def _finished(self, dataset, key, task):
+        if self._in_flight.get((dataset, key)) is task:
+            del self._in_flight[(dataset, key)]
+        if not task.cancelled():
+            task.exception()  # retrieved, even if every waiter went away
@@ -0,0 +1,245 @@
+# backend/grid_solver.py
+from ortools.sat.python import cp_model
+import time
+from collections import defaultdict
+
+from solver import FirstSolutionTimer, slot_hour_mask, slot_type_for, room_fits
+
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+
+def mask_runs(mask):
+    """Yields the (start, end) runs of consecutive set bits of an hour bitmask."""
+    hour = 0
+    while mask:
+        if mask & 1:
+            start = hour
+            while mask & 1:
+                mask >>= 1
+                hour += 1
+            yield start, hour
+        else:
+            mask >>= 1
+            hour += 1
+
+
+def create_grid_timetable_solver(db_data, time_limit_seconds: float = 120.0, debug: bool = False,
+                                 stats: dict = None, num_workers: int = 0):
+    """
+    Start-time formulation of the timetable on a day/hour grid:
+    - each event gets one integer start on the week grid (day * day_span + hour),
+      restricted to the starts where a Timeslot row of its duration and slot type
+      begins, so the lunch break and the day end come from the same rows the
+      slot engine uses;
+    - teacher and room are picked by one literal per eligible teacher / room,
+      independently of the start;
+    - rooms, teachers and batches each get a NoOverlap over (optional) intervals,
+      and availability windows are fixed intervals inside the same NoOverlap.
+    Model size grows with events x (rooms + teachers) instead of
+    events x teachers x rooms x timeslots, and overlapping Lecture/Lab rows
+    need no pairwise constraints. Times are whole clock hours (0-24), as
+    everywhere else in the backend (availability windows, slot_hour_mask,
+    the occupancy index).
+
+    Takes the same db_data as solver.create_timetable_solver (including pins
+    and teacher/room unavailability) and returns the same
+    event_id -> (teacher_id, room_id, timeslot_id) mapping, or None.
+    num_workers caps CP-SAT's search threads (0: one per core).
+    """
+    build_started = time.perf_counter()
+
+    events = db_data.get("events", []) or []
+    rooms = db_data.get("rooms", []) or []
+    timeslots = db_data.get("timeslots", []) or []
+    teachers = db_data.get("teachers", []) or []
+    pins = db_data.get("pins", []) or []
+    teacher_windows = db_data.get("teacher_unavailability", []) or []
+    room_windows = db_data.get("room_unavailability", []) or []
+
+    if not events:
+        if debug: print("Grid solver: no events provided.")
+        return {}
+    if not rooms or not timeslots:
+        if debug: print("Grid solver: no rooms or no timeslots provided.")
+        return None
+
+    teachers_by_id = {t.id: t for t in teachers}
+    timeslots_by_id = {ts.id: ts for ts in timeslots}
+    pins_by_event = {p.event_id: p for p in pins}
+
+    # --- Week grid ---
+    day_order = {day: i for i, day in enumerate(DAYS)}
+    for ts in timeslots:
+        day_order.setdefault(ts.day, len(day_order))
+    day_span = max(ts.end_time for ts in timeslots) + 1
+
+    def week_time(day, hour):
+        return day_order[day] * day_span + hour
+
+    # allowed starts per (duration, slot_type), and the row each start maps back to
+    starts_by_kind = defaultdict(set)
+    slot_at = {}  # (week_start, duration, slot_type) -> timeslot id
+    for ts in sorted(timeslots, key=lambda x: x.id):
+        start = week_time(ts.day, ts.start_time)
+        starts_by_kind[(ts.duration, ts.slot_type)].add(start)
+        slot_at.setdefault((start, ts.duration, ts.slot_type), ts.id)
+
+    rooms_by_type = defaultdict(list)
+    for r in rooms:
+        rooms_by_type[r.room_type].append(r)
+
+    if debug:
+        print("=== Grid solver debug: DB summary ===")
+        print(f"Events: {len(events)}, Rooms: {len(rooms)}, Timeslots: {len(timeslots)}, "
+              f"Teachers: {len(teachers)}, day span: {day_span}")
+
+    model = cp_model.CpModel()
+
+    event_starts = {}  # event_id -> IntVar
+    event_rooms = {}  # event_id -> {room_id: BoolVar}
+    event_teachers = {}  # event_id -> {teacher_id: BoolVar}
+    event_kinds = {}  # event_id -> slot types its start may map to
+    room_intervals = defaultdict(list)
+    teacher_intervals = defaultdict(list)
+    batch_intervals = defaultdict(list)
+    teacher_load = defaultdict(list)  # teacher_id -> [(BoolVar, duration)]
+
+    for event in events:
+        course = getattr(event, "course", None)
+        if not course:
+            if debug: print(f"Error: Event {event.id} ('{getattr(event, 'name', None)}') has no course relationship.")
+            return None
+        pin = pins_by_event.get(event.id)
+
+        # --- teachers (a pinned teacher overrides course eligibility) ---
+        eligible_teachers = getattr(course, "teachers", []) or []
+        if pin is not None and pin.teacher_id is not None:
+            pinned_teachers = [t for t in eligible_teachers if t.id == pin.teacher_id]
+            if not pinned_teachers and pin.teacher_id in teachers_by_id:
+                pinned_teachers = [teachers_by_id[pin.teacher_id]]
+            eligible_teachers = pinned_teachers
+        if teachers:
+            eligible_teachers = [t for t in eligible_teachers if t.id in teachers_by_id]
+
+        # --- rooms ---
+        possible_rooms = [r for r in rooms_by_type.get(event.required_room_type, []) if room_fits(r, event)]
+        if pin is not None and pin.room_id is not None:
+            possible_rooms = [r for r in possible_rooms if r.id == pin.room_id]
+
+        # --- starts ---
+        expected_slot_type = slot_type_for(event.duration)
+        if expected_slot_type:
+            kinds = [expected_slot_type]
+        else:
+            kinds = sorted({slot_type for (duration, slot_type) in starts_by_kind if duration == event.duration})
+        starts = set()
+        for kind in kinds:
+            starts |= starts_by_kind.get((event.duration, kind), set())
+        if pin is not None and pin.timeslot_id is not None:
+            ts = timeslots_by_id.get(pin.timeslot_id)
+            starts &= {week_time(ts.day, ts.start_time)} if ts is not None else set()
+
+        if not eligible_teachers or not possible_rooms or not starts:
+            if debug:
+                print(f"Error: Event {event.id} ('{getattr(event, 'name', None)}') has an empty domain: "
+                      f"teachers={len(eligible_teachers)}, rooms={len(possible_rooms)}, starts={len(starts)}")
+            return None
+
+        start = model.NewIntVarFromDomain(cp_model.Domain.FromValues(sorted(starts)), f"start_e{event.id}")
+        event_starts[event.id] = start
+        event_kinds[event.id] = kinds
+
+        event_rooms[event.id] = {}
+        for room in possible_rooms:
+            lit = model.NewBoolVar(f"e{event.id}_r{room.id}")
+            event_rooms[event.id][room.id] = lit
+            room_intervals[room.id].append(
+                model.NewOptionalFixedSizeIntervalVar(start, event.duration, lit, f"e{event.id}_r{room.id}_iv"))
+        model.AddExactlyOne(event_rooms[event.id].values())
+
+        event_teachers[event.id] = {}
+        for teacher in eligible_teachers:
+            lit = model.NewBoolVar(f"e{event.id}_t{teacher.id}")
+            event_teachers[event.id][teacher.id] = lit
+            teacher_intervals[teacher.id].append(
+                model.NewOptionalFixedSizeIntervalVar(start, event.duration, lit, f"e{event.id}_t{teacher.id}_iv"))
+            teacher_load[teacher.id].append((lit, event.duration))
+        model.AddExactlyOne(event_teachers[event.id].values())
+
+        interval = model.NewFixedSizeIntervalVar(start, event.duration, f"e{event.id}_iv")
+        for batch in getattr(event, "batches", []):
+            batch_intervals[batch.id].append(interval)
+
+    # --- Availability windows: fixed intervals in the resource's NoOverlap ---
+    # (merged per resource and day first, fixed intervals must not overlap each other)
+    for windows, resource_attr, intervals_by_resource in [(teacher_windows, "teacher_id", teacher_intervals),
+                                                          (room_windows, "room_id", room_intervals)]:
+        blocked = defaultdict(int)
+        for window in windows:
+            blocked[(getattr(window, resource_attr), window.day)] |= slot_hour_mask(window)
+        for (resource_id, day), mask in blocked.items():
+            if resource_id not in intervals_by_resource or day not in day_order:
+                continue
+            for start, end in mask_runs(mask):
+                intervals_by_resource[resource_id].append(
+                    model.NewFixedSizeIntervalVar(week_time(day, start), end - start, ""))
+
+    # --- No overlaps ---
+    for intervals in (*room_intervals.values(), *teacher_intervals.values(), *batch_intervals.values()):
+        if len(intervals) > 1:
+            model.AddNoOverlap(intervals)
+
+    # --- Teacher workload ---
+    for t_id, terms in teacher_load.items():
+        teacher = teachers_by_id.get(t_id)
+        max_hours = getattr(teacher, "max_hours", 16)
+        if sum(d for _, d in terms) > max_hours:
+            model.Add(cp_model.LinearExpr.WeightedSum([lit for lit, _ in terms], [d for _, d in terms]) <= max_hours)
+
+    # --- Solve ---
+    build_seconds = time.perf_counter() - build_started
+    solver = cp_model.CpSolver()
+    solver.parameters.max_time_in_seconds = time_limit_seconds
+    if num_workers:
+        solver.parameters.num_workers = num_workers
+    print("Solving timetable with CP-SAT (grid engine)...")
+
+    timer = FirstSolutionTimer() if stats is not None else None
+    try:
+        status = solver.Solve(model, timer)
+    except Exception as e:
+        if debug:
+            print("Solver raised exception:", e)
+        return None
+    status_name = solver.StatusName(status)
+    print("Solver finished with status:", status_name)
+
+    if stats is not None:
+        model_proto = model.Proto()
+        stats.update({
+            "status": status_name,
+            "engine": "grid",
+            "build_seconds": build_seconds,
+            "solve_seconds": solver.WallTime(),
+            "first_solution_seconds": timer.first_solution_seconds,
+            "num_variables": len(model_proto.variables),
+            "num_constraints": len(model_proto.constraints),
+        })
+
+    if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        print("No feasible solution found.")
+        return None
+
+    # --- Map starts back to Timeslot rows ---
+    solution = {}
+    for event in events:
+        start = solver.Value(event_starts[event.id])
+        room_id = next(r_id for r_id, lit in event_rooms[event.id].items() if solver.BooleanValue(lit))
+        teacher_id = next(t_id for t_id, lit in event_teachers[event.id].items() if solver.BooleanValue(lit))
+        timeslot_id = next(slot_at[(start, event.duration, kind)] for kind in event_kinds[event.id]
+                           if (start, event.duration, kind) in slot_at)
+        solution[event.id] = (teacher_id, room_id, timeslot_id)
+
+    if debug:
+        print(f"✅ Found solution: {len(solution)} events scheduled.")
+    return solution
@@ -0,0 +1,86 @@
+# backend/listing.py
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only
+
+MAX_PAGE_SIZE = 1000
+
+
+def parse_fields(fields, schema):
+    """`fields=name,course` -> ["name", "course"]; None (or empty) means every field of `schema`."""
+    if fields is None:
+        return None
+    requested = list(dict.fromkeys(f.strip() for f in fields.split(",") if f.strip()))
+    if not requested:
+        return None
+    unknown = [f for f in requested if f not in schema.model_fields]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown fields {unknown}. Use any of: {', '.join(schema.model_fields)}",
+        )
+    return requested
+
+
+def parse_id_list(ids, name: str):
+    """`batch_ids=3,1,3` -> [3, 1]; None (or empty) -> []."""
+    try:
+        parsed = list(dict.fromkeys(int(i) for i in (ids or "").split(",") if i.strip()))
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"{name} must be comma-separated integers")
+    if len(parsed) > MAX_PAGE_SIZE:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_PAGE_SIZE} {name}")
+    return parsed
+
+
+async def list_page(db: AsyncSession, stmt, model, schema, relationships=None, fields=None, cursor=None,
+                    limit=None):
+    """
+    Runs a list statement (select(model) plus filters) with keyset pagination
+    and sparse fields and renders it as `schema` items:
+    - rows come in id order; with `limit`, one page is returned and the
+      X-Next-Cursor header carries the cursor of the next page (absent on the
+      last page);
+    - `relationships` maps relationship fields of `schema` to the loader
+      option that fetches them in bulk (selectinload); only the requested
+      ones are loaded, and with `fields` only the requested columns are
+      selected (load_only), so unrequested nested objects are never touched.
+    """
+    selected = parse_fields(fields, schema)
+    relationships = relationships or {}
+
+    if selected is None:
+        stmt = stmt.options(*relationships.values())
+    else:
+        columns = [getattr(model, f) for f in selected if f not in relationships]
+        stmt = stmt.options(load_only(*(columns or [model.id])),
+                            *(relationships[f] for f in selected if f in relationships))
+    stmt = stmt.order_by(model.id)
+
+    if cursor is not None:
+        try:
+            stmt = stmt.where(model.id > int(cursor))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    headers = {}
+    if limit is None:
+        rows = (await db.scalars(stmt)).all()
+    else:
+        rows = (await db.scalars(stmt.limit(limit + 1))).all()
+        if len(rows) > limit:
+            rows = rows[:limit]
+            headers["X-Next-Cursor"] = str(rows[-1].id)
+
+    if selected is None:
+        items = [schema.model_validate(row) for row in rows]
+    else:
+        adapters = {f: TypeAdapter(schema.model_fields[f].annotation) for f in selected}
+        items = [
+            {f: adapters[f].validate_python(getattr(row, f), from_attributes=True) for f in selected}
+            for row in rows
+        ]
+    return JSONResponse(content=jsonable_encoder(items), headers=headers)
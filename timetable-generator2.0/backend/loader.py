@@ -0,0 +1,68 @@
+# backend/loader.py
+from types import SimpleNamespace
+
+from sqlalchemy import inspect
+from sqlalchemy.orm import Session, selectinload
+
+from models import (
+    Course, Teacher, Room, Timeslot, SchedulableEvent,
+    PinnedAssignment, TeacherUnavailability, RoomUnavailability,
+)
+
+
+def load_problem(db: Session):
+    """
+    Loads everything the solvers read, in a fixed number of round-trips
+    regardless of dataset size (10 queries):
+    - events, with event.course -> course.teachers and event.batches
+      eager-loaded through selectinload (one IN query per relationship),
+    - rooms, timeslots, teachers, pins and teacher/room unavailability.
+    Returns the db_data dict expected by solver.create_timetable_solver and
+    grid_solver.create_grid_timetable_solver; the solvers then never trigger
+    a lazy load.
+    """
+    events = (
+        db.query(SchedulableEvent)
+        .options(
+            selectinload(SchedulableEvent.course).selectinload(Course.teachers),
+            selectinload(SchedulableEvent.batches),
+        )
+        .all()
+    )
+
+    return {
+        "events": events,
+        "rooms": db.query(Room).all(),
+        "timeslots": db.query(Timeslot).all(),
+        "teachers": db.query(Teacher).all(),
+        "pins": db.query(PinnedAssignment).all(),
+        "teacher_unavailability": db.query(TeacherUnavailability).all(),
+        "room_unavailability": db.query(RoomUnavailability).all(),
+    }
+
+
+def _columns(row):
+    return SimpleNamespace(**{attr.key: getattr(row, attr.key) for attr in inspect(row).mapper.column_attrs})
+
+
+def plain_problem(db_data):
+    """
+    db_data with every ORM object copied to a SimpleNamespace of its column
+    values, keeping the links the solvers follow (event.course.teachers,
+    event.batches), so it pickles to a solver process without a session.
+    """
+    copies = {}  # (model, id) -> copy, so shared rows stay shared
+
+    def copy(row):
+        key = (type(row), row.id)
+        if key not in copies:
+            copies[key] = _columns(row)
+        return copies[key]
+
+    plain = {name: [copy(row) for row in rows] for name, rows in db_data.items()}
+    for event in db_data.get("events", []):
+        copy(event).batches = [copy(batch) for batch in event.batches]
+        copy(event).course = copy(event.course) if event.course else None
+        if event.course:
+            copy(event.course).teachers = [copy(teacher) for teacher in event.course.teachers]
+    return plain
@@ -1,10 +1,16 @@
 # backend/main.py
-from fastapi import FastAPI, Depends, HTTPException, Body
+from fastapi import FastAPI, Depends, HTTPException, Body, Query, Request, Header
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
+from sqlalchemy import select, literal, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
 from collections import defaultdict
-from typing import List
-from fastapi.responses import FileResponse
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import List, Optional
+import asyncio
+import multiprocessing
+from fastapi.responses import FileResponse, StreamingResponse
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph
 from reportlab.lib.pagesizes import A4
 from reportlab.lib import colors
@@ -14,17 +20,64 @@ import os
 import models
 import schemas
 import solver
+import grid_solver
+from loader import load_problem, plain_problem
+from bulk import bulk_create, bulk_create_events
+from listing import list_page, parse_id_list, MAX_PAGE_SIZE
+from materialized import format_timetable_entries, formatted_entry_columns
+from versions import (
+    timetable_state, in_active_version, activate_version, publish_solution, timetable_changed,
+)
+from response_cache import ResponseCache, FastJSONResponse, cached_json_response
+from query_stats import QueryStatsMiddleware
+from generation import GenerationCoordinator, problem_hash
+from tenants import Tenant, DEFAULT_TENANT, open_tenants
+from occupancy import DAYS, OccupancyIndexes
+from moves import PLACEMENT_FIELDS, PlacementRules, editing_occupancy, swap_problems, apply_placements
+from export import EXPORT_MEDIA_TYPES, export_classes, export_lines, chunked, gzipped, accepts_gzip
+import config
 from models import (
-    SessionLocal, engine, Base,
     Teacher, Batch, Room, Timeslot,
-    SchedulableEvent, ScheduledClass, event_batches_table
+    SchedulableEvent, ScheduledClass, PinnedAssignment,
+    TeacherUnavailability, RoomUnavailability, event_batches_table,
+    TeacherTimetableEntry, BatchTimetableEntry, TimetableVersion,
 )
 
 # --- Database Setup ---
-Base.metadata.create_all(bind=engine)
+# One database per tenant, each migrated to the latest schema (see tenants.py)
+tenants = open_tenants(config.TENANTS)
 
 app = FastAPI(title="Timetable Generator API")
 
+# Rendered timetable responses, keyed by (tenant, view, entity, version, revision)
+timetable_cache = ResponseCache(max_entries=2048)
+
+# Who is busy when in each tenant's published timetable (see occupancy.py):
+# built on startup and after solves, kept in step by edits, read by the
+# free-slot, room-availability and conflict checks
+occupancy_indexes = OccupancyIndexes()
+
+# Solves run in worker processes: building the model is pure Python (seconds
+# on large instances) and would hold the GIL the request handlers need.
+# Problems go over as plain data (see loader.plain_problem); "spawn" because
+# forking a process with running threads can copy a held lock.
+solver_executor = ProcessPoolExecutor(max_workers=config.SOLVER_WORKERS,
+                                      mp_context=multiprocessing.get_context("spawn"))
+
+# Identical concurrent generate requests share one solve; others queue per
+# tenant, and tenants take turns at the solver pool's workers, so one
+# college's solves never hold up another's
+generations = GenerationCoordinator(max_concurrent=config.GENERATION_CONCURRENCY, workers=config.SOLVER_WORKERS)
+
+def load_occupancy(db: Session, tenant_name: str):
+    """The occupancy index of the tenant's published timetable, rebuilt if the revision moved."""
+    return occupancy_indexes.get(db, tenant_name, *timetable_state(db))
+
+
+for _tenant in tenants.values():
+    with _tenant.SessionLocal() as _db:
+        load_occupancy(_db, _tenant.name)
+
 # --- CORS ---
 origins = ["http://localhost:3000", "http://localhost:5173"]
 app.add_middleware(
@@ -33,16 +86,33 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor", "X-DB-Query-Count", "X-DB-Time-Ms"],
 )
+if config.QUERY_STATS_HEADERS:
+    app.add_middleware(QueryStatsMiddleware)
 
 # --- Dependency ---
-def get_db():
-    db = SessionLocal()
+async def get_tenant(x_tenant: str = Header(DEFAULT_TENANT)) -> Tenant:
+    tenant = tenants.get(x_tenant)
+    if tenant is None:
+        raise HTTPException(status_code=404, detail=f"Unknown tenant '{x_tenant}'")
+    return tenant
+
+
+def get_db(tenant: Tenant = Depends(get_tenant)):
+    db = tenant.SessionLocal()
     try:
         yield db
     finally:
         db.close()
 
+# Read endpoints are `async def` on this session; writes stay sync on get_db.
+# Sync helpers (builders in this file, loader, versions) run through
+# db.run_sync, which hands them a regular Session on the async connection.
+async def get_async_db(tenant: Tenant = Depends(get_tenant)):
+    async with tenant.AsyncSessionLocal() as db:
+        yield db
+
 # --- Root ---
 @app.get("/")
 def read_root():
@@ -66,8 +136,18 @@ def create_teacher(teacher: schemas.TeacherCreate, db: Session = Depends(get_db)
     return new_teacher
 
 @app.get("/teachers/", response_model=List[schemas.Teacher])
-def get_teachers(db: Session = Depends(get_db)):
-    return db.query(Teacher).all()
+async def get_teachers(
+    course_id: Optional[int] = None,
+    fields: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Optional: course_id filter, fields=a,b (sparse), limit/cursor (next cursor in X-Next-Cursor)."""
+    stmt = select(Teacher)
+    if course_id is not None:
+        stmt = stmt.where(Teacher.courses.any(models.Course.id == course_id))
+    return await list_page(db, stmt, Teacher, schemas.Teacher, fields=fields, cursor=cursor, limit=limit)
 
 
 # --- BATCHES ---
@@ -83,8 +163,8 @@ def create_batch(batch: schemas.BatchCreate, db: Session = Depends(get_db)):
     return new_batch
 
 @app.get("/batches/", response_model=List[schemas.Batch])
-def get_batches(db: Session = Depends(get_db)):
-    return db.query(Batch).all()
+async def get_batches(db: AsyncSession = Depends(get_async_db)):
+    return (await db.scalars(select(Batch))).all()
 
 
 # --- ROOMS ---
@@ -100,8 +180,42 @@ def create_room(room: schemas.RoomCreate, db: Session = Depends(get_db)):
     return new_room
 
 @app.get("/rooms/", response_model=List[schemas.Room])
-def get_rooms(db: Session = Depends(get_db)):
-    return db.query(Room).all()
+async def get_rooms(
+    room_type: Optional[str] = None,
+    fields: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Optional: room_type filter, fields=a,b (sparse), limit/cursor (next cursor in X-Next-Cursor)."""
+    stmt = select(Room)
+    if room_type is not None:
+        stmt = stmt.where(Room.room_type == room_type)
+    return await list_page(db, stmt, Room, schemas.Room, fields=fields, cursor=cursor, limit=limit)
+
+@app.get("/rooms/available/", response_model=List[schemas.Room])
+async def get_available_rooms(
+    timeslot_id: int,
+    min_capacity: Optional[int] = None,
+    room_type: Optional[str] = None,
+    tenant: Tenant = Depends(get_tenant),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Rooms with no class in the published timetable during the timeslot (checked on the occupancy index)."""
+    timeslot = await db.get(Timeslot, timeslot_id)
+    if not timeslot:
+        raise HTTPException(status_code=404, detail="Timeslot not found")
+    if timeslot.day not in DAYS:
+        raise HTTPException(status_code=400, detail=f"Timeslot is on '{timeslot.day}', outside the timetable week")
+
+    index = await db.run_sync(load_occupancy, tenant.name)
+    hours = index.span(timeslot.day, timeslot.start_time, timeslot.end_time)
+    stmt = select(Room).order_by(Room.id)
+    if min_capacity is not None:
+        stmt = stmt.where(Room.capacity >= min_capacity)
+    if room_type is not None:
+        stmt = stmt.where(Room.room_type == room_type)
+    return [room for room in (await db.scalars(stmt)).all() if index.is_free("room", room.id, hours)]
 
 
 # --- TIMESLOTS ---
@@ -116,13 +230,14 @@ def create_timeslot(timeslot: schemas.TimeslotCreate, db: Session = Depends(get_
         return existing
     new_ts = Timeslot(**timeslot.model_dump())
     db.add(new_ts)
+    timetable_changed(db)
     db.commit()
     db.refresh(new_ts)
     return new_ts
 
 @app.get("/timeslots/", response_model=List[schemas.Timeslot])
-def get_timeslots(db: Session = Depends(get_db)):
-    return db.query(Timeslot).all()
+async def get_timeslots(db: AsyncSession = Depends(get_async_db)):
+    return (await db.scalars(select(Timeslot))).all()
 
 
 # --- COURSES ---
@@ -135,8 +250,20 @@ def create_course(course: schemas.CourseCreate, db: Session = Depends(get_db)):
     return db_course
 
 @app.get("/courses/", response_model=List[schemas.Course])
-def get_courses(db: Session = Depends(get_db)):
-    return db.query(models.Course).all()
+async def get_courses(
+    teacher_id: Optional[int] = None,
+    fields: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Optional: teacher_id filter, fields=a,b (sparse), limit/cursor (next cursor in X-Next-Cursor)."""
+    stmt = select(models.Course)
+    if teacher_id is not None:
+        stmt = stmt.where(models.Course.teachers.any(Teacher.id == teacher_id))
+    return await list_page(db, stmt, models.Course, schemas.Course,
+                     relationships={"teachers": selectinload(models.Course.teachers)},
+                     fields=fields, cursor=cursor, limit=limit)
 
 @app.post("/courses/{course_id}/assign-teachers/")
 def assign_teachers_to_course(course_id: int, payload: dict = Body(...), db: Session = Depends(get_db)):
@@ -154,6 +281,7 @@ def assign_teachers_to_course(course_id: int, payload: dict = Body(...), db: Ses
             course.teachers.append(teacher)
 
     db.add(course)
+    timetable_changed(db)  # the batch view shows the course's first teacher
     db.commit()
     db.refresh(course)
     db.flush()
@@ -185,8 +313,257 @@ def create_schedulable_event(event: schemas.SchedulableEventCreate, db: Session
     return db_event
 
 @app.get("/schedulable-events/", response_model=List[schemas.SchedulableEvent])
-def get_schedulable_events(db: Session = Depends(get_db)):
-    return db.query(SchedulableEvent).all()
+async def get_schedulable_events(
+    course_id: Optional[int] = None,
+    batch_id: Optional[int] = None,
+    room_type: Optional[str] = None,
+    fields: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Optional: course_id / batch_id / room_type (required_room_type) filters,
+    fields=a,b (sparse: course, teacher and batches are only loaded when
+    listed), limit/cursor (next cursor in X-Next-Cursor).
+    """
+    stmt = select(SchedulableEvent)
+    if course_id is not None:
+        stmt = stmt.where(SchedulableEvent.course_id == course_id)
+    if batch_id is not None:
+        stmt = stmt.where(SchedulableEvent.batches.any(Batch.id == batch_id))
+    if room_type is not None:
+        stmt = stmt.where(SchedulableEvent.required_room_type == room_type)
+    return await list_page(db, stmt, SchedulableEvent, schemas.SchedulableEvent,
+                     relationships={
+                         "course": selectinload(SchedulableEvent.course).selectinload(models.Course.teachers),
+                         "teacher": selectinload(SchedulableEvent.teacher),
+                         "batches": selectinload(SchedulableEvent.batches),
+                     },
+                     fields=fields, cursor=cursor, limit=limit)
+
+
+# --- BULK CREATE ---
+# One request per array: duplicates are looked up in one query, new rows go in
+# one executemany insert and everything commits once. Existing rows (same
+# natural key as the single create endpoints use) are reported, not updated.
+def bulk_response(results):
+    items = [
+        schemas.BulkItemResult(index=i, id=result[0], status=result[1], detail=result[2] if len(result) > 2 else None)
+        for i, result in enumerate(results)
+    ]
+    return schemas.BulkCreateResponse(
+        created=sum(item.status == "created" for item in items),
+        existing=sum(item.status == "existing" for item in items),
+        failed=sum(item.status == "error" for item in items),
+        results=items,
+    )
+
+@app.post("/bulk/teachers", response_model=schemas.BulkCreateResponse)
+def bulk_create_teachers(teachers: List[schemas.TeacherCreate], db: Session = Depends(get_db)):
+    results = bulk_create(db, Teacher, [t.model_dump() for t in teachers], ["name"])
+    db.commit()
+    return bulk_response(results)
+
+@app.post("/bulk/batches", response_model=schemas.BulkCreateResponse)
+def bulk_create_batches(batches: List[schemas.BatchCreate], db: Session = Depends(get_db)):
+    results = bulk_create(db, Batch, [b.model_dump() for b in batches], ["name"])
+    db.commit()
+    return bulk_response(results)
+
+@app.post("/bulk/rooms", response_model=schemas.BulkCreateResponse)
+def bulk_create_rooms(rooms: List[schemas.RoomCreate], db: Session = Depends(get_db)):
+    results = bulk_create(db, Room, [r.model_dump() for r in rooms], ["name"])
+    db.commit()
+    return bulk_response(results)
+
+@app.post("/bulk/timeslots", response_model=schemas.BulkCreateResponse)
+def bulk_create_timeslots(timeslots: List[schemas.TimeslotCreate], db: Session = Depends(get_db)):
+    results = bulk_create(db, Timeslot, [ts.model_dump() for ts in timeslots], ["day", "start_time", "end_time"])
+    if any(status == "created" for _, status in results):
+        timetable_changed(db)
+    db.commit()
+    return bulk_response(results)
+
+@app.post("/bulk/schedulable-events", response_model=schemas.BulkCreateResponse)
+def bulk_create_schedulable_events(events: List[schemas.SchedulableEventCreate], db: Session = Depends(get_db)):
+    results = bulk_create_events(db, events)
+    db.commit()
+    return bulk_response(results)
+
+
+# --- PINNED ASSIGNMENTS ---
+def pin_clashes(db: Session, pin: schemas.PinnedAssignmentCreate, event, timeslot):
+    """
+    Why no solve could keep a pin at `timeslot` next to the others: another
+    event pinned at overlapping hours to the same teacher, room or a shared
+    batch, or the pinned teacher or room unavailable then. [] when none.
+    """
+    def overlaps(start_time, end_time):
+        return start_time < timeslot.end_time and timeslot.start_time < end_time
+
+    problems = []
+    batch_ids = {b.id for b in event.batches}
+    others = (
+        db.query(PinnedAssignment, Timeslot)
+        .join(Timeslot, Timeslot.id == PinnedAssignment.timeslot_id)
+        .options(selectinload(PinnedAssignment.event).selectinload(SchedulableEvent.batches))
+        .filter(PinnedAssignment.event_id != event.id, Timeslot.day == timeslot.day)
+        .order_by(PinnedAssignment.id)
+    )
+    for other, other_slot in others:
+        if not overlaps(other_slot.start_time, other_slot.end_time):
+            continue
+        shared = []
+        if pin.teacher_id is not None and other.teacher_id == pin.teacher_id:
+            shared.append(f"teacher {pin.teacher_id}")
+        if pin.room_id is not None and other.room_id == pin.room_id:
+            shared.append(f"room {pin.room_id}")
+        shared += [f"batch {b.id}" for b in other.event.batches if b.id in batch_ids]
+        if shared:
+            problems.append(f"Event {other.event_id} is pinned to {', '.join(shared)} at overlapping hours "
+                            f"(timeslot {other_slot.id})")
+
+    for label, entity_id, model, column in [("Teacher", pin.teacher_id, TeacherUnavailability,
+                                             TeacherUnavailability.teacher_id),
+                                            ("Room", pin.room_id, RoomUnavailability, RoomUnavailability.room_id)]:
+        if entity_id is None:
+            continue
+        windows = db.query(model).filter(column == entity_id, model.day == timeslot.day).order_by(model.start_time)
+        for window in windows:
+            if overlaps(window.start_time, window.end_time):
+                problems.append(f"{label} {entity_id} is unavailable on {window.day} "
+                                f"{window.start_time}-{window.end_time}")
+    return problems
+
+
+@app.post("/pins/", response_model=schemas.PinnedAssignment)
+def create_pin(pin: schemas.PinnedAssignmentCreate, db: Session = Depends(get_db)):
+    """
+    Locks an event (fully or partly) before generation. One pin per event.
+    The room and timeslot must pass the solvers' own filters for the event
+    (room type and capacity, duration and slot type), and the pin must not
+    clash with another pin or an unavailability window (pin_clashes), or no
+    solve could place it.
+    """
+    event = db.get(SchedulableEvent, pin.event_id)
+    if not event:
+        raise HTTPException(status_code=404, detail="Event not found")
+    pinned = {}
+    for model, ref_id, label in [(Teacher, pin.teacher_id, "Teacher"),
+                                 (Room, pin.room_id, "Room"),
+                                 (Timeslot, pin.timeslot_id, "Timeslot")]:
+        if ref_id is not None:
+            pinned[label] = db.get(model, ref_id)
+            if not pinned[label]:
+                raise HTTPException(status_code=404, detail=f"{label} not found")
+
+    room, timeslot = pinned.get("Room"), pinned.get("Timeslot")
+    if room is not None and not solver.room_fits(room, event):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Room {room.name} is a {room.room_type} room for {room.capacity}; "
+                   f"the event needs a {event.required_room_type} room for {event.total_size}",
+        )
+    if timeslot is not None and not solver.timeslot_fits(timeslot, event):
+        slot_type = solver.slot_type_for(event.duration)
+        raise HTTPException(
+            status_code=400,
+            detail=f"Timeslot {timeslot.id} is a {timeslot.duration}h {timeslot.slot_type} slot; "
+                   f"the event needs a {event.duration}h {slot_type or 'any'} slot",
+        )
+    clashes = pin_clashes(db, pin, event, timeslot) if timeslot is not None else []
+    if clashes:
+        raise HTTPException(status_code=400, detail="; ".join(clashes))
+
+    db_pin = db.query(PinnedAssignment).filter(PinnedAssignment.event_id == pin.event_id).first()
+    if db_pin:
+        db_pin.teacher_id = pin.teacher_id
+        db_pin.room_id = pin.room_id
+        db_pin.timeslot_id = pin.timeslot_id
+    else:
+        db_pin = PinnedAssignment(**pin.model_dump())
+        db.add(db_pin)
+    db.commit()
+    db.refresh(db_pin)
+    return db_pin
+
+@app.get("/pins/", response_model=List[schemas.PinnedAssignment])
+async def get_pins(db: AsyncSession = Depends(get_async_db)):
+    return (await db.scalars(select(PinnedAssignment))).all()
+
+@app.delete("/pins/{pin_id}")
+def delete_pin(pin_id: int, db: Session = Depends(get_db)):
+    pin = db.get(PinnedAssignment, pin_id)
+    if not pin:
+        raise HTTPException(status_code=404, detail="Pin not found")
+
+    db.delete(pin)
+    db.commit()
+    return {"message": "Pin deleted successfully"}
+
+
+# --- AVAILABILITY ---
+def validate_window(window: schemas.UnavailabilityCreate):
+    if window.day not in ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]:
+        raise HTTPException(status_code=400, detail=f"Unknown day '{window.day}'")
+    if window.start_time >= window.end_time:
+        raise HTTPException(status_code=400, detail="start_time must be before end_time")
+    # clock hours: the solvers and the occupancy index shift bit masks by them
+    if window.start_time < 0 or window.end_time > 24:
+        raise HTTPException(status_code=400, detail="start_time and end_time must be hours between 0 and 24")
+
+@app.post("/teachers/{teacher_id}/unavailability/", response_model=schemas.TeacherUnavailability)
+def create_teacher_unavailability(teacher_id: int, window: schemas.UnavailabilityCreate, db: Session = Depends(get_db)):
+    if not db.get(Teacher, teacher_id):
+        raise HTTPException(status_code=404, detail="Teacher not found")
+    validate_window(window)
+    db_window = TeacherUnavailability(teacher_id=teacher_id, **window.model_dump())
+    db.add(db_window)
+    db.commit()
+    db.refresh(db_window)
+    return db_window
+
+@app.get("/teachers/{teacher_id}/unavailability/", response_model=List[schemas.TeacherUnavailability])
+async def get_teacher_unavailability(teacher_id: int, db: AsyncSession = Depends(get_async_db)):
+    return (await db.scalars(
+        select(TeacherUnavailability).where(TeacherUnavailability.teacher_id == teacher_id)
+    )).all()
+
+@app.delete("/teachers/{teacher_id}/unavailability/{window_id}")
+def delete_teacher_unavailability(teacher_id: int, window_id: int, db: Session = Depends(get_db)):
+    window = db.get(TeacherUnavailability, window_id)
+    if not window or window.teacher_id != teacher_id:
+        raise HTTPException(status_code=404, detail="Unavailability window not found")
+
+    db.delete(window)
+    db.commit()
+    return {"message": "Unavailability window deleted successfully"}
+
+@app.post("/rooms/{room_id}/unavailability/", response_model=schemas.RoomUnavailability)
+def create_room_unavailability(room_id: int, window: schemas.UnavailabilityCreate, db: Session = Depends(get_db)):
+    if not db.get(Room, room_id):
+        raise HTTPException(status_code=404, detail="Room not found")
+    validate_window(window)
+    db_window = RoomUnavailability(room_id=room_id, **window.model_dump())
+    db.add(db_window)
+    db.commit()
+    db.refresh(db_window)
+    return db_window
+
+@app.get("/rooms/{room_id}/unavailability/", response_model=List[schemas.RoomUnavailability])
+async def get_room_unavailability(room_id: int, db: AsyncSession = Depends(get_async_db)):
+    return (await db.scalars(select(RoomUnavailability).where(RoomUnavailability.room_id == room_id))).all()
+
+@app.delete("/rooms/{room_id}/unavailability/{window_id}")
+def delete_room_unavailability(room_id: int, window_id: int, db: Session = Depends(get_db)):
+    window = db.get(RoomUnavailability, window_id)
+    if not window or window.room_id != room_id:
+        raise HTTPException(status_code=404, detail="Unavailability window not found")
+
+    db.delete(window)
+    db.commit()
+    return {"message": "Unavailability window deleted successfully"}
 
 
 # --- DEBUG ---
@@ -201,42 +578,78 @@ def debug_courses_teachers(db: Session = Depends(get_db)):
 # ==========================================================
 # ==============  SHARED TIMETABLE FORMATTER  ==============
 # ==========================================================
+# What build_formatted_timetable reads of a scheduled class; rows are cheaper to load than objects.
+# Queries of these order by ScheduledClass.id: classes sharing a timeslot are listed in id order, whichever
+# of the composite indexes the planner picks.
+SCHEDULED_CLASS_COLUMNS = (ScheduledClass.event_id, ScheduledClass.teacher_id, ScheduledClass.room_id,
+                           ScheduledClass.timeslot_id)
+
+
 def build_formatted_timetable(db: Session, scheduled_classes, free_only: bool = False):
-    """Helper: builds a FormattedTimetableResponse list from scheduled classes."""
+    """
+    Helper: builds a FormattedTimetableResponse list from scheduled classes
+    (ScheduledClass objects or rows with event_id, teacher_id, room_id and
+    timeslot_id), as plain dicts shaped like schemas.FormattedDay.
+    Classes are grouped by timeslot in one pass and names come from preloaded
+    lookups, so the query count is constant (timeslots + 4 lookups) whatever
+    the timetable size.
+    """
     days = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
-    all_timeslots = db.query(Timeslot).all()
-    occupied = {(sc.timeslot_id) for sc in scheduled_classes}
+    all_timeslots = db.query(Timeslot.id, Timeslot.day, Timeslot.start_time, Timeslot.end_time,
+                             Timeslot.duration, Timeslot.slot_type).all()
+
+    classes_by_slot = defaultdict(list)
+    for sc in scheduled_classes:
+        classes_by_slot[sc.timeslot_id].append(sc)
+
+    event_names, teacher_names, room_names, batch_names = {}, {}, {}, defaultdict(list)
+    if not free_only and scheduled_classes:
+        event_ids = {sc.event_id for sc in scheduled_classes}
+        teacher_ids = {sc.teacher_id for sc in scheduled_classes if sc.teacher_id}
+        room_ids = {sc.room_id for sc in scheduled_classes}
+        event_names = dict(
+            db.query(SchedulableEvent.id, SchedulableEvent.name).filter(SchedulableEvent.id.in_(event_ids))
+        )
+        teacher_names = dict(db.query(Teacher.id, Teacher.name).filter(Teacher.id.in_(teacher_ids)))
+        room_names = dict(db.query(Room.id, Room.name).filter(Room.id.in_(room_ids)))
+        batch_rows = (
+            db.query(event_batches_table.c.event_id, Batch.name)
+            .join(Batch, Batch.id == event_batches_table.c.batch_id)
+            .filter(event_batches_table.c.event_id.in_(event_ids))
+            .order_by(event_batches_table.c.event_id, event_batches_table.c.batch_id)
+        )
+        for event_id, batch_name in batch_rows:
+            batch_names[event_id].append(batch_name)
 
     final_timetable = []
     for day in days:
-        day_schedule = schemas.FormattedDay(day=day, timeslots=[])
+        day_schedule = {"day": day, "timeslots": []}
         day_timeslots = sorted([ts for ts in all_timeslots if ts.day == day],
                                key=lambda x: x.start_time)
 
         for ts in day_timeslots:
-            is_busy = ts.id in occupied
+            is_busy = ts.id in classes_by_slot
             if free_only and is_busy:
                 continue
-            formatted_ts = schemas.FormattedTimeslot(
-                id=ts.id, start_time=ts.start_time, end_time=ts.end_time,
-                duration=ts.duration, slot_type=ts.slot_type, scheduled_classes=[]
-            )
+            formatted_ts = {
+                "id": ts.id, "start_time": ts.start_time, "end_time": ts.end_time,
+                "duration": ts.duration, "slot_type": ts.slot_type, "scheduled_classes": []
+            }
 
             if not free_only and is_busy:
-                for sc in [x for x in scheduled_classes if x.timeslot_id == ts.id]:
-                    event = db.get(SchedulableEvent, sc.event_id)
-                    teacher = db.get(Teacher, sc.teacher_id) if sc.teacher_id else None
-                    room = db.get(Room, sc.room_id)
-                    if event and room:
-                        formatted_class = schemas.FormattedClass(
-                            event_name=event.name,
-                            room_name=room.name,
-                            teacher_name=teacher.name if teacher else "Unassigned",
-                            batches=[b.name for b in event.batches],
-                        )
-                        formatted_ts.scheduled_classes.append(formatted_class)
-
-            day_schedule.timeslots.append(formatted_ts)
+                for sc in classes_by_slot[ts.id]:
+                    event_name = event_names.get(sc.event_id)
+                    room_name = room_names.get(sc.room_id)
+                    if event_name is not None and room_name is not None:
+                        formatted_class = {
+                            "event_name": event_name,
+                            "room_name": room_name,
+                            "teacher_name": teacher_names.get(sc.teacher_id, "Unassigned"),
+                            "batches": batch_names[sc.event_id],
+                        }
+                        formatted_ts["scheduled_classes"].append(formatted_class)
+
+            day_schedule["timeslots"].append(formatted_ts)
         final_timetable.append(day_schedule)
 
     return final_timetable
@@ -246,264 +659,513 @@ def build_formatted_timetable(db: Session, scheduled_classes, free_only: bool =
 # ====================  SOLVER  ============================
 # ==========================================================
 @app.post("/generate-timetable/", response_model=schemas.FormattedTimetableResponse)
-def generate_timetable_endpoint(db: Session = Depends(get_db)):
-    all_events = db.query(SchedulableEvent).all()
-    all_rooms = db.query(Room).all()
-    all_timeslots = db.query(Timeslot).all()
-    all_teachers = db.query(Teacher).all()
-    all_courses = db.query(models.Course).all()
-
-    db_data = {
-        "events": all_events,
-        "rooms": all_rooms,
-        "timeslots": all_timeslots,
-        "teachers": all_teachers,
-        "courses": all_courses,
-    }
+async def generate_timetable_endpoint(
+    engine: str = "slots",
+    search_strategy: str = "default",
+    redundant_constraints: List[str] = Query([]),
+    low_memory: bool = False,
+    batch_max_daily_hours: Optional[int] = Query(None, ge=1),
+    batch_max_consecutive_hours: Optional[int] = Query(None, ge=1),
+    teacher_max_daily_hours: Optional[int] = Query(None, ge=1),
+    teacher_max_consecutive_hours: Optional[int] = Query(None, ge=1),
+    tenant: Tenant = Depends(get_tenant),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    engine="slots" (default) chooses among Timeslot rows and takes the
+    search_strategy / redundant_constraints / low_memory options and the
+    batch_/teacher_ daily and consecutive hour limits;
+    engine="grid" models a start hour per event (see grid_solver).
+    A request for the same data and options as a generation already running
+    waits for that one and returns its timetable. Each tenant runs at most
+    GENERATION_CONCURRENCY generations at a time, each solve on at most
+    SOLVER_CPUS search workers.
+    """
+    if engine not in ("slots", "grid"):
+        raise HTTPException(status_code=400, detail=f"Unknown engine '{engine}'. Use 'slots' or 'grid'.")
+
+    load_limits = {}
+    for kind, max_daily, max_consecutive in [
+        ("batch", batch_max_daily_hours, batch_max_consecutive_hours),
+        ("teacher", teacher_max_daily_hours, teacher_max_consecutive_hours),
+    ]:
+        limit = {}
+        if max_daily is not None:
+            limit["max_daily_hours"] = max_daily
+        if max_consecutive is not None:
+            limit["max_consecutive_hours"] = max_consecutive
+        if limit:
+            load_limits[kind] = limit
+    if load_limits and engine == "grid":
+        raise HTTPException(status_code=400, detail="Daily / consecutive hour limits need engine=slots.")
+    if search_strategy not in solver.SEARCH_STRATEGIES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown search_strategy '{search_strategy}'. Use one of: {', '.join(solver.SEARCH_STRATEGIES)}",
+        )
+    unknown = [c for c in redundant_constraints if c not in solver.REDUNDANT_CONSTRAINTS]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown redundant_constraints {unknown}. Use any of: {', '.join(solver.REDUNDANT_CONSTRAINTS)}",
+        )
+
+    db_data = await db.run_sync(load_problem)
+    # end the read transaction before the long solve; loaded objects stay usable (expire_on_commit=False)
+    await db.commit()
+
+    problem = plain_problem(db_data)
+    if engine == "grid":
+        solve = partial(grid_solver.create_grid_timetable_solver, problem, time_limit_seconds=120.0, debug=True,
+                        num_workers=config.SOLVER_CPUS)
+        options = {"engine": engine}
+    else:
+        solve = partial(
+            solver.create_timetable_solver,
+            problem, time_limit_seconds=120.0, debug=True,
+            search_strategy=search_strategy, redundant_constraints=redundant_constraints,
+            low_memory=low_memory, load_limits=load_limits, num_workers=config.SOLVER_CPUS,
+        )
+        options = {"engine": engine, "search_strategy": search_strategy,
+                   "redundant_constraints": redundant_constraints, "low_memory": low_memory,
+                   "load_limits": load_limits}
 
-    solution = solver.create_timetable_solver(db_data, time_limit_seconds=120.0, debug=True)
+    version_id = await generations.run(tenant.name, problem_hash(db_data, options),
+                                       partial(solve_and_publish, tenant, solve, engine))
+
+    timetable = await db.run_sync(build_version_timetable, version_id)
+    return FastJSONResponse({"message": "Timetable generated successfully!", "timetable": timetable})
+
+
+async def solve_and_publish(tenant: Tenant, solve, engine: str) -> int:
+    """
+    Runs `solve` on a solver pool worker, once it is the tenant's turn for
+    one (see generation.WorkerSlots), and publishes its solution as the
+    tenant's active version, in a session of its own (the generation may
+    outlive the request that started it). Returns the version id.
+    """
+    async with generations.worker(tenant.name):
+        solution = await asyncio.get_running_loop().run_in_executor(solver_executor, solve)
 
     if not solution:
         raise HTTPException(status_code=400, detail="No solution found for the given constraints.")
 
-    db.query(ScheduledClass).delete()
-    db.commit()
+    # readers keep the previous version until this commit switches the pointer
+    async with tenant.AsyncSessionLocal() as db:
+        version_id = await db.run_sync(publish_solution, solution, engine)
+        await db.commit()
+        await db.run_sync(load_occupancy, tenant.name)
+    return version_id
 
-    scheduled_map = defaultdict(list)
-    for event_id, (teacher_id, room_id, timeslot_id) in solution.items():
-        scheduled = ScheduledClass(
-            event_id=event_id, teacher_id=teacher_id,
-            room_id=room_id, timeslot_id=timeslot_id
-        )
-        db.add(scheduled)
-        scheduled_map[timeslot_id].append(scheduled)
-    db.commit()
 
-    timetable = build_formatted_timetable(db, [s for sl in scheduled_map.values() for s in sl])
-    return {"message": "Timetable generated successfully!", "timetable": timetable}
+def build_version_timetable(db: Session, version_id: int):
+    scheduled_classes = (
+        db.query(*SCHEDULED_CLASS_COLUMNS)
+        .filter(ScheduledClass.version_id == version_id)
+        .order_by(ScheduledClass.id)
+        .all()
+    )
+    return build_formatted_timetable(db, scheduled_classes)
 
 
 # ==========================================================
 # ==========  TEACHER & BATCH TIMETABLE ENDPOINTS  =========
 # ==========================================================
 @app.get("/teachers/{teacher_id}/timetable/", response_model=schemas.FormattedTimetableResponse)
-def get_teacher_timetable(teacher_id: int, db: Session = Depends(get_db)):
-    teacher = db.get(Teacher, teacher_id)
-    if not teacher:
-        raise HTTPException(status_code=404, detail="Teacher not found")
+async def get_teacher_timetable(teacher_id: int, request: Request, tenant: Tenant = Depends(get_tenant),
+                                db: AsyncSession = Depends(get_async_db)):
+    state = await db.run_sync(timetable_state)
+    return await cached_json_response(timetable_cache, request, (tenant.name, "teacher", teacher_id, *state),
+                                      lambda: db.run_sync(build_teacher_timetable, teacher_id))
 
-    scheduled_classes = (
-        db.query(ScheduledClass)
-        .join(SchedulableEvent)
-        .filter(ScheduledClass.teacher_id == teacher_id)
-        .all()
-    )
 
-    if not scheduled_classes:
-        return {"message": f"No scheduled classes found for {teacher.name}", "timetable": []}
+@app.get("/batches/{batch_id}/timetable/", response_model=schemas.FormattedTimetableResponse)
+async def get_batch_timetable(batch_id: int, request: Request, tenant: Tenant = Depends(get_tenant),
+                              db: AsyncSession = Depends(get_async_db)):
+    state = await db.run_sync(timetable_state)
+    return await cached_json_response(timetable_cache, request, (tenant.name, "batch", batch_id, *state),
+                                      lambda: db.run_sync(build_batch_timetable, batch_id))
 
-    timetable_by_day = {}
 
-    for sc in scheduled_classes:
-        ts = db.get(Timeslot, sc.timeslot_id)
-        if not ts:
-            continue
+@app.get("/batches/{batch_id}/free-slots/", response_model=schemas.FormattedTimetableResponse)
+async def get_batch_free_slots(batch_id: int, request: Request, tenant: Tenant = Depends(get_tenant),
+                               db: AsyncSession = Depends(get_async_db)):
+    state = await db.run_sync(timetable_state)
+    return await cached_json_response(timetable_cache, request, (tenant.name, "batch_free", batch_id, *state),
+                                      lambda: db.run_sync(build_batch_free_slots, batch_id, tenant.name, state))
 
-        event = db.get(SchedulableEvent, sc.event_id)
-        if not event:
-            continue
 
-        room = db.get(Room, sc.room_id)
-        formatted_class = schemas.FormattedClass(
-            event_name=event.name,
-            room_name=room.name if room else "Unknown",
-            teacher_name=teacher.name,
-            batches=[b.name for b in event.batches],
-        )
+@app.get("/timetable/full/", response_model=schemas.FormattedTimetableResponse)
+async def get_full_timetable(request: Request, tenant: Tenant = Depends(get_tenant),
+                             db: AsyncSession = Depends(get_async_db)):
+    """Fetch the active timetable version from ScheduledClass (without rerunning solver)."""
+    state = await db.run_sync(timetable_state)
+    return await cached_json_response(timetable_cache, request, (tenant.name, "full", None, *state),
+                                      lambda: db.run_sync(build_full_timetable))
+
+
+@app.get("/timetables/", response_model=schemas.TimetablesResponse)
+async def get_timetables(request: Request, batch_ids: Optional[str] = None, teacher_ids: Optional[str] = None,
+                         include: Optional[str] = None, tenant: Tenant = Depends(get_tenant),
+                         db: AsyncSession = Depends(get_async_db)):
+    """
+    Timetables of several batches and teachers in one call, keyed by entity
+    id: `/timetables/?batch_ids=1,2&teacher_ids=3&include=free_slots`. Each
+    "timetable" is what /batches/{id}/timetable/ or /teachers/{id}/timetable/
+    returns; include=free_slots adds the batches' /free-slots/ as "free_slots".
+    """
+    batch_id_list = parse_id_list(batch_ids, "batch_ids")
+    teacher_id_list = parse_id_list(teacher_ids, "teacher_ids")
+    extras = {v.strip() for v in (include or "").split(",") if v.strip()}
+    unknown = sorted(extras - {"free_slots"})
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown include {unknown}. Use: free_slots")
+
+    state = await db.run_sync(timetable_state)
+    key = (tenant.name, "many", tuple(batch_id_list), tuple(teacher_id_list), "free_slots" in extras, *state)
+    return await cached_json_response(timetable_cache, request, key,
+                                      lambda: db.run_sync(build_timetables, batch_id_list, teacher_id_list,
+                                                          "free_slots" in extras, tenant.name, state))
+
+
+@app.get("/free-slots/common/", response_model=schemas.FormattedTimetableResponse)
+async def get_common_free_slots(request: Request, batch_ids: Optional[str] = None, teacher_ids: Optional[str] = None,
+                                room_ids: Optional[str] = None, min_duration: int = Query(1, ge=1),
+                                tenant: Tenant = Depends(get_tenant), db: AsyncSession = Depends(get_async_db)):
+    """
+    Blocks of at least `min_duration` hours in which every listed batch,
+    teacher and room is free, e.g. to find a time for an extra session:
+    `/free-slots/common/?batch_ids=1,2&teacher_ids=3&room_ids=4`.
+    """
+    ids = {
+        "batch": parse_id_list(batch_ids, "batch_ids"),
+        "teacher": parse_id_list(teacher_ids, "teacher_ids"),
+        "room": parse_id_list(room_ids, "room_ids"),
+    }
+    if not any(ids.values()):
+        raise HTTPException(status_code=400, detail="Pass at least one of batch_ids, teacher_ids, room_ids")
+
+    state = await db.run_sync(timetable_state)
+    key = (tenant.name, "common_free", *(tuple(sorted(v)) for v in ids.values()), min_duration, *state)
+    return await cached_json_response(timetable_cache, request, key,
+                                      lambda: db.run_sync(build_common_free_slots, ids, min_duration,
+                                                          tenant.name, state))
+
+
+@app.get("/timetable/conflicts/", response_model=List[schemas.TimetableConflict])
+async def get_timetable_conflicts(tenant: Tenant = Depends(get_tenant), db: AsyncSession = Depends(get_async_db)):
+    """Batches, teachers and rooms booked twice at once in the published timetable, per overlapping class pair."""
+    index = await db.run_sync(load_occupancy, tenant.name)
+    return FastJSONResponse([
+        {"kind": kind, "entity_id": entity_id, "class_ids": class_ids}
+        for kind, entity_id, class_ids in index.conflicts()
+    ])
+
+
+@app.get("/timetable/export/")
+async def export_timetable(request: Request, format: str = "ndjson", tenant: Tenant = Depends(get_tenant),
+                           db: AsyncSession = Depends(get_async_db)):
+    """
+    Streams the active version, one scheduled class per line (format=ndjson,
+    or csv), gzip-compressed when the client accepts it. Rows come from a
+    server-side cursor, so memory stays flat however large the timetable.
+    """
+    if format not in EXPORT_MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail=f"Unknown format '{format}'. Use 'ndjson' or 'csv'.")
+    version_id, _ = await db.run_sync(timetable_state)
+    if version_id is None:
+        raise HTTPException(status_code=404, detail="No timetable found. Please generate one first.")
 
-        day_entry = timetable_by_day.setdefault(ts.day, [])
-        day_entry.append({
-            "start_time": ts.start_time,
-            "end_time": ts.end_time,
-            "duration": ts.duration,
-            "class_info": formatted_class,
-        })
+    body = chunked(export_lines(export_classes(tenant.async_engine, version_id), format))
+    headers = {"Content-Disposition": f'attachment; filename="timetable.{format}"', "Vary": "Accept-Encoding"}
+    if accepts_gzip(request.headers.get("accept-encoding", "")):
+        body = gzipped(body)
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(body, media_type=EXPORT_MEDIA_TYPES[format], headers=headers)
 
-    final_timetable = []
-    for day in ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]:
-        if day not in timetable_by_day:
-            continue
 
-        sorted_slots = sorted(timetable_by_day[day], key=lambda x: x["start_time"])
-        formatted_timeslots = [
-            schemas.FormattedTimeslot(
-                id=i + 1,
-                start_time=s["start_time"],
-                end_time=s["end_time"],
-                duration=s["duration"],
-                slot_type="",
-                scheduled_classes=[s["class_info"]],
-            )
-            for i, s in enumerate(sorted_slots)
-        ]
+# Response builders of the views above; each response is rendered once per
+# (tenant, version, revision) and then served from timetable_cache.
+def entity_timetable(name: str, entries):
+    """The teacher / batch timetable response from the entity's entries."""
+    if not entries:
+        return {"message": f"No scheduled classes found for {name}", "timetable": []}
 
-        final_timetable.append(schemas.FormattedDay(day=day, timeslots=formatted_timeslots))
+    return {"message": f"Timetable for {name}", "timetable": format_timetable_entries(entries)}
 
-    return {"message": f"Timetable for {teacher.name}", "timetable": final_timetable}
 
+def build_teacher_timetable(db: Session, teacher_id: int):
+    """Served from teacher_timetable_entries (see materialized.py), one indexed range read."""
+    teacher = db.get(Teacher, teacher_id)
+    if not teacher:
+        raise HTTPException(status_code=404, detail="Teacher not found")
 
-@app.get("/batches/{batch_id}/timetable/", response_model=schemas.FormattedTimetableResponse)
-def get_batch_timetable(batch_id: int, db: Session = Depends(get_db)):
+    entries = (
+        db.query(*formatted_entry_columns(TeacherTimetableEntry))
+        .filter(in_active_version(TeacherTimetableEntry.version_id),
+                TeacherTimetableEntry.teacher_id == teacher_id)
+        .order_by(TeacherTimetableEntry.day_order, TeacherTimetableEntry.position)
+        .all()
+    )
+
+    return entity_timetable(teacher.name, entries)
+
+
+def build_batch_timetable(db: Session, batch_id: int):
+    """Served from batch_timetable_entries (see materialized.py), one indexed range read."""
     batch = db.get(Batch, batch_id)
     if not batch:
         raise HTTPException(status_code=404, detail="Batch not found")
 
-    scheduled_classes = (
-        db.query(ScheduledClass)
-        .join(SchedulableEvent)
-        .join(event_batches_table)
-        .filter(event_batches_table.c.batch_id == batch_id)
+    entries = (
+        db.query(*formatted_entry_columns(BatchTimetableEntry))
+        .filter(in_active_version(BatchTimetableEntry.version_id),
+                BatchTimetableEntry.batch_id == batch_id)
+        .order_by(BatchTimetableEntry.day_order, BatchTimetableEntry.position)
         .all()
     )
 
-    if not scheduled_classes:
-        return {"message": f"No scheduled classes found for {batch.name}", "timetable": []}
+    return entity_timetable(batch.name, entries)
 
-    timetable_by_day = {}
 
-    for sc in scheduled_classes:
-        ts = db.get(Timeslot, sc.timeslot_id)
-        if not ts:
-            continue
-
-        event = db.get(SchedulableEvent, sc.event_id)
-        if not event:
-            continue
 
-        room = db.get(Room, sc.room_id)
-        teacher_name = (
-            event.course.teachers[0].name if event.course and event.course.teachers else "Unassigned"
-        )
+def build_batch_free_slots(db: Session, batch_id: int, tenant_name: str, state):
+    batch = db.get(Batch, batch_id)
+    if not batch:
+        raise HTTPException(status_code=404, detail="Batch not found")
 
-        formatted_class = schemas.FormattedClass(
-            event_name=event.name,
-            room_name=room.name if room else "Unknown",
-            teacher_name=teacher_name,
-            batches=[b.name for b in event.batches],
-        )
+    index = occupancy_indexes.get(db, tenant_name, *state)
+    return {
+        "message": f"Free slots for {batch.name}",
+        "timetable": index.free_days(index.busy_mask([("batch", batch_id)])),
+    }
 
-        day_entry = timetable_by_day.setdefault(ts.day, [])
-        day_entry.append({
-            "start_time": ts.start_time,
-            "end_time": ts.end_time,
-            "duration": ts.duration,
-            "class_info": formatted_class,
-        })
 
-    final_timetable = []
-    for day in ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]:
-        if day not in timetable_by_day:
-            continue
-
-        sorted_slots = sorted(timetable_by_day[day], key=lambda x: x["start_time"])
-        formatted_timeslots = [
-            schemas.FormattedTimeslot(
-                id=i + 1,
-                start_time=s["start_time"],
-                end_time=s["end_time"],
-                duration=s["duration"],
-                slot_type="",
-                scheduled_classes=[s["class_info"]],
+def build_timetables(db: Session, batch_ids, teacher_ids, free_slots: bool, tenant_name: str, state):
+    """
+    The views of /timetables/ from one UNION ALL over both entry tables (in
+    entity, day_order, position order) and one pass over its rows; a batch's
+    free slots come from the occupancy index. Queries: names of the entities
+    and the entries (plus building the index, once per revision).
+    """
+    batch_names, teacher_names = {}, {}
+    if batch_ids:
+        batch_names = dict(db.query(Batch.id, Batch.name).filter(Batch.id.in_(batch_ids)))
+    if teacher_ids:
+        teacher_names = dict(db.query(Teacher.id, Teacher.name).filter(Teacher.id.in_(teacher_ids)))
+    missing = ([f"batch {i}" for i in batch_ids if i not in batch_names]
+               + [f"teacher {i}" for i in teacher_ids if i not in teacher_names])
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Not found: {', '.join(missing)}")
+
+    selects = []
+    for kind, model, entity_column, ids in [
+        ("batch", BatchTimetableEntry, BatchTimetableEntry.batch_id, batch_ids),
+        ("teacher", TeacherTimetableEntry, TeacherTimetableEntry.teacher_id, teacher_ids),
+    ]:
+        if ids:
+            selects.append(
+                select(literal(kind).label("kind"), entity_column.label("entity_id"), model.day_order,
+                       *formatted_entry_columns(model))
+                .where(in_active_version(model.version_id), entity_column.in_(ids))
             )
-            for i, s in enumerate(sorted_slots)
-        ]
-
-        final_timetable.append(schemas.FormattedDay(day=day, timeslots=formatted_timeslots))
-
-    return {"message": f"Timetable for {batch.name}", "timetable": final_timetable}
-
+    entries = defaultdict(list)  # (kind, entity id) -> rows
+    if selects:
+        statement = union_all(*selects) if len(selects) > 1 else selects[0]
+        for row in db.execute(statement.order_by("kind", "entity_id", "day_order", "position")):
+            entries[row.kind, row.entity_id].append(row)
+
+    index = occupancy_indexes.get(db, tenant_name, *state) if free_slots and batch_ids else None
+    batches = {}
+    for batch_id in batch_ids:
+        batch_entries = entries[("batch", batch_id)]
+        views = {"timetable": entity_timetable(batch_names[batch_id], batch_entries)}
+        if free_slots:
+            views["free_slots"] = {
+                "message": f"Free slots for {batch_names[batch_id]}",
+                "timetable": index.free_days(index.busy_mask([("batch", batch_id)])),
+            }
+        batches[str(batch_id)] = views
+    teachers = {}
+    for teacher_id in teacher_ids:
+        teachers[str(teacher_id)] = {
+            "timetable": entity_timetable(teacher_names[teacher_id], entries[("teacher", teacher_id)]),
+        }
+    return {"batches": batches, "teachers": teachers}
+
+
+def build_common_free_slots(db: Session, ids, min_duration: int, tenant_name: str, state):
+    """`ids` maps batch / teacher / room to entity ids; one bitmask OR per entity."""
+    missing = []
+    for kind, model in [("batch", Batch), ("teacher", Teacher), ("room", Room)]:
+        if ids[kind]:
+            found = {row[0] for row in db.query(model.id).filter(model.id.in_(ids[kind]))}
+            missing += [f"{kind} {i}" for i in ids[kind] if i not in found]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Not found: {', '.join(missing)}")
+
+    index = occupancy_indexes.get(db, tenant_name, *state)
+    busy = index.busy_mask((kind, i) for kind, kind_ids in ids.items() for i in kind_ids)
+    plurals = {"batch": "batches", "teacher": "teachers", "room": "rooms"}
+    counts = ", ".join(f"{len(kind_ids)} {kind if len(kind_ids) == 1 else plurals[kind]}"
+                       for kind, kind_ids in ids.items() if kind_ids)
+    return {
+        "message": f"Common free slots for {counts}",
+        "timetable": index.free_days(busy, min_duration),
+    }
 
 
-@app.get("/batches/{batch_id}/free-slots/", response_model=schemas.FormattedTimetableResponse)
-def get_batch_free_slots(batch_id: int, db: Session = Depends(get_db)):
-    batch = db.get(Batch, batch_id)
-    if not batch:
-        raise HTTPException(status_code=404, detail="Batch not found")
-
-    # Get all busy timeslots for this batch
-    busy_classes = (
-        db.query(ScheduledClass)
-        .join(SchedulableEvent)
-        .join(event_batches_table)
-        .filter(event_batches_table.c.batch_id == batch_id)
+def build_full_timetable(db: Session):
+    scheduled_classes = (
+        db.query(*SCHEDULED_CLASS_COLUMNS)
+        .filter(in_active_version(ScheduledClass.version_id))
+        .order_by(ScheduledClass.id)
         .all()
     )
 
-    # Track occupied hours
-    busy_hours = set()
-    for sc in busy_classes:
-        timeslot = db.get(Timeslot, sc.timeslot_id)
-        if not timeslot:
-            continue
-        for h in range(timeslot.start_time, timeslot.end_time):
-            busy_hours.add((timeslot.day, h))
+    if not scheduled_classes:
+        raise HTTPException(status_code=404, detail="No timetable found. Please generate one first.")
 
-    # Prepare response
-    final_timetable = []
-    days = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
-    all_timeslots = db.query(Timeslot).all()
+    timetable = build_formatted_timetable(db, scheduled_classes)
+    return {"message": "Full timetable fetched successfully!", "timetable": timetable}
 
-    for day in days:
-        # Extract all possible hours for the day (from 8–17)
-        day_hours = sorted({ts.start_time for ts in all_timeslots if ts.day == day})
-        if not day_hours:
-            continue
 
-        # Find contiguous free blocks
-        free_blocks = []
-        start = None
-        for hour in range(min(day_hours), max(day_hours) + 1):
-            is_free = (day, hour) not in busy_hours
-            next_is_busy = (day, hour + 1) in busy_hours
-
-            if is_free and start is None:
-                start = hour
-            if start is not None and (not is_free or next_is_busy or hour == max(day_hours)):
-                end = hour + 1 if is_free else hour
-                free_blocks.append((start, end))
-                start = None
-
-        # Format output
-        formatted_timeslots = [
-            schemas.FormattedTimeslot(
-                id=i + 1,
-                start_time=start,
-                end_time=end,
-                duration=end - start,
-                slot_type="",  # remove type
-                scheduled_classes=[],
-            )
-            for i, (start, end) in enumerate(free_blocks)
-        ]
+@app.get("/timetable/versions/", response_model=List[schemas.TimetableVersion])
+async def get_timetable_versions(db: AsyncSession = Depends(get_async_db)):
+    active_id, _ = await db.run_sync(timetable_state)
+    versions = (await db.scalars(select(TimetableVersion).order_by(TimetableVersion.id.desc()))).all()
+    return [
+        schemas.TimetableVersion.model_validate(v).model_copy(update={"is_active": v.id == active_id})
+        for v in versions
+    ]
 
-        final_timetable.append(
-            schemas.FormattedDay(day=day, timeslots=formatted_timeslots)
-        )
+@app.post("/timetable/versions/{version_id}/activate", response_model=schemas.TimetableVersion)
+def activate_timetable_version(version_id: int, db: Session = Depends(get_db)):
+    """Publishes an earlier (or later) generated version again, e.g. to roll back."""
+    version = db.get(TimetableVersion, version_id)
+    if not version:
+        raise HTTPException(status_code=404, detail="Timetable version not found")
 
+    activate_version(db, version_id)
+    db.commit()
+    db.refresh(version)
+    return schemas.TimetableVersion.model_validate(version).model_copy(update={"is_active": True})
+
+
+# --- MANUAL EDITS of the active version, checked on the occupancy index ---
+STALE_EDIT = "The timetable changed while the edit was being checked; try again"
+
+
+@app.patch("/scheduled-classes/{class_id}", response_model=schemas.ScheduledClassMove)
+def move_scheduled_class(
+    class_id: int,
+    move: schemas.ScheduledClassUpdate,
+    dry_run: bool = False,
+    alternatives: int = Query(20, ge=0, le=MAX_PAGE_SIZE),
+    tenant: Tenant = Depends(get_tenant),
+    db: Session = Depends(get_db),
+):
+    """
+    Moves a class of the published timetable to another teacher, room and/or
+    timeslot (fields left out keep their value) without re-solving. Rejected
+    with 409 on a room, teacher or batch overlap, a room or timeslot the
+    solvers would not give the event (solver.room_fits / timeslot_fits), a
+    teacher outside the course, over max_hours or unavailable, or a closed
+    room. A move to where the class already is writes nothing. dry_run=true
+    only checks, and lists up to `alternatives` other valid placements of
+    the class.
+    """
+    with editing_occupancy(db, occupancy_indexes, tenant.name) as index:
+        if class_id not in index.classes:
+            raise HTTPException(status_code=404, detail="Scheduled class not found in the active timetable")
+        rules = PlacementRules(db, index)
+        current = index.classes[class_id]
+        target = {field: current[field] for field in PLACEMENT_FIELDS}
+        target.update(move.model_dump(exclude_none=True))
+        missing = [f"{field[:-3]} {target[field]}" for field, known in
+                   [("teacher_id", rules.teachers), ("room_id", rules.rooms), ("timeslot_id", rules.timeslots)]
+                   if target[field] is not None and target[field] not in known]
+        if missing:
+            raise HTTPException(status_code=404, detail=f"Not found: {', '.join(missing)}")
+
+        moved = [{"id": class_id, "event_id": current["event_id"], **target}]
+        if not dry_run and all(target[field] == current[field] for field in PLACEMENT_FIELDS):
+            # nothing to write: keep the revision, and with it every cached response and ETag
+            return {"message": "Scheduled class is already there", "valid": True, "scheduled_classes": moved}
+
+        placement = rules.placement(class_id, **target)
+        problems = rules.problems(class_id, placement, {class_id})
+        if dry_run:
+            return {
+                "message": "Move is valid" if not problems else "Move is not valid",
+                "valid": not problems,
+                "problems": problems,
+                "scheduled_classes": moved,
+                "alternatives": rules.alternatives(class_id, alternatives) if alternatives else [],
+            }
+        if problems:
+            raise HTTPException(status_code=409, detail="; ".join(problems))
+
+        if not apply_placements(db, index, {class_id: placement}):
+            raise HTTPException(status_code=409, detail=STALE_EDIT)
+    return {"message": "Scheduled class moved", "valid": True, "scheduled_classes": moved}
+
+
+@app.post("/scheduled-classes/swap", response_model=schemas.ScheduledClassMove)
+def swap_scheduled_classes(swap: schemas.ScheduledClassSwap, dry_run: bool = False,
+                           tenant: Tenant = Depends(get_tenant), db: Session = Depends(get_db)):
+    """
+    Swaps the rooms and timeslots of two classes of the published timetable
+    (teachers stay with their classes), with the checks of
+    PATCH /scheduled-classes/{id}. dry_run=true only checks.
+    """
+    if swap.first_id == swap.second_id:
+        raise HTTPException(status_code=400, detail="Pass two different scheduled classes")
+
+    with editing_occupancy(db, occupancy_indexes, tenant.name) as index:
+        missing = [str(i) for i in (swap.first_id, swap.second_id) if i not in index.classes]
+        if missing:
+            raise HTTPException(status_code=404,
+                                detail=f"Scheduled class not found in the active timetable: {', '.join(missing)}")
+        rules = PlacementRules(db, index)
+        first, second = index.classes[swap.first_id], index.classes[swap.second_id]
+        placements = {
+            swap.first_id: rules.placement(swap.first_id, first["teacher_id"], second["room_id"],
+                                           second["timeslot_id"]),
+            swap.second_id: rules.placement(swap.second_id, second["teacher_id"], first["room_id"],
+                                            first["timeslot_id"]),
+        }
+        problems = swap_problems(rules, placements)
+        swapped = [{"id": class_id, **{f: p[f] for f in ("event_id", *PLACEMENT_FIELDS)}}
+                   for class_id, p in placements.items()]
+        if dry_run:
+            return {
+                "message": "Swap is valid" if not problems else "Swap is not valid",
+                "valid": not problems,
+                "problems": problems,
+                "scheduled_classes": swapped,
+            }
+        if problems:
+            raise HTTPException(status_code=409, detail="; ".join(problems))
+
+        if not apply_placements(db, index, placements):
+            raise HTTPException(status_code=409, detail=STALE_EDIT)
+    return {"message": "Scheduled classes swapped", "valid": True, "scheduled_classes": swapped}
+
+
+@app.get("/metrics/generation/", response_model=schemas.GenerationMetrics)
+async def get_generation_metrics():
+    """
+    Generation quotas and queue depth per tenant, and the solver pool they
+    share (solver_cpus_per_solve 0 means one CP-SAT worker per core):
+    running generations hold a worker, waiting_for_worker ones are within
+    their tenant's quota but wait their turn at the pool.
+    """
     return {
-        "message": f"Free slots for {batch.name}",
-        "timetable": final_timetable,
+        "solver_workers": config.SOLVER_WORKERS,
+        "solver_cpus_per_solve": config.SOLVER_CPUS,
+        "tenants": {name: generations.stats(name) for name in tenants},
     }
-@app.get("/timetable/full/", response_model=schemas.FormattedTimetableResponse)
-def get_full_timetable(db: Session = Depends(get_db)):
-    """Fetch the latest full timetable from ScheduledClass (without rerunning solver)."""
-    scheduled_classes = db.query(ScheduledClass).all()
-
-    if not scheduled_classes:
-        raise HTTPException(status_code=404, detail="No timetable found. Please generate one first.")
-
-    timetable = build_formatted_timetable(db, scheduled_classes)
-    return {"message": "Full timetable fetched successfully!", "timetable": timetable}
 
 @app.post("/admin/auto-prepare/")
 def auto_prepare(db: Session = Depends(get_db)):
@@ -513,6 +1175,9 @@ def auto_prepare(db: Session = Depends(get_db)):
     # =========================================================
     days = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
 
+    # Pins point at events/timeslots recreated below
+    db.query(models.PinnedAssignment).delete()
+
     # Clear all old timeslots to avoid duplicates
     db.query(models.Timeslot).delete()
     db.commit()
@@ -668,6 +1333,7 @@ def auto_prepare(db: Session = Depends(get_db)):
     # save events
     for ev in events_to_add:
         db.add(ev)
+    timetable_changed(db)
     db.commit()
 
     return {
@@ -685,6 +1351,7 @@ def update_teacher(teacher_id: int, payload: schemas.TeacherCreate, db: Session
     teacher.name = payload.name
     teacher.max_hours = payload.max_hours
 
+    timetable_changed(db)
     db.commit()
     db.refresh(teacher)
     return teacher
@@ -696,6 +1363,7 @@ def delete_teacher(teacher_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Teacher not found")
 
     db.delete(teacher)
+    timetable_changed(db)
     db.commit()
     return {"message": "Teacher deleted successfully"}
 
@@ -720,5 +1388,6 @@ def delete_course(course_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Course not found")
 
     db.delete(course)
+    timetable_changed(db)
     db.commit()
     return {"message": "Course deleted successfully"}
@@ -0,0 +1,174 @@
+# backend/materialized.py
+from collections import defaultdict
+
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from models import (
+    Teacher, Batch, Room, Timeslot, SchedulableEvent, ScheduledClass, ActiveTimetable,
+    TeacherTimetableEntry, BatchTimetableEntry, event_batches_table, teacher_courses,
+)
+
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
+
+
+def refresh_timetable_entries(db: Session, version_id: int = None):
+    """
+    Rewrites the per-teacher and per-batch timetable rows from the
+    ScheduledClass rows of `version_id` (default: the active version) in the
+    caller's transaction (flushes, never commits), with a fixed number of
+    queries. Entries of other versions are dropped. Call it wherever the
+    published classes, or the names and links the views show, change.
+
+    Entries keep the output of the former per-request views: the teacher view
+    shows the assigned teacher, the batch view the first teacher of the course.
+    """
+    db.flush()
+    db.query(TeacherTimetableEntry).delete()
+    db.query(BatchTimetableEntry).delete()
+    if version_id is None:
+        version_id = db.query(ActiveTimetable.version_id).scalar()
+        if version_id is None:
+            return
+
+    insert_entries(db, *build_entries(db, version_id))
+
+
+def refresh_entity_entries(db: Session, version_id: int, teacher_ids, batch_ids):
+    """
+    Like refresh_timetable_entries, for the given teachers and batches of
+    `version_id` only: their rows are rewritten, every other row is left as
+    it is. For edits that touch a few classes (see moves.py).
+    """
+    teacher_ids, batch_ids = set(teacher_ids) - {None}, set(batch_ids)
+    db.flush()
+    if teacher_ids:
+        db.query(TeacherTimetableEntry).filter(TeacherTimetableEntry.version_id == version_id,
+                                               TeacherTimetableEntry.teacher_id.in_(teacher_ids)).delete()
+    if batch_ids:
+        db.query(BatchTimetableEntry).filter(BatchTimetableEntry.version_id == version_id,
+                                             BatchTimetableEntry.batch_id.in_(batch_ids)).delete()
+    if not teacher_ids and not batch_ids:
+        return
+
+    batch_events = select(event_batches_table.c.event_id).where(event_batches_table.c.batch_id.in_(batch_ids))
+    teacher_classes, batch_classes = build_entries(
+        db, version_id, ScheduledClass.teacher_id.in_(teacher_ids) | ScheduledClass.event_id.in_(batch_events))
+    insert_entries(
+        db,
+        {key: entries for key, entries in teacher_classes.items() if key[0] in teacher_ids},
+        {key: entries for key, entries in batch_classes.items() if key[0] in batch_ids},
+    )
+
+
+def build_entries(db: Session, version_id: int, class_filter=None):
+    """
+    Entry dicts of the version's classes (all, or those matching
+    `class_filter`), as ({(teacher_id, day): [entry]}, {(batch_id, day): [entry]}).
+    """
+    query = (
+        db.query(
+            ScheduledClass.id, ScheduledClass.event_id, ScheduledClass.teacher_id,
+            Timeslot.day, Timeslot.start_time, Timeslot.end_time, Timeslot.duration,
+            SchedulableEvent.name, SchedulableEvent.course_id, Room.name, Teacher.name,
+        )
+        .join(Timeslot, Timeslot.id == ScheduledClass.timeslot_id)
+        .join(SchedulableEvent, SchedulableEvent.id == ScheduledClass.event_id)
+        .outerjoin(Room, Room.id == ScheduledClass.room_id)
+        .outerjoin(Teacher, Teacher.id == ScheduledClass.teacher_id)
+        .filter(ScheduledClass.version_id == version_id)
+    )
+    if class_filter is not None:
+        query = query.filter(class_filter)
+    classes = query.order_by(ScheduledClass.id).all()
+
+    teacher_classes = defaultdict(list)  # (teacher_id, day) -> [entry]
+    batch_classes = defaultdict(list)  # (batch_id, day) -> [entry]
+    if not classes:
+        return teacher_classes, batch_classes
+
+    event_ids = {row[1] for row in classes}
+    event_batches = defaultdict(list)  # event_id -> [(batch_id, batch_name)]
+    batch_rows = (
+        db.query(event_batches_table.c.event_id, Batch.id, Batch.name)
+        .join(Batch, Batch.id == event_batches_table.c.batch_id)
+        .filter(event_batches_table.c.event_id.in_(event_ids))
+        .order_by(event_batches_table.c.event_id, event_batches_table.c.batch_id)
+    )
+    for event_id, batch_id, batch_name in batch_rows:
+        event_batches[event_id].append((batch_id, batch_name))
+
+    # unordered like the course.teachers lazy load, so "first" matches it
+    first_teacher = {}
+    for course_id, teacher_name in (
+        db.query(teacher_courses.c.course_id, Teacher.name)
+        .join(Teacher, Teacher.id == teacher_courses.c.teacher_id)
+    ):
+        first_teacher.setdefault(course_id, teacher_name)
+
+    for (sc_id, event_id, teacher_id, day, start_time, end_time, duration,
+         event_name, course_id, room_name, teacher_name) in classes:
+        if day not in DAYS:
+            continue
+        entry = {
+            "version_id": version_id,
+            "day_order": DAYS.index(day),
+            "day": day,
+            "start_time": start_time,
+            "end_time": end_time,
+            "duration": duration,
+            "event_name": event_name,
+            "room_name": room_name if room_name is not None else "Unknown",
+            "batches": [name for _, name in event_batches[event_id]],
+        }
+        if teacher_name is not None:
+            teacher_classes[(teacher_id, day)].append(dict(entry, teacher_id=teacher_id, teacher_name=teacher_name))
+        for batch_id, _ in event_batches[event_id]:
+            batch_classes[(batch_id, day)].append(
+                dict(entry, batch_id=batch_id, teacher_name=first_teacher.get(course_id, "Unassigned")))
+    return teacher_classes, batch_classes
+
+
+def insert_entries(db: Session, teacher_classes, batch_classes):
+    """Numbers each entity's entries per day by start time and inserts them, one executemany per table."""
+    for model, classes_by_day in [(TeacherTimetableEntry, teacher_classes), (BatchTimetableEntry, batch_classes)]:
+        rows = []
+        for day_entries in classes_by_day.values():
+            day_entries.sort(key=lambda e: e["start_time"])
+            for i, entry in enumerate(day_entries):
+                entry["position"] = i + 1
+                rows.append(entry)
+        if rows:
+            db.execute(insert(model), rows)
+
+
+def formatted_entry_columns(model):
+    """The columns of a TimetableEntryColumns model that format_timetable_entries reads."""
+    return (model.day, model.position, model.start_time, model.end_time, model.duration,
+            model.event_name, model.room_name, model.teacher_name, model.batches)
+
+
+def format_timetable_entries(entries):
+    """
+    Builds the FormattedDay list of an entity from its entries (rows of
+    formatted_entry_columns, or entry objects), in (day_order, position)
+    order, as plain dicts shaped like schemas.FormattedDay.
+    """
+    timetable = []
+    for entry in entries:
+        if not timetable or timetable[-1]["day"] != entry.day:
+            timetable.append({"day": entry.day, "timeslots": []})
+        timetable[-1]["timeslots"].append({
+            "id": entry.position,
+            "start_time": entry.start_time,
+            "end_time": entry.end_time,
+            "duration": entry.duration,
+            "slot_type": "",
+            "scheduled_classes": [{
+                "event_name": entry.event_name,
+                "room_name": entry.room_name,
+                "teacher_name": entry.teacher_name,
+                "batches": entry.batches,
+            }],
+        })
+    return timetable
@@ -0,0 +1,96 @@
+# backend/migrate.py
+"""
+Schema migrations (Alembic, see migrations/), applied at startup:
+
+    alembic revision --autogenerate -m "..."   # after changing models.py
+    alembic upgrade head                       # or just start the app
+"""
+from datetime import datetime
+from pathlib import Path
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import inspect, insert, update, text
+
+from models import (
+    Base, TimetableVersion, ActiveTimetable, ScheduledClass, PinnedAssignment,
+    TeacherUnavailability, RoomUnavailability, TeacherTimetableEntry, BatchTimetableEntry,
+)
+
+ALEMBIC_INI = Path(__file__).with_name("alembic.ini")
+BASELINE_REVISION = "aa6d5e5cf917"
+CREATE_ALL_REVISION = "cb2be20f281d"  # the schema of the last release without migrations
+BASELINE_TABLES = {
+    "teachers", "courses", "batches", "rooms", "timeslots", "schedulable_events",
+    "teacher_courses", "event_batches", "scheduled_classes",
+}
+
+
+def alembic_config() -> Config:
+    cfg = Config(str(ALEMBIC_INI))
+    cfg.attributes["configure_logger"] = False
+    return cfg
+
+
+def adopt_create_all_schema(bind):
+    """
+    Brings a database that later releases built with create_all (some of the
+    tables after the baseline, no alembic_version) to the CREATE_ALL_REVISION
+    schema, as startup used to:
+    - scheduled_classes gets version_id, and existing rows become an
+      "imported" version that is made active;
+    - the materialized entry tables are derived data, so they are dropped,
+      recreated by create_all and refilled at startup;
+    - active_timetable gets its revision counter.
+    """
+    tables = [model.__table__ for model in (
+        TimetableVersion, ActiveTimetable, PinnedAssignment, TeacherUnavailability, RoomUnavailability,
+        TeacherTimetableEntry, BatchTimetableEntry,
+    )]
+    Base.metadata.create_all(bind=bind, tables=tables[:2])
+    existing = inspect(bind)
+    with bind.begin() as conn:
+        if "revision" not in {c["name"] for c in existing.get_columns("active_timetable")}:
+            conn.execute(text("ALTER TABLE active_timetable ADD COLUMN revision INTEGER DEFAULT 0"))
+
+        for table in ("teacher_timetable_entries", "batch_timetable_entries"):
+            if existing.has_table(table) and "version_id" not in {c["name"] for c in existing.get_columns(table)}:
+                conn.execute(text(f"DROP TABLE {table}"))
+
+        if "version_id" not in {c["name"] for c in existing.get_columns("scheduled_classes")}:
+            conn.execute(text("ALTER TABLE scheduled_classes ADD COLUMN version_id INTEGER "
+                              "REFERENCES timetable_versions (id)"))
+            conn.execute(text("CREATE INDEX ix_scheduled_classes_version_id ON scheduled_classes (version_id)"))
+            num_classes = conn.execute(text("SELECT COUNT(*) FROM scheduled_classes")).scalar()
+            if num_classes:
+                version_id = conn.execute(insert(TimetableVersion).values(
+                    created_at=datetime.utcnow(), engine="imported", num_classes=num_classes,
+                )).inserted_primary_key[0]
+                conn.execute(update(ScheduledClass.__table__).values(version_id=version_id))
+                conn.execute(insert(ActiveTimetable).values(id=1, version_id=version_id))
+
+    Base.metadata.create_all(bind=bind, tables=tables)
+
+
+def upgrade_database(engine):
+    """
+    Migrates the database of `engine` to the latest revision. Databases from
+    before migrations have tables but no alembic_version: an original-release
+    schema is stamped at the baseline and migrated from there; a create_all
+    schema from a later release is adopted in place, stamped at
+    CREATE_ALL_REVISION and migrated from there.
+    """
+    cfg = alembic_config()
+    tables = set(inspect(engine).get_table_names())
+    if tables and "alembic_version" not in tables:
+        if tables <= BASELINE_TABLES:
+            revision = BASELINE_REVISION
+        else:
+            adopt_create_all_schema(engine)
+            revision = CREATE_ALL_REVISION
+        with engine.begin() as connection:
+            cfg.attributes["connection"] = connection
+            command.stamp(cfg, revision)
+    with engine.begin() as connection:
+        cfg.attributes["connection"] = connection
+        command.upgrade(cfg, "head")
@@ -0,0 +1,84 @@
+from logging.config import fileConfig
+
+from alembic import context
+
+import models
+
+# this is the Alembic Config object, which provides
+# access to the values within the .ini file in use.
+config = context.config
+
+# Interpret the config file for Python logging.
+# This line sets up loggers basically. Skipped when the app runs migrations
+# at startup (migrate.py), so the server's own logging is left alone.
+if config.config_file_name is not None and config.attributes.get("configure_logger", True):
+    fileConfig(config.config_file_name)
+
+# The models' MetaData, for 'autogenerate' support. The database comes from
+# models.py (config.py / DATABASE_URL, the default tenant), or is the
+# connection migrate.upgrade_database passes in; alembic.ini has no URL.
+target_metadata = models.Base.metadata
+
+# other values from the config, defined by the needs of env.py,
+# can be acquired:
+# my_important_option = config.get_main_option("my_important_option")
+# ... etc.
+
+
+def run_migrations_offline() -> None:
+    """Run migrations in 'offline' mode.
+
+    This configures the context with just a URL
+    and not an Engine, though an Engine is acceptable
+    here as well.  By skipping the Engine creation
+    we don't even need a DBAPI to be available.
+
+    Calls to context.execute() here emit the given string to the
+    script output.
+
+    """
+    context.configure(
+        url=models.DATABASE_URL,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+        render_as_batch=models.IS_SQLITE,
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    """Run migrations in 'online' mode.
+
+    Uses the application's engine (or a connection of a tenant's engine,
+    from migrate.upgrade_database), so migrations get the same pool and
+    SQLite pragmas as the app. SQLite can't ALTER most constraints, so
+    autogenerate renders batch (copy-and-move) operations there.
+
+    """
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        run_migrations_on(connection)
+        return
+
+    with models.engine.connect() as connection:
+        run_migrations_on(connection)
+
+
+def run_migrations_on(connection) -> None:
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        render_as_batch=connection.dialect.name == "sqlite",
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
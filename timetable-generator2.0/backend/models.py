@@ -1,14 +1,93 @@
 from sqlalchemy import (
-    create_engine, Column, Integer, String, ForeignKey, Table
+    create_engine, event, Column, Integer, String, ForeignKey, Table, JSON, Index, DateTime,
 )
+from datetime import datetime
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.orm import declarative_base, sessionmaker, relationship
 from sqlalchemy import MetaData
 
+import config
+
 # --- DATABASE CONFIG ---
-DATABASE_URL = "sqlite:///./timetable.db"
+# DATABASE_URL and pool settings come from config.py; the async engine derives its driver from the URL.
+# DATABASE_URL is the default tenant's database; other tenants get their own (see tenants.py).
+# The schema is managed by Alembic (migrations/), see migrate.upgrade_database.
+DATABASE_URL = config.DATABASE_URL
+
+ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}
+# Drivers from requirements.txt for URLs that name none: SQLAlchemy's own default for postgresql:// moved to psycopg 3
+SYNC_DRIVERS = {"postgresql": "postgresql+psycopg2"}
+
+
+def sync_database_url(url: str) -> str:
+    """`url` with the requirements.txt driver when it names no driver (postgresql:// -> psycopg2)."""
+    url = make_url(url)
+    if url.drivername in SYNC_DRIVERS:
+        url = url.set(drivername=SYNC_DRIVERS[url.drivername])
+    return url.render_as_string(hide_password=False)
+
+
+def async_database_url(url: str) -> str:
+    """Same database through an asyncio driver: sqlite -> aiosqlite, postgresql -> asyncpg."""
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for '{backend}' databases.")
+    return url.set(drivername=ASYNC_DRIVERS[backend]).render_as_string(hide_password=False)
+
+
+def is_sqlite(url: str) -> bool:
+    return make_url(url).get_backend_name() == "sqlite"
+
+
+IS_SQLITE = is_sqlite(DATABASE_URL)
+
+
+def engine_options(url: str):
+    """create_engine keyword arguments for the backend of `url`."""
+    if is_sqlite(url):
+        return {"connect_args": {"check_same_thread": False}}
+    return {
+        "pool_size": config.DB_POOL_SIZE,
+        "max_overflow": config.DB_MAX_OVERFLOW,
+        "pool_timeout": config.DB_POOL_TIMEOUT,
+        "pool_recycle": config.DB_POOL_RECYCLE,
+        "pool_pre_ping": True,
+    }
+
+
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    """
+    WAL lets readers continue while generation writes; synchronous=NORMAL is
+    durable in WAL mode and avoids an fsync per commit; the page cache and
+    mmap keep the (small) database in memory.
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA cache_size=-{config.SQLITE_CACHE_SIZE_KB}")
+    cursor.execute(f"PRAGMA mmap_size={config.SQLITE_MMAP_SIZE}")
+    cursor.execute(f"PRAGMA busy_timeout={config.SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.close()
+
+
+def create_engines(url: str):
+    """
+    (engine, async_engine) for `url`: read endpoints run on the event loop
+    through the async one (main.get_async_db), everything else on the sync one.
+    """
+    sync_engine = create_engine(sync_database_url(url), **engine_options(url))
+    async_engine = create_async_engine(async_database_url(url), **engine_options(url))
+    if is_sqlite(url):
+        event.listen(sync_engine, "connect", set_sqlite_pragmas)
+        event.listen(async_engine.sync_engine, "connect", set_sqlite_pragmas)
+    return sync_engine, async_engine
+
 
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+engine, async_engine = create_engines(DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
 
 # --- FIX: Shared metadata to prevent duplicate-table warnings ---
 metadata = MetaData()
@@ -32,6 +111,8 @@ event_batches_table = Table(
     Base.metadata,
     Column("event_id", Integer, ForeignKey("schedulable_events.id"), primary_key=True),
     Column("batch_id", Integer, ForeignKey("batches.id"), primary_key=True),
+    # The primary key serves event -> batches; this serves batch -> events
+    Index("ix_event_batches_batch_id", "batch_id", "event_id"),
 )
 
 # ============================================================
@@ -145,15 +226,56 @@ class SchedulableEvent(Base):
         return f"<Event(name={self.name}, duration={self.duration}, course={self.course_id})>"
 
 
+class TimetableVersion(Base):
+    """
+    One generated timetable. Its ScheduledClass rows are written once by the
+    solver; only manual moves of the active version (see moves.py) change
+    them afterwards. ActiveTimetable points at the version readers see.
+    """
+    __tablename__ = "timetable_versions"
+
+    id = Column(Integer, primary_key=True, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    engine = Column(String)  # "slots" / "grid" / "imported"
+    num_classes = Column(Integer, default=0)
+
+    def __repr__(self):
+        return f"<TimetableVersion(id={self.id}, engine={self.engine}, classes={self.num_classes})>"
+
+
+class ActiveTimetable(Base):
+    """
+    Single row (id=1): the published version. Switching it is one UPDATE.
+    revision counts publishes and edits to what the timetable shows, so
+    (version_id, revision) identifies the content readers get.
+    """
+    __tablename__ = "active_timetable"
+
+    id = Column(Integer, primary_key=True)
+    version_id = Column(Integer, ForeignKey("timetable_versions.id"))
+    revision = Column(Integer, default=0)
+
+    def __repr__(self):
+        return f"<ActiveTimetable(version={self.version_id}, revision={self.revision})>"
+
+
 class ScheduledClass(Base):
     """
     Represents a finalized scheduled class in the timetable.
     Links event, teacher, room, and timeslot together.
     """
     __tablename__ = "scheduled_classes"
+    # Lookups within a version by teacher, room or event, covering the timeslot
+    __table_args__ = (
+        Index("ix_scheduled_classes_version_teacher", "version_id", "teacher_id", "timeslot_id"),
+        Index("ix_scheduled_classes_version_room", "version_id", "room_id", "timeslot_id"),
+        Index("ix_scheduled_classes_version_event", "version_id", "event_id", "timeslot_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
 
+    version_id = Column(Integer, ForeignKey("timetable_versions.id"))
+
     event_id = Column(Integer, ForeignKey("schedulable_events.id"))
     event = relationship("SchedulableEvent")
 
@@ -170,8 +292,94 @@ class ScheduledClass(Base):
         return f"<ScheduledClass(event={self.event_id}, teacher={self.teacher_id}, room={self.room_id})>"
 
 
+class TeacherUnavailability(Base):
+    """A weekly window [start_time, end_time) on `day` when a teacher can't teach."""
+    __tablename__ = "teacher_unavailability"
+
+    id = Column(Integer, primary_key=True, index=True)
+    teacher_id = Column(Integer, ForeignKey("teachers.id"), index=True)
+    day = Column(String)
+    start_time = Column(Integer)
+    end_time = Column(Integer)
+
+    def __repr__(self):
+        return f"<TeacherUnavailability(teacher={self.teacher_id}, day={self.day}, {self.start_time}-{self.end_time})>"
+
+
+class RoomUnavailability(Base):
+    """A weekly window [start_time, end_time) on `day` when a room is closed."""
+    __tablename__ = "room_unavailability"
+
+    id = Column(Integer, primary_key=True, index=True)
+    room_id = Column(Integer, ForeignKey("rooms.id"), index=True)
+    day = Column(String)
+    start_time = Column(Integer)
+    end_time = Column(Integer)
+
+    def __repr__(self):
+        return f"<RoomUnavailability(room={self.room_id}, day={self.day}, {self.start_time}-{self.end_time})>"
+
+
+class PinnedAssignment(Base):
+    """
+    Admin-locked placement for an event, applied before generation.
+    teacher/room/timeslot left empty are still chosen by the solver.
+    """
+    __tablename__ = "pinned_assignments"
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    event_id = Column(Integer, ForeignKey("schedulable_events.id"), unique=True, index=True)
+    event = relationship("SchedulableEvent")
+
+    teacher_id = Column(Integer, ForeignKey("teachers.id"), nullable=True)
+    room_id = Column(Integer, ForeignKey("rooms.id"), nullable=True)
+    timeslot_id = Column(Integer, ForeignKey("timeslots.id"), nullable=True)
+
+    def __repr__(self):
+        return f"<PinnedAssignment(event={self.event_id}, teacher={self.teacher_id}, room={self.room_id}, timeslot={self.timeslot_id})>"
+
+
 # ============================================================
-#                DATABASE INITIALIZATION
+#                READ MODELS (materialized timetables)
 # ============================================================
 
-Base.metadata.create_all(bind=engine)
+class TimetableEntryColumns:
+    """
+    One formatted class of an entity's timetable, in response order:
+    (day_order, position) is the Mon–Fri day index and the 1-based slot
+    number within that day. Rewritten from the ScheduledClass rows of the
+    active version by materialized.refresh_timetable_entries.
+    """
+    id = Column(Integer, primary_key=True)
+    version_id = Column(Integer)
+    day_order = Column(Integer)
+    day = Column(String)
+    position = Column(Integer)
+    start_time = Column(Integer)
+    end_time = Column(Integer)
+    duration = Column(Integer)
+    event_name = Column(String)
+    room_name = Column(String)
+    teacher_name = Column(String)
+    batches = Column(JSON)  # batch names
+
+
+class TeacherTimetableEntry(TimetableEntryColumns, Base):
+    __tablename__ = "teacher_timetable_entries"
+    __table_args__ = (Index("ix_teacher_timetable_entries_lookup", "version_id", "teacher_id", "day_order", "position"),)
+
+    teacher_id = Column(Integer, ForeignKey("teachers.id"))
+
+    def __repr__(self):
+        return f"<TeacherTimetableEntry(teacher={self.teacher_id}, day={self.day}, {self.start_time}-{self.end_time})>"
+
+
+class BatchTimetableEntry(TimetableEntryColumns, Base):
+    __tablename__ = "batch_timetable_entries"
+    __table_args__ = (Index("ix_batch_timetable_entries_lookup", "version_id", "batch_id", "day_order", "position"),)
+
+    batch_id = Column(Integer, ForeignKey("batches.id"))
+
+    def __repr__(self):
+        return f"<BatchTimetableEntry(batch={self.batch_id}, day={self.day}, {self.start_time}-{self.end_time})>"
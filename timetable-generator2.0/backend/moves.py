@@ -0,0 +1,173 @@
+# backend/moves.py
+"""
+Manual changes to the published timetable without a re-solve: moving a
+scheduled class to another teacher, room or timeslot, and swapping two
+classes. Placements are checked against the solver's hard constraints on the
+occupancy index (see occupancy.py), with rooms, timeslots, teachers and
+availability windows loaded once per request; the change is then written to
+the active version in place and applied to the index.
+"""
+from collections import defaultdict
+from contextlib import contextmanager
+
+from sqlalchemy.orm import Session
+
+from models import Teacher, Room, Timeslot, SchedulableEvent, ScheduledClass, TeacherUnavailability, RoomUnavailability
+from occupancy import DAYS, placement_entities
+from solver import room_fits, timeslot_fits, slot_type_for
+from materialized import refresh_entity_entries
+from versions import timetable_state, advance_revision
+
+DEFAULT_MAX_HOURS = 16  # the solver's weekly limit for teachers without max_hours
+PLACEMENT_FIELDS = ("teacher_id", "room_id", "timeslot_id")
+
+
+@contextmanager
+def editing_occupancy(db: Session, indexes, tenant_name: str):
+    """
+    Yields the tenant's occupancy index with its lock held and the session
+    reading the same (version, revision), so checks made on the index hold
+    until the caller's change is committed and applied to it.
+    """
+    while True:
+        index = indexes.get(db, tenant_name, *timetable_state(db))
+        with index.lock:
+            db.rollback()  # start a fresh read now that earlier edits are in
+            if timetable_state(db) == (index.version_id, index.revision):
+                yield index
+                return
+
+
+class PlacementRules:
+    """The hard constraints a placement of a scheduled class must meet, checked on `index`."""
+
+    def __init__(self, db: Session, index):
+        self.db = db
+        self.index = index
+        self.teachers = {t.id: t for t in db.query(Teacher)}
+        self.rooms = {r.id: r for r in db.query(Room)}
+        self.timeslots = {ts.id: ts for ts in db.query(Timeslot)}
+        self.unavailable = {"teacher": defaultdict(int), "room": defaultdict(int)}
+        for kind, model, column in [
+            ("teacher", TeacherUnavailability, TeacherUnavailability.teacher_id),
+            ("room", RoomUnavailability, RoomUnavailability.room_id),
+        ]:
+            for entity_id, day, start_time, end_time in db.query(column, model.day, model.start_time, model.end_time):
+                if day in DAYS:
+                    self.unavailable[kind][entity_id] |= index.span(day, start_time, end_time)
+        self._events = {}
+
+    def event(self, event_id: int):
+        """(event, ids of the teachers of its course)."""
+        if event_id not in self._events:
+            event = self.db.get(SchedulableEvent, event_id)
+            teacher_ids = {t.id for t in event.course.teachers} if event.course else set()
+            self._events[event_id] = (event, teacher_ids)
+        return self._events[event_id]
+
+    def placement(self, class_id: int, teacher_id, room_id, timeslot_id):
+        """The class's placement with another teacher, room and timeslot; event and batches stay."""
+        timeslot = self.timeslots[timeslot_id]
+        return dict(self.index.classes[class_id], teacher_id=teacher_id, room_id=room_id, timeslot_id=timeslot_id,
+                    day=timeslot.day, start_time=timeslot.start_time, end_time=timeslot.end_time)
+
+    def problems(self, class_id: int, placement, ignore):
+        """Why `placement` of the class is not valid, leaving the classes in `ignore` out; [] when it is."""
+        event, course_teacher_ids = self.event(placement["event_id"])
+        timeslot = self.timeslots[placement["timeslot_id"]]
+        if timeslot.day not in DAYS:
+            return [f"Timeslot {timeslot.id} is on {timeslot.day}, outside the timetable week"]
+
+        problems = []
+        if not timeslot_fits(timeslot, event):
+            problems.append(f"Timeslot {timeslot.id} is a {timeslot.duration}h {timeslot.slot_type} slot, "
+                            f"the event needs a {event.duration}h {slot_type_for(event.duration) or 'any'} slot")
+        hours = self.index.hours(placement)
+
+        room = self.rooms.get(placement["room_id"])
+        if room is not None:
+            if not room_fits(room, event):
+                problems.append(f"Room {room.name} is a {room.room_type} room for {room.capacity}, "
+                                f"the event needs a {event.required_room_type} room for {event.total_size}")
+            if self.unavailable["room"][room.id] & hours:
+                problems.append(f"Room {room.name} is unavailable then")
+
+        teacher = self.teachers.get(placement["teacher_id"])
+        if teacher is not None:
+            # a teacher outside the course only stays on a class they already have (e.g. pinned)
+            if teacher.id not in course_teacher_ids and teacher.id != self.index.classes[class_id]["teacher_id"]:
+                problems.append(f"Teacher {teacher.name} does not teach this course")
+            if self.unavailable["teacher"][teacher.id] & hours:
+                problems.append(f"Teacher {teacher.name} is unavailable then")
+            max_hours = teacher.max_hours if teacher.max_hours is not None else DEFAULT_MAX_HOURS
+            booked = self.index.booked_hours("teacher", teacher.id, ignore) + event.duration
+            if booked > max_hours:
+                problems.append(f"Teacher {teacher.name} would teach {booked}h a week, over max_hours {max_hours}")
+
+        for kind, entity_id, other in self.index.clashes(placement, ignore):
+            problems.append(f"{kind.capitalize()} {entity_id} already has scheduled class {other} then")
+        return problems
+
+    def alternatives(self, class_id: int, limit: int):
+        """
+        Up to `limit` other valid (teacher, room, timeslot) placements of the
+        class, in timeslot, room, teacher id order: the course's teachers (and
+        the current one), the rooms and timeslots the solvers would give it.
+        """
+        current = self.index.classes[class_id]
+        event, course_teacher_ids = self.event(current["event_id"])
+        teacher_ids = sorted((course_teacher_ids | {current["teacher_id"]}) - {None}) or [None]
+        room_ids = [room_id for room_id, room in sorted(self.rooms.items()) if room_fits(room, event)]
+        timeslot_ids = [ts_id for ts_id, ts in sorted(self.timeslots.items())
+                        if timeslot_fits(ts, event) and ts.day in DAYS]
+
+        found = []
+        for timeslot_id in timeslot_ids:
+            for room_id in room_ids:
+                for teacher_id in teacher_ids:
+                    if (teacher_id, room_id, timeslot_id) == tuple(current[f] for f in PLACEMENT_FIELDS):
+                        continue
+                    placement = self.placement(class_id, teacher_id, room_id, timeslot_id)
+                    if not self.problems(class_id, placement, {class_id}):
+                        found.append({"teacher_id": teacher_id, "room_id": room_id, "timeslot_id": timeslot_id})
+                        if len(found) >= limit:
+                            return found
+        return found
+
+
+def swap_problems(rules: PlacementRules, placements):
+    """Problems of two classes taking each other's room and timeslot, including with each other."""
+    (first_id, first), (second_id, second) = placements.items()
+    ignore = {first_id, second_id}
+    problems = rules.problems(first_id, first, ignore) + rules.problems(second_id, second, ignore)
+    if rules.index.hours(first) & rules.index.hours(second):
+        for kind, entity_id in sorted(set(placement_entities(first)) & set(placement_entities(second))):
+            problems.append(f"{kind.capitalize()} {entity_id} would have classes {first_id} and {second_id} at once")
+    return problems
+
+
+def apply_placements(db: Session, index, placements) -> bool:
+    """
+    Writes {class id: placement} to the active version, rewrites the
+    materialized entries of the teachers (old and new) and batches of the
+    moved classes only, bumps the revision, commits, and applies the moves to
+    the index. Call inside editing_occupancy. The index lock only holds off
+    this process's editors, so the bump is conditional on the (version,
+    revision) the checks used: returns False, having written nothing, when a
+    publish or another worker's edit committed since.
+    """
+    if not advance_revision(db, index.version_id, index.revision):
+        db.rollback()
+        return False
+    teacher_ids, batch_ids = set(), set()
+    for class_id, placement in placements.items():
+        db.query(ScheduledClass).filter(ScheduledClass.id == class_id).update(
+            {f: placement[f] for f in PLACEMENT_FIELDS}, synchronize_session=False)
+        teacher_ids |= {index.classes[class_id]["teacher_id"], placement["teacher_id"]}
+        batch_ids.update(placement["batch_ids"])
+    refresh_entity_entries(db, index.version_id, teacher_ids, batch_ids)
+    db.commit()
+    for class_id, placement in placements.items():
+        index.move_class(class_id, placement)
+    index.revision += 1
+    return True
@@ -0,0 +1,280 @@
+# backend/occupancy.py
+"""
+Process-local occupancy of the published timetable: for each batch, teacher
+and room, the week hours it is busy as an int bitmask (bit
+day_index * day_span + hour set when it has a class in [hour, hour + 1)),
+plus reverse maps from entities to their scheduled classes. One index per
+(tenant, version) is built from the database on startup and after a solve,
+and edits through this module keep it in step without a rebuild; free-slot,
+room-availability and conflict checks then never touch SQLite.
+"""
+import threading
+from collections import OrderedDict, defaultdict
+
+from sqlalchemy.orm import Session
+
+from models import Timeslot, ScheduledClass, event_batches_table
+
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
+ENTITY_KINDS = ("batch", "teacher", "room")
+
+
+def hour_runs(mask: int):
+    """Yields (start, end) of every run of set bits in `mask`, lowest first."""
+    while mask:
+        low = mask & -mask
+        start = low.bit_length() - 1
+        carried = mask + low  # the carry clears the run and sets the bit just above it
+        end = (carried & -carried).bit_length() - 1
+        yield start, end
+        mask &= -1 << end
+
+
+def placement_entities(placement):
+    """(kind, id) of the batches, teacher and room a placement occupies."""
+    entities = [("batch", batch_id) for batch_id in placement["batch_ids"]]
+    if placement["teacher_id"] is not None:
+        entities.append(("teacher", placement["teacher_id"]))
+    if placement["room_id"] is not None:
+        entities.append(("room", placement["room_id"]))
+    return entities
+
+
+class OccupancyIndex:
+    """
+    Occupancy of one timetable version as of `revision`. A placement is a
+    dict with event_id, teacher_id, room_id, timeslot_id, day, start_time,
+    end_time and batch_ids.
+
+    `window` has the hours free slots are looked for in: on each day with
+    timeslots, from its earliest to its latest timeslot start (as
+    /batches/{id}/free-slots/ always did).
+
+    Readers need no lock; writers hold `lock` from their conflict check
+    until their change is committed and applied here. Writers never change a
+    mask or class-id set in place: they compute the new ones first and swap
+    each in with a single assignment (sets are frozensets), a class's
+    placement is stored before any set names it and dropped after none
+    does, so a reader sees each entry either before or after an edit.
+    """
+
+    def __init__(self, version_id, revision: int, day_span: int, window: int = 0):
+        self.version_id = version_id
+        self.revision = revision
+        self.day_span = day_span
+        self.window = window
+        self.busy = {kind: {} for kind in ENTITY_KINDS}  # kind -> {entity id: mask}
+        self.classes = {}  # scheduled class id -> placement
+        self.entity_classes = {kind: {} for kind in ENTITY_KINDS}  # kind -> {entity id: frozenset of class ids}
+        self.lock = threading.RLock()
+
+    def span(self, day: str, start: int, end: int) -> int:
+        """Mask of hours [start, end) on `day`."""
+        return ((1 << (end - start)) - 1) << (DAYS.index(day) * self.day_span + start)
+
+    def hours(self, placement) -> int:
+        return self.span(placement["day"], placement["start_time"], placement["end_time"])
+
+    # --- reads ---
+    def busy_mask(self, entities) -> int:
+        """Hours when any of `entities` ((kind, id) pairs) is busy."""
+        mask = 0
+        for kind, entity_id in entities:
+            mask |= self.busy[kind].get(entity_id, 0)
+        return mask
+
+    def is_free(self, kind: str, entity_id: int, hours: int) -> bool:
+        return not self.busy[kind].get(entity_id, 0) & hours
+
+    def booked_hours(self, kind: str, entity_id: int, ignore=()) -> int:
+        """Hours the entity is booked in the week, leaving out the class ids in `ignore`."""
+        mask = self.busy[kind].get(entity_id, 0)
+        own = self.entity_classes[kind].get(entity_id, ())
+        for class_id in ignore:
+            placement = self.classes.get(class_id)
+            if class_id in own and placement is not None:
+                mask &= ~self.hours(placement)
+        return bin(mask).count("1")
+
+    def clashes(self, placement, ignore=()):
+        """
+        [(kind, entity id, class id)] of the classes `placement` would
+        overlap, leaving out the class ids in `ignore` (e.g. the class being
+        moved). One mask test per entity; the reverse map is only walked for
+        entities that do clash.
+        """
+        hours = self.hours(placement)
+        found = []
+        for kind, entity_id in placement_entities(placement):
+            if not self.busy[kind].get(entity_id, 0) & hours:
+                continue
+            for class_id in sorted(self.entity_classes[kind].get(entity_id, ())):
+                other = self.classes.get(class_id)
+                if class_id not in ignore and other is not None and self.hours(other) & hours:
+                    found.append((kind, entity_id, class_id))
+        return found
+
+    def conflicts(self):
+        """
+        [(kind, entity id, class ids)] of every batch, teacher and room
+        booked twice at once in the version, one entry per overlapping pair.
+        """
+        found = []
+        for kind in ENTITY_KINDS:
+            for entity_id, class_ids in sorted(list(self.entity_classes[kind].items())):
+                seen = []  # (class id, hours) of this entity's classes so far
+                for class_id in sorted(class_ids):
+                    placement = self.classes.get(class_id)
+                    if placement is None:
+                        continue
+                    hours = self.hours(placement)
+                    found += [(kind, entity_id, [other, class_id]) for other, other_hours in seen
+                              if other_hours & hours]
+                    seen.append((class_id, hours))
+        return found
+
+    def free_days(self, busy: int, min_duration: int = 1):
+        """
+        FormattedDay list (plain dicts) of the free blocks of at least
+        `min_duration` hours outside `busy`, for the days with timeslots.
+        """
+        day_mask = (1 << self.day_span) - 1
+        timetable = []
+        for i, day in enumerate(DAYS):
+            window = (self.window >> (i * self.day_span)) & day_mask
+            if not window:
+                continue
+            free = window & ~(busy >> (i * self.day_span))
+            blocks = [(start, end) for start, end in hour_runs(free) if end - start >= min_duration]
+            timetable.append({"day": day, "timeslots": [
+                {
+                    "id": n + 1,
+                    "start_time": start,
+                    "end_time": end,
+                    "duration": end - start,
+                    "slot_type": "",
+                    "scheduled_classes": [],
+                }
+                for n, (start, end) in enumerate(blocks)
+            ]})
+        return timetable
+
+    # --- incremental updates, applied once the database change is committed ---
+    def _swap_entities(self, class_id: int, old, new):
+        """
+        Moves the class from the entities of placement `old` to those of
+        `new` (either may be None): the new class-id sets and masks are all
+        computed before the first one is assigned.
+        """
+        old_entities = set(placement_entities(old)) if old is not None else set()
+        new_entities = set(placement_entities(new)) if new is not None else set()
+        updates = []
+        for kind, entity_id in sorted(old_entities | new_entities):
+            class_ids = self.entity_classes[kind].get(entity_id, frozenset())
+            mask = self.busy[kind].get(entity_id, 0)
+            if (kind, entity_id) not in new_entities:
+                class_ids = class_ids - {class_id}
+            elif (kind, entity_id) not in old_entities:
+                class_ids = class_ids | {class_id}
+                mask |= self.hours(new)
+                updates.append((kind, entity_id, class_ids, mask))
+                continue
+            mask = 0
+            for other in class_ids:
+                mask |= self.hours(new if other == class_id else self.classes[other])
+            updates.append((kind, entity_id, class_ids, mask))
+        for kind, entity_id, class_ids, mask in updates:
+            # the set first: a reader then at worst tests a class against a mask that no longer has it
+            if class_ids:
+                self.entity_classes[kind][entity_id] = class_ids
+                self.busy[kind][entity_id] = mask
+            else:
+                self.entity_classes[kind].pop(entity_id, None)
+                self.busy[kind].pop(entity_id, None)
+
+    def add_class(self, class_id: int, placement):
+        self.classes[class_id] = placement
+        self._swap_entities(class_id, None, placement)
+
+    def remove_class(self, class_id: int):
+        """Drops the class and recomputes the masks of the entities it occupied. Returns its placement."""
+        placement = self.classes[class_id]
+        self._swap_entities(class_id, placement, None)
+        del self.classes[class_id]
+        return placement
+
+    def move_class(self, class_id: int, placement):
+        old = self.classes[class_id]
+        self.classes[class_id] = placement
+        self._swap_entities(class_id, old, placement)
+
+
+def build_occupancy_index(db: Session, version_id, revision: int) -> OccupancyIndex:
+    """Two queries: the timeslots, and the version's classes with their batches."""
+    timeslots = db.query(Timeslot.day, Timeslot.start_time, Timeslot.end_time).all()
+    rows = (
+        db.query(ScheduledClass.id, ScheduledClass.event_id, ScheduledClass.teacher_id, ScheduledClass.room_id,
+                 ScheduledClass.timeslot_id, Timeslot.day, Timeslot.start_time, Timeslot.end_time,
+                 event_batches_table.c.batch_id)
+        .join(Timeslot, Timeslot.id == ScheduledClass.timeslot_id)
+        .outerjoin(event_batches_table, event_batches_table.c.event_id == ScheduledClass.event_id)
+        .filter(ScheduledClass.version_id == version_id)
+        .order_by(ScheduledClass.id, event_batches_table.c.batch_id)
+        .all()
+    ) if version_id is not None else []
+
+    day_span = max([ts.end_time for ts in timeslots] + [row.end_time for row in rows] + [24])
+    index = OccupancyIndex(version_id, revision, day_span)
+
+    day_starts = defaultdict(list)
+    for ts in timeslots:
+        if ts.day in DAYS:
+            day_starts[ts.day].append(ts.start_time)
+    for day, starts in day_starts.items():
+        index.window |= index.span(day, min(starts), max(starts) + 1)
+
+    placements = {}
+    for class_id, event_id, teacher_id, room_id, timeslot_id, day, start_time, end_time, batch_id in rows:
+        if day not in DAYS:
+            continue
+        if class_id not in placements:
+            placements[class_id] = {
+                "event_id": event_id, "teacher_id": teacher_id, "room_id": room_id, "timeslot_id": timeslot_id,
+                "day": day, "start_time": start_time, "end_time": end_time, "batch_ids": [],
+            }
+        if batch_id is not None:
+            placements[class_id]["batch_ids"].append(batch_id)
+    for class_id, placement in placements.items():
+        index.add_class(class_id, placement)
+    return index
+
+
+class OccupancyIndexes:
+    """
+    Process-local LRU of indexes per (tenant, version). An index is reused
+    while its revision is the published one; when the revision moved without
+    it (edits to timeslots or names, another worker), it is rebuilt.
+    """
+
+    def __init__(self, max_entries: int = 16):
+        self.max_entries = max_entries
+        self._indexes = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, db: Session, tenant_name: str, version_id, revision: int) -> OccupancyIndex:
+        key = (tenant_name, version_id)
+        with self._lock:
+            index = self._indexes.get(key)
+            if index is not None and index.revision == revision:
+                self._indexes.move_to_end(key)
+                return index
+        index = build_occupancy_index(db, version_id, revision)
+        with self._lock:
+            current = self._indexes.get(key)
+            # an edit may have moved the cached index past this build's revision
+            if current is None or current.revision <= revision:
+                self._indexes[key] = index
+            self._indexes.move_to_end(key)
+            while len(self._indexes) > self.max_entries:
+                self._indexes.popitem(last=False)
+        return index
@@ -0,0 +1,113 @@
+# backend/query_stats.py
+"""
+Counts SQL statements and the time spent in the database, per request and in
+test blocks, so N+1 query patterns show up as numbers:
+
+    QUERY_STATS_HEADERS=1 uvicorn main:app   # X-DB-Query-Count / X-DB-Time-Ms on every response
+
+    with query_budget(2):                    # in a test: fails past 2 statements
+        client.get("/teachers/1/timetable/")
+"""
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from starlette.datastructures import MutableHeaders
+
+
+class QueryStats:
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def record(self, seconds):
+        self.count += 1
+        self.seconds += seconds
+
+
+_request_stats = ContextVar("request_query_stats", default=None)
+_watchers = []  # QueryStats of open count_queries() blocks; they see every thread
+_watchers_lock = threading.Lock()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_started"].pop()
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.record(elapsed)
+    if _watchers:
+        with _watchers_lock:
+            for watcher in _watchers:
+                watcher.record(elapsed)
+
+
+def _handle_error(exception_context):
+    started = exception_context.connection is not None and exception_context.connection.info.get("query_started")
+    if started:
+        started.pop()
+
+
+def instrument(engine):
+    """Counts the statements of `engine` (a sync Engine; for an AsyncEngine pass its .sync_engine)."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+class QueryStatsMiddleware:
+    """
+    ASGI middleware: counts the statements each HTTP request runs (sync
+    endpoints included, as their threads inherit the request's context) and
+    reports them as X-DB-Query-Count and X-DB-Time-Ms response headers.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+
+        async def send_with_stats(message):
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers["X-DB-Query-Count"] = str(stats.count)
+                headers["X-DB-Time-Ms"] = f"{stats.seconds * 1000:.1f}"
+            await send(message)
+
+        token = _request_stats.set(stats)
+        try:
+            await self.app(scope, receive, send_with_stats)
+        finally:
+            _request_stats.reset(token)
+
+
+@contextmanager
+def count_queries():
+    """Counts every statement run on instrumented engines, from any thread, while the block runs."""
+    stats = QueryStats()
+    with _watchers_lock:
+        _watchers.append(stats)
+    try:
+        yield stats
+    finally:
+        with _watchers_lock:
+            _watchers.remove(stats)
+
+
+@contextmanager
+def query_budget(max_queries: int):
+    """Like count_queries(), but raises AssertionError if the block ran more than `max_queries` statements."""
+    with count_queries() as stats:
+        yield stats
+    if stats.count > max_queries:
+        raise AssertionError(f"Ran {stats.count} queries, over the budget of {max_queries}")
@@ -0,0 +1,89 @@
+# backend/response_cache.py
+import hashlib
+import threading
+from collections import OrderedDict
+
+import orjson
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+CACHE_CONTROL = "no-cache"  # clients may store, but revalidate (cheap 304) on every use
+
+
+class ResponseCache:
+    """
+    Thread-safe LRU of rendered JSON responses: key -> (etag, body).
+    Keys must change whenever the data behind them does (callers include the
+    timetable version and revision), so entries are never invalidated, only
+    evicted.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def render_json(content) -> bytes:
+    """
+    The body JSONResponse(jsonable_encoder(content)) would send, rendered by
+    orjson: both write compact UTF-8 JSON, so for the str / int / bool / None
+    / list / dict values the timetable builders return the bytes are the
+    same. Anything else (e.g. a Pydantic model) goes through jsonable_encoder.
+    """
+    return orjson.dumps(content, default=jsonable_encoder)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with render_json; return it to skip response_model validation."""
+
+    def render(self, content) -> bytes:
+        return render_json(content)
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+async def cached_json_response(cache: ResponseCache, request: Request, key, build) -> Response:
+    """
+    Serves `key` from the cache, rendering `await build()` on a miss with
+    render_json, so bodies are byte-identical to an uncached endpoint
+    returning the same value. Answers a matching
+    If-None-Match with 304. Exceptions from build() (e.g. HTTPException) are
+    not cached.
+    """
+    entry = cache.get(key)
+    if entry is None:
+        body = render_json(await build())
+        entry = (f'"{hashlib.sha256(body).hexdigest()}"', body)
+        cache.put(key, entry)
+
+    etag, body = entry
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -1,4 +1,5 @@
-from typing import List, Optional
+from typing import Dict, List, Optional
+from datetime import datetime
 from pydantic import BaseModel
 
 # =========================
@@ -109,6 +110,93 @@ class SchedulableEvent(SchedulableEventBase):
         from_attributes = True
 
 
+# =========================
+# --- AVAILABILITY ---
+# =========================
+class UnavailabilityBase(BaseModel):
+    day: str
+    start_time: int
+    end_time: int
+
+class UnavailabilityCreate(UnavailabilityBase):
+    pass
+
+class TeacherUnavailability(UnavailabilityBase):
+    id: int
+    teacher_id: int
+    class Config:
+        from_attributes = True
+
+class RoomUnavailability(UnavailabilityBase):
+    id: int
+    room_id: int
+    class Config:
+        from_attributes = True
+
+
+# =========================
+# --- BULK CREATE ---
+# =========================
+class BulkItemResult(BaseModel):
+    index: int  # position in the request array
+    status: str  # "created" / "existing" / "error"
+    id: Optional[int] = None
+    detail: Optional[str] = None
+
+class BulkCreateResponse(BaseModel):
+    created: int
+    existing: int
+    failed: int
+    results: List[BulkItemResult]
+
+
+# =========================
+# --- PINNED ASSIGNMENT ---
+# =========================
+class PinnedAssignmentBase(BaseModel):
+    event_id: int
+    teacher_id: Optional[int] = None
+    room_id: Optional[int] = None
+    timeslot_id: Optional[int] = None
+
+class PinnedAssignmentCreate(PinnedAssignmentBase):
+    pass
+
+class PinnedAssignment(PinnedAssignmentBase):
+    id: int
+    class Config:
+        from_attributes = True
+
+
+# =========================
+# --- TIMETABLE VERSION ---
+# =========================
+class TimetableVersion(BaseModel):
+    id: int
+    created_at: datetime
+    engine: str
+    num_classes: int
+    is_active: bool = False
+    class Config:
+        from_attributes = True
+
+
+# =========================
+# --- GENERATION METRICS ---
+# =========================
+class TenantGenerationStats(BaseModel):
+    max_concurrent: int
+    running: int
+    waiting_for_worker: int
+    queued: int
+    waiting_requests: int
+
+class GenerationMetrics(BaseModel):
+    solver_workers: int
+    solver_cpus_per_solve: int
+    tenants: Dict[str, TenantGenerationStats]
+
+
 # =========================
 # --- FORMATTED TIMETABLE ---
 # =========================
@@ -133,3 +221,53 @@ class FormattedDay(BaseModel):
 class FormattedTimetableResponse(BaseModel):
     message: str
     timetable: List[FormattedDay]
+
+class EntityTimetables(BaseModel):
+    timetable: FormattedTimetableResponse
+    free_slots: Optional[FormattedTimetableResponse] = None
+
+class TimetablesResponse(BaseModel):
+    batches: Dict[int, EntityTimetables]
+    teachers: Dict[int, EntityTimetables]
+
+
+# =========================
+# --- TIMETABLE CONFLICTS ---
+# =========================
+class TimetableConflict(BaseModel):
+    kind: str  # batch, teacher or room booked twice at once
+    entity_id: int
+    class_ids: List[int]
+
+
+# =========================
+# --- MANUAL EDITS ---
+# =========================
+class ScheduledClass(BaseModel):
+    id: int
+    event_id: int
+    teacher_id: Optional[int] = None
+    room_id: Optional[int] = None
+    timeslot_id: int
+
+class ScheduledClassUpdate(BaseModel):
+    # fields left out keep their current value
+    teacher_id: Optional[int] = None
+    room_id: Optional[int] = None
+    timeslot_id: Optional[int] = None
+
+class ScheduledClassSwap(BaseModel):
+    first_id: int
+    second_id: int
+
+class Placement(BaseModel):
+    teacher_id: Optional[int] = None
+    room_id: Optional[int] = None
+    timeslot_id: int
+
+class ScheduledClassMove(BaseModel):
+    message: str
+    valid: bool
+    problems: List[str] = []
+    scheduled_classes: List[ScheduledClass]
+    alternatives: List[Placement] = []
@@ -1,9 +1,277 @@
 # backend/solver.py
 from ortools.sat.python import cp_model
 import statistics
+import time
+from array import array
 from collections import defaultdict, Counter
 
-def create_timetable_solver(db_data, time_limit_seconds: float = 120.0, debug: bool = False):
+# Search strategies selectable per solve:
+#   "default"         -> CP-SAT's own portfolio search
+#   "smallest_domain" -> branch on the events with the fewest candidates first
+SEARCH_STRATEGIES = ("default", "smallest_domain")
+
+# Optional redundant constraint families. They never remove a solution, they
+# only give CP-SAT aggregated views to propagate on:
+#   "room_type_hour" -> events needing a room type in one hour <= rooms of that type
+#   "batch_daily"    -> hours a batch attends per day <= teaching hours that day
+#   "teacher_daily"  -> hours a teacher teaches per day <= min(max_hours, teaching hours that day)
+REDUNDANT_CONSTRAINTS = ("room_type_hour", "batch_daily", "teacher_daily")
+
+# Resources that accept load limits, e.g.
+#   {"batch": {"max_daily_hours": 6, "max_consecutive_hours": 3}, "teacher": {...}}
+LOAD_LIMIT_RESOURCES = ("batch", "teacher")
+
+
+class CandidateArrays:
+    """
+    Low-memory candidate store: parallel int arrays instead of tuple-keyed dicts.
+    Candidate i is model variable `first_index + i`, so no BoolVar objects are
+    kept alive, and the candidates of one event are contiguous.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.event = array("i")
+        self.teacher = array("i")
+        self.room = array("i")
+        self.timeslot = array("i")
+        self.first_index = None
+        self.event_ranges = {}  # event_id -> (start, end)
+
+    def __len__(self):
+        return len(self.event)
+
+    def add(self, event_id, teacher_id, room_id, timeslot_id):
+        index = self.model.NewBoolVar("").Index()
+        if self.first_index is None:
+            self.first_index = index
+        self.event.append(event_id)
+        self.teacher.append(teacher_id)
+        self.room.append(room_id)
+        self.timeslot.append(timeslot_id)
+
+    def var(self, i):
+        return self.model.GetBoolVarFromProtoIndex(self.first_index + i)
+
+    def key(self, i):
+        return (self.event[i], self.teacher[i], self.room[i], self.timeslot[i])
+
+    def items(self):
+        """Same shape as var_matrix.items(), with variables created on the fly."""
+        for i in range(len(self.event)):
+            yield self.key(i), self.var(i)
+
+    def event_candidates(self, event_id):
+        start, end = self.event_ranges.get(event_id, (0, 0))
+        return [(self.key(i), self.var(i)) for i in range(start, end)]
+
+
+class AggregateRejections(dict):
+    """Drop-in for defaultdict(Counter) that keeps one aggregate Counter for all events."""
+
+    def __init__(self):
+        super().__init__()
+        self.counts = Counter()
+
+    def __missing__(self, event_id):
+        return self.counts
+
+    def items(self):
+        return [("all", self.counts)]
+
+
+class FirstSolutionTimer(cp_model.CpSolverSolutionCallback):
+    """Records the wall time at which CP-SAT reports its first solution."""
+
+    def __init__(self):
+        super().__init__()
+        self.first_solution_seconds = None
+
+    def on_solution_callback(self):
+        if self.first_solution_seconds is None:
+            self.first_solution_seconds = self.WallTime()
+
+
+def add_smallest_domain_strategy(model, events, candidates_of, teachers_by_id, timeslots_by_id):
+    """
+    Adds a decision strategy that fixes events in order of
+    (domain size, labs first, most loaded teacher first) and, within an event,
+    tries the candidates whose hours are least contended first.
+    candidates_of(event_id) returns that event's [(key, var)].
+    """
+    # teacher load = hours of events they are eligible for / their max_hours
+    teacher_demand = Counter()
+    for event in events:
+        for teacher in getattr(event.course, "teachers", []) or []:
+            teacher_demand[teacher.id] += event.duration
+    teacher_load = {}
+    for t_id, demand in teacher_demand.items():
+        teacher = teachers_by_id.get(t_id)
+        teacher_load[t_id] = demand / max(getattr(teacher, "max_hours", 16) or 1, 1)
+
+    # hour demand = how many candidates (of any event) want each (day, hour)
+    slot_hours = {
+        ts.id: [(ts.day, h) for h in range(ts.start_time, ts.end_time)]
+        for ts in timeslots_by_id.values()
+    }
+    event_candidates = {event.id: candidates_of(event.id) for event in events}
+    hour_demand = Counter()
+    for candidates in event_candidates.values():
+        for key, _ in candidates:
+            hour_demand.update(slot_hours[key[3]])
+
+    def event_priority(event):
+        keys = [key for key, _ in event_candidates[event.id]]
+        is_lab = event.duration > 1 or event.required_room_type == "Lab"
+        busiest_teacher = max((teacher_load.get(k[1], 0) for k in keys), default=0)
+        return (len(keys), 0 if is_lab else 1, -busiest_teacher, event.id)
+
+    ordered_vars = []
+    for event in sorted(events, key=event_priority):
+        candidates = sorted(
+            event_candidates[event.id],
+            key=lambda c: (sum(hour_demand[h] for h in slot_hours[c[0][3]]), teacher_load.get(c[0][1], 0), c[0]),
+        )
+        ordered_vars.extend(var for _, var in candidates)
+
+    # Picking the first unfixed literal and setting it to 1 assigns one event at a time.
+    model.AddDecisionStrategy(ordered_vars, cp_model.CHOOSE_FIRST, cp_model.SELECT_MAX_VALUE)
+
+
+def add_redundant_constraints(model, families, candidates, events_by_id, timeslots_by_id,
+                              rooms_by_type, teachers_by_id):
+    """
+    Adds the requested REDUNDANT_CONSTRAINTS families over the candidate
+    variables (`candidates` iterates (key, var) pairs like var_matrix.items()).
+    """
+    day_hours = defaultdict(set)
+    for ts in timeslots_by_id.values():
+        day_hours[ts.day].update(range(ts.start_time, ts.end_time))
+
+    type_cells = defaultdict(list)  # (room_type, day, hour) -> vars
+    batch_days = defaultdict(list)  # (batch_id, day) -> [(var, duration)]
+    teacher_days = defaultdict(list)  # (teacher_id, day) -> [(var, duration)]
+
+    for (event_id, teacher_id, room_id, timeslot_id), var in candidates:
+        event = events_by_id[event_id]
+        ts = timeslots_by_id[timeslot_id]
+        if "room_type_hour" in families:
+            for hour in range(ts.start_time, ts.end_time):
+                type_cells[(event.required_room_type, ts.day, hour)].append(var)
+        if "batch_daily" in families:
+            for batch in getattr(event, "batches", []):
+                batch_days[(batch.id, ts.day)].append((var, event.duration))
+        if "teacher_daily" in families:
+            teacher_days[(teacher_id, ts.day)].append((var, event.duration))
+
+    for (room_type, day, hour), cell_vars in type_cells.items():
+        room_count = len(rooms_by_type.get(room_type, []))
+        if len(cell_vars) > room_count:
+            model.Add(sum(cell_vars) <= room_count)
+
+    def add_daily_cap(terms, cap):
+        if sum(weight for _, weight in terms) > cap:
+            model.Add(cp_model.LinearExpr.WeightedSum([v for v, _ in terms], [w for _, w in terms]) <= cap)
+
+    for (batch_id, day), terms in batch_days.items():
+        add_daily_cap(terms, len(day_hours[day]))
+
+    for (teacher_id, day), terms in teacher_days.items():
+        teacher = teachers_by_id.get(teacher_id)
+        add_daily_cap(terms, min(getattr(teacher, "max_hours", 16), len(day_hours[day])))
+
+
+def add_load_limit_constraints(model, limits, candidates, events_by_id, timeslots_by_id):
+    """
+    Per-day and max-consecutive-hours limits for batches and/or teachers.
+    Builds one occupancy literal per (resource, day, hour) covered by some
+    candidate, shared by every event using that resource, then adds per
+    (resource, day) one daily-sum constraint and one linear constraint per
+    sliding window of max_consecutive_hours + 1 hours. Growth is linear in
+    resources x hours. Relies on the overlap constraints keeping each sum <= 1.
+    """
+    cover = defaultdict(list)  # (kind, resource_id, day, hour) -> vars
+    for (event_id, teacher_id, room_id, timeslot_id), var in candidates:
+        ts = timeslots_by_id[timeslot_id]
+        resources = []
+        if "teacher" in limits:
+            resources.append(("teacher", teacher_id))
+        if "batch" in limits:
+            resources.extend(("batch", b.id) for b in getattr(events_by_id[event_id], "batches", []))
+        for hour in range(ts.start_time, ts.end_time):
+            for kind, resource_id in resources:
+                cover[(kind, resource_id, ts.day, hour)].append(var)
+
+    occupancy = defaultdict(dict)  # (kind, resource_id, day) -> {hour: literal}
+    while cover:
+        (kind, resource_id, day, hour), cell_vars = cover.popitem()
+        if len(cell_vars) == 1:
+            literal = cell_vars[0]
+        else:
+            literal = model.NewBoolVar(f"occ_{kind}{resource_id}_{day}_{hour}")
+            model.Add(literal == sum(cell_vars))
+        occupancy[(kind, resource_id, day)][hour] = literal
+
+    for (kind, resource_id, day), hours in occupancy.items():
+        max_daily = limits[kind].get("max_daily_hours")
+        max_consecutive = limits[kind].get("max_consecutive_hours")
+        if max_daily is not None and len(hours) > max_daily:
+            model.Add(sum(hours.values()) <= max_daily)
+        if max_consecutive is not None:
+            for start in sorted(hours):
+                # an hour nobody can use (e.g. lunch) breaks the run, so skip such windows
+                window = [hours.get(h) for h in range(start, start + max_consecutive + 1)]
+                if all(literal is not None for literal in window):
+                    model.Add(sum(window) <= max_consecutive)
+
+
+def add_hour_cell_constraints(model, candidates, events_by_id, timeslots_by_id):
+    """
+    Low-memory replacement for the pairwise overlap constraints: one AtMostOne
+    per (room | teacher | batch, day, hour) over the candidates covering that
+    hour. Equivalent on whole-hour slots, and built from index arrays only.
+    """
+    cells = defaultdict(lambda: array("i"))
+    for i in range(len(candidates)):
+        ts = timeslots_by_id[candidates.timeslot[i]]
+        batch_ids = [b.id for b in getattr(events_by_id[candidates.event[i]], "batches", [])]
+        for hour in range(ts.start_time, ts.end_time):
+            cells[("room", candidates.room[i], ts.day, hour)].append(i)
+            cells[("teacher", candidates.teacher[i], ts.day, hour)].append(i)
+            for b_id in batch_ids:
+                cells[("batch", b_id, ts.day, hour)].append(i)
+
+    while cells:
+        _, indices = cells.popitem()
+        if len(indices) > 1:
+            model.AddAtMostOne([candidates.var(i) for i in indices])
+
+
+def slot_hour_mask(ts):
+    """Bitmask of the clock hours a timeslot (or availability window) covers (bit h = hour h)."""
+    return ((1 << (ts.end_time - ts.start_time)) - 1) << ts.start_time
+
+
+def slot_type_for(duration):
+    """The slot_type events of `duration` hours are placed in: 'Lecture' (1h), 'Lab' (2h), else None (any)."""
+    return 'Lecture' if duration == 1 else 'Lab' if duration == 2 else None
+
+
+def room_fits(room, event):
+    """Whether the event may use the room: the required room type, and room for its students."""
+    return room.room_type == event.required_room_type and (room.capacity or 0) >= (event.total_size or 0)
+
+
+def timeslot_fits(ts, event):
+    """Whether the event may use the timeslot: the event's duration and slot type."""
+    slot_type = slot_type_for(event.duration)
+    return ts.duration == event.duration and (slot_type is None or ts.slot_type == slot_type)
+
+
+def create_timetable_solver(db_data, time_limit_seconds: float = 120.0, debug: bool = False,
+                            search_strategy: str = "default", redundant_constraints=(),
+                            low_memory: bool = False, load_limits: dict = None, stats: dict = None,
+                            num_workers: int = 0):
     """
     CP-SAT solver that:
     - Assigns each event to (teacher, room, timeslot)
@@ -18,17 +286,50 @@ def create_timetable_solver(db_data, time_limit_seconds: float = 120.0, debug: b
     New param:
         debug (bool): if True, prints detailed diagnostics during domain-building
                       and when infeasible.
+        search_strategy (str): one of SEARCH_STRATEGIES. "smallest_domain" adds a
+                      decision strategy built from the candidate domains and makes
+                      CP-SAT follow it (FIXED_SEARCH).
+        redundant_constraints (iterable): families from REDUNDANT_CONSTRAINTS to add.
+        low_memory (bool): keep candidates in CandidateArrays (no tuple keys, no
+                      per-event lists, no variable names, aggregate-only rejection
+                      counts), use per-hour AtMostOne instead of pairwise overlap
+                      constraints, and drop the index structures before solving.
+        load_limits (dict): per-day / consecutive-hour limits, keyed by LOAD_LIMIT_RESOURCES,
+                      e.g. {"batch": {"max_daily_hours": 6, "max_consecutive_hours": 3}}.
+        stats (dict): if given, filled with build/solve timings, status and model size.
+        num_workers (int): CP-SAT search workers (threads); 0 lets CP-SAT use one per core.
     Required db_data keys:
         - events: list of SchedulableEvent ORM objects (should include .course and .batches)
         - rooms: list of Room ORM objects
         - timeslots: list of Timeslot ORM objects
         - teachers: list of Teacher ORM objects
+    Optional db_data keys:
+        - pins: list of PinnedAssignment ORM objects. A pinned event only gets the
+          candidates matching its pin, and the hours it pins for its room, teacher
+          and batches are removed from every other event's domain.
+        - teacher_unavailability / room_unavailability: lists of TeacherUnavailability /
+          RoomUnavailability ORM objects. Candidates touching those hours are never created.
     """
 
+    if search_strategy not in SEARCH_STRATEGIES:
+        raise ValueError(f"Unknown search strategy '{search_strategy}', expected one of {SEARCH_STRATEGIES}")
+    redundant_constraints = set(redundant_constraints or ())
+    unknown = redundant_constraints - set(REDUNDANT_CONSTRAINTS)
+    if unknown:
+        raise ValueError(f"Unknown redundant constraints {sorted(unknown)}, expected any of {REDUNDANT_CONSTRAINTS}")
+    load_limits = {kind: limit for kind, limit in (load_limits or {}).items() if limit}
+    unknown = set(load_limits) - set(LOAD_LIMIT_RESOURCES)
+    if unknown:
+        raise ValueError(f"Unknown load limit resources {sorted(unknown)}, expected any of {LOAD_LIMIT_RESOURCES}")
+    build_started = time.perf_counter()
+
     events = db_data.get("events", []) or []
     rooms = db_data.get("rooms", []) or []
     timeslots = db_data.get("timeslots", []) or []
     teachers = db_data.get("teachers", []) or []
+    pins = db_data.get("pins", []) or []
+    teacher_windows = db_data.get("teacher_unavailability", []) or []
+    room_windows = db_data.get("room_unavailability", []) or []
 
     # quick sanity
     if not events:
@@ -69,6 +370,11 @@ def create_timetable_solver(db_data, time_limit_seconds: float = 120.0, debug: b
     rejection_reasons = defaultdict(Counter)  # event_id -> Counter(reason -> count)
     event_candidate_keys = defaultdict(list)
 
+    # low_memory: everything above stays empty, candidates live in parallel arrays
+    candidates = CandidateArrays(model) if low_memory else None
+    if low_memory:
+        rejection_reasons = AggregateRejections()
+
     # Pre-index rooms and timeslots by useful attributes for fast checks
     rooms_by_type = defaultdict(list)
     for r in rooms:
@@ -79,6 +385,36 @@ def create_timetable_solver(db_data, time_limit_seconds: float = 120.0, debug: b
         key = (ts.duration, ts.slot_type)
         timeslots_by_duration_and_type[key].append(ts)
 
+    slot_masks = {ts.id: slot_hour_mask(ts) for ts in timeslots}
+
+    # Pinned events: hours they hold per (resource, day), as bitmasks
+    pins_by_event = {p.event_id: p for p in pins if p.event_id in events_by_id}
+    room_busy = defaultdict(int)
+    teacher_busy = defaultdict(int)
+    batch_busy = defaultdict(int)
+    for event_id, pin in pins_by_event.items():
+        ts = timeslots_by_id.get(pin.timeslot_id)
+        if ts is None:
+            continue
+        mask = slot_masks[ts.id]
+        if pin.room_id is not None:
+            room_busy[(pin.room_id, ts.day)] |= mask
+        if pin.teacher_id is not None:
+            teacher_busy[(pin.teacher_id, ts.day)] |= mask
+        for batch in getattr(events_by_id[event_id], "batches", []):
+            batch_busy[(batch.id, ts.day)] |= mask
+
+    if debug and pins_by_event:
+        print(f"Pinned events: {len(pins_by_event)}")
+
+    # Availability windows: hours a teacher/room can't be used, per (resource, day)
+    teacher_unavailable = defaultdict(int)
+    for window in teacher_windows:
+        teacher_unavailable[(window.teacher_id, window.day)] |= slot_hour_mask(window)
+    room_unavailable = defaultdict(int)
+    for window in room_windows:
+        room_unavailable[(window.room_id, window.day)] |= slot_hour_mask(window)
+
     # Build domain: only combos that obey hard filters
     for event in events:
         course = getattr(event, "course", None)
@@ -88,6 +424,13 @@ def create_timetable_solver(db_data, time_limit_seconds: float = 120.0, debug: b
             return None
 
         eligible_teachers = getattr(course, "teachers", []) or []
+        pin = pins_by_event.get(event.id)
+        if pin is not None and pin.teacher_id is not None:
+            # a pinned teacher overrides course eligibility (e.g. a visiting professor)
+            pinned_teachers = [t for t in eligible_teachers if t.id == pin.teacher_id]
+            if not pinned_teachers and pin.teacher_id in teachers_by_id:
+                pinned_teachers = [teachers_by_id[pin.teacher_id]]
+            eligible_teachers = pinned_teachers
         if not eligible_teachers:
             if debug:
                 print(f"Error: No teachers assigned to course '{course.name}' (event {event.id}).")
@@ -95,17 +438,33 @@ def create_timetable_solver(db_data, time_limit_seconds: float = 120.0, debug: b
 
         added_any = False
         # For debugging: possible rooms of right type and capacity
-        possible_rooms = [r for r in rooms_by_type.get(event.required_room_type, []) if r.capacity >= event.total_size]
+        possible_rooms = [r for r in rooms_by_type.get(event.required_room_type, []) if room_fits(r, event)]
         possible_ts = []
         # choose slot_type corresponding to duration: heuristics
-        expected_slot_type = 'Lecture' if event.duration == 1 else 'Lab' if event.duration == 2 else None
+        expected_slot_type = slot_type_for(event.duration)
         if expected_slot_type:
             possible_ts = timeslots_by_duration_and_type.get((event.duration, expected_slot_type), [])
         else:
             # fallback: any timeslot matching duration
             possible_ts = [ts for ts in timeslots if ts.duration == event.duration]
 
+        if pin is not None:
+            # pinned: keep only what matches the pin, pins never block themselves
+            if pin.room_id is not None:
+                possible_rooms = [r for r in possible_rooms if r.id == pin.room_id]
+            if pin.timeslot_id is not None:
+                possible_ts = [ts for ts in possible_ts if ts.id == pin.timeslot_id]
+        elif pins_by_event:
+            # drop slots clashing with a pinned event of one of our batches
+            batch_ids = [b.id for b in getattr(event, "batches", [])]
+            kept_ts = [ts for ts in possible_ts
+                       if not any(batch_busy.get((b_id, ts.day), 0) & slot_masks[ts.id] for b_id in batch_ids)]
+            if len(kept_ts) != len(possible_ts):
+                rejection_reasons[event.id]["batch_pinned_busy"] += len(possible_ts) - len(kept_ts)
+            possible_ts = kept_ts
+
         # build combos
+        first_candidate = len(candidates) if low_memory else 0
         for teacher in eligible_teachers:
             t_id = getattr(teacher, "id", None)
             if t_id is None:
@@ -128,7 +487,29 @@ def create_timetable_solver(db_data, time_limit_seconds: float = 120.0, debug: b
                         rejection_reasons[event.id]["timeslot_type_mismatch"] += 1
                         continue
 
+                    mask = slot_masks[timeslot.id]
+
+                    # availability windows
+                    if teacher_unavailable.get((t_id, timeslot.day), 0) & mask:
+                        rejection_reasons[event.id]["teacher_unavailable"] += 1
+                        continue
+                    if room_unavailable.get((room.id, timeslot.day), 0) & mask:
+                        rejection_reasons[event.id]["room_unavailable"] += 1
+                        continue
+
+                    # hours already taken by a pinned event
+                    if pin is None and pins_by_event:
+                        if room_busy.get((room.id, timeslot.day), 0) & mask:
+                            rejection_reasons[event.id]["room_pinned_busy"] += 1
+                            continue
+                        if teacher_busy.get((t_id, timeslot.day), 0) & mask:
+                            rejection_reasons[event.id]["teacher_pinned_busy"] += 1
+                            continue
+
                     # valid candidate -> create bool var
+                    if low_memory:
+                        candidates.add(event.id, t_id, room.id, timeslot.id)
+                        continue
                     var = model.NewBoolVar(f"e{event.id}_t{t_id}_r{room.id}_s{timeslot.id}")
                     key = (event.id, t_id, room.id, timeslot.id)
                     var_matrix[key] = var
@@ -136,7 +517,11 @@ def create_timetable_solver(db_data, time_limit_seconds: float = 120.0, debug: b
                     event_candidate_keys[event.id].append(key)
                     added_any = True
 
-        candidate_count = len(event_candidate_keys[event.id])
+        if low_memory:
+            candidates.event_ranges[event.id] = (first_candidate, len(candidates))
+            candidate_count = len(candidates) - first_candidate
+        else:
+            candidate_count = len(event_candidate_keys[event.id])
         event_candidate_counts[event.id] = candidate_count
 
         if debug:
@@ -182,6 +567,8 @@ def create_timetable_solver(db_data, time_limit_seconds: float = 120.0, debug: b
 
     # 1) Each event must be scheduled exactly once (one teacher + one room + one timeslot).
     for event_id, vars_list in event_vars_map.items():
+        if low_memory:
+            vars_list = [var for _, var in candidates.event_candidates(event_id)]
         if not vars_list:
             if debug:
                 print(f"Error: Event {event_id} has empty domain — aborting.")
@@ -195,6 +582,11 @@ def create_timetable_solver(db_data, time_limit_seconds: float = 120.0, debug: b
         # intervals [start, end) overlap if start1 < end2 and start2 < end1
         return (ts1.start_time < ts2.end_time) and (ts2.start_time < ts1.end_time)
 
+    # low_memory: one AtMostOne per hour cell instead; var_matrix is empty there,
+    # so the pairwise loops below add nothing.
+    if low_memory:
+        add_hour_cell_constraints(model, candidates, events_by_id, timeslots_by_id)
+
     # Build reverse index: resource -> list of (key, var, timeslot_obj, event_id)
     # We'll create lists for rooms, teachers and batches and then add pairwise non-overlap constraints.
     room_index = defaultdict(list)
@@ -243,10 +635,19 @@ def create_timetable_solver(db_data, time_limit_seconds: float = 120.0, debug: b
 
     # --- Teacher workload constraint ---
     # sum(duration * assigned_vars) <= teacher.max_hours
+    if low_memory:
+        teacher_candidates = defaultdict(lambda: array("i"))
+        for i, teacher_id in enumerate(candidates.teacher):
+            teacher_candidates[teacher_id].append(i)
+
     for teacher in teachers:
         t_id = teacher.id
         teacher_vars = []
         teacher_weights = []
+        if low_memory:
+            for i in teacher_candidates.pop(t_id, ()):
+                teacher_vars.append(candidates.var(i))
+                teacher_weights.append(events_by_id[candidates.event[i]].duration)
         for (event_id, teacher_id, room_id, timeslot_id), var in var_matrix.items():
             if teacher_id == t_id:
                 teacher_vars.append(var)
@@ -258,18 +659,48 @@ def create_timetable_solver(db_data, time_limit_seconds: float = 120.0, debug: b
                 cp_model.LinearExpr.WeightedSum(teacher_vars, teacher_weights) <= getattr(teacher, "max_hours", 16)
             )
 
-    # --- Solve ---
-        # --- Solve ---
+    # --- Optional redundant constraints ---
+    if redundant_constraints:
+        add_redundant_constraints(model, redundant_constraints,
+                                  candidates.items() if low_memory else var_matrix.items(),
+                                  events_by_id, timeslots_by_id, rooms_by_type, teachers_by_id)
+
+    # --- Daily load / consecutive hours ---
+    if load_limits:
+        add_load_limit_constraints(model, load_limits,
+                                   candidates.items() if low_memory else var_matrix.items(),
+                                   events_by_id, timeslots_by_id)
+
+    # --- Search strategy ---
     solver = cp_model.CpSolver()
     solver.parameters.max_time_in_seconds = time_limit_seconds
+    if num_workers:
+        solver.parameters.num_workers = num_workers
+
+    if search_strategy == "smallest_domain":
+        if low_memory:
+            candidates_of = candidates.event_candidates
+        else:
+            candidates_of = lambda event_id: [(k, var_matrix[k]) for k in event_candidate_keys[event_id]]
+        add_smallest_domain_strategy(model, events, candidates_of, teachers_by_id, timeslots_by_id)
+        solver.parameters.search_branching = cp_model.FIXED_SEARCH
+
+    if low_memory:
+        # constraints are emitted: only the four candidate arrays are needed from here on
+        candidates.event_ranges.clear()
+        teacher_candidates.clear()
+
+    # --- Solve ---
+    build_seconds = time.perf_counter() - build_started
 
     if debug:
         print("Solving timetable with CP-SAT... (debug ON)")
     else:
         print("Solving timetable with CP-SAT...")
 
+    timer = FirstSolutionTimer() if stats is not None else None
     try:
-        status = solver.Solve(model)
+        status = solver.Solve(model, timer)
     except Exception as e:
         if debug:
             print("Solver raised exception:", e)
@@ -283,6 +714,20 @@ def create_timetable_solver(db_data, time_limit_seconds: float = 120.0, debug: b
 
     print("Solver finished with status:", status_name)
 
+    if stats is not None:
+        model_proto = model.Proto()
+        stats.update({
+            "status": status_name,
+            "search_strategy": search_strategy,
+            "redundant_constraints": sorted(redundant_constraints),
+            "load_limits": load_limits,
+            "build_seconds": build_seconds,
+            "solve_seconds": solver.WallTime(),
+            "first_solution_seconds": timer.first_solution_seconds,
+            "num_variables": len(model_proto.variables),
+            "num_constraints": len(model_proto.constraints),
+        })
+
     # --- ✅ Conflict Detector Helper ---
     def detect_conflicts(solution):
         """Check for overlapping resource usage among rooms, teachers, and batches."""
@@ -357,6 +802,11 @@ def create_timetable_solver(db_data, time_limit_seconds: float = 120.0, debug: b
     # --- Handle results ---
     if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
         solution = {}
+        if low_memory:
+            values = solver.ResponseProto().solution
+            for i in range(len(candidates)):
+                if values[candidates.first_index + i]:
+                    solution[candidates.event[i]] = (candidates.teacher[i], candidates.room[i], candidates.timeslot[i])
         for (event_id, teacher_id, room_id, timeslot_id), var in var_matrix.items():
             try:
                 val = solver.Value(var)
@@ -387,7 +837,7 @@ def create_timetable_solver(db_data, time_limit_seconds: float = 120.0, debug: b
     # --- If infeasible or unknown ---
     if debug:
         print("No feasible solution found — diagnostic snapshot:")
-        domain_sizes = {eid: len(keys) for eid, keys in event_candidate_keys.items()}
+        domain_sizes = dict(event_candidate_counts)
         sizes = sorted(domain_sizes.items(), key=lambda x: x[1])
         print("Event domain sizes (smallest 20):", sizes[:20])
         ts_by_type_duration = defaultdict(set)
@@ -0,0 +1,71 @@
+# backend/tenants.py
+"""
+Every tenant (college) has a database of its own with the full schema, so
+its teachers, events and timetable versions never mix with another's and
+its generations queue separately (see main.generations). Requests pick the
+tenant with the X-Tenant header; "default" is DATABASE_URL, the database of
+the single-tenant releases.
+"""
+import re
+from pathlib import Path
+
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.orm import sessionmaker
+
+import config
+import models
+from materialized import refresh_timetable_entries
+from migrate import upgrade_database
+from query_stats import instrument
+from versions import active_version_id
+
+DEFAULT_TENANT = "default"
+TENANT_NAME = re.compile(r"^[a-z0-9][a-z0-9_-]{0,62}$")
+
+
+class Tenant:
+    def __init__(self, name: str, engine, async_engine):
+        self.name = name
+        self.engine = engine
+        self.async_engine = async_engine
+        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        self.AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
+def tenant_database_url(name: str) -> str:
+    if name == DEFAULT_TENANT:
+        return config.DATABASE_URL
+    return config.TENANT_DATABASE_URL.format(tenant=name)
+
+
+def open_tenant(name: str) -> Tenant:
+    """Connects to the tenant's database and migrates it to the latest schema."""
+    if not TENANT_NAME.match(name):
+        raise ValueError(f"Invalid tenant name '{name}': use lowercase letters, digits, '-' and '_'.")
+
+    if name == DEFAULT_TENANT:
+        engine, async_engine = models.engine, models.async_engine
+    else:
+        url = tenant_database_url(name)
+        database = make_url(url).database
+        if models.is_sqlite(url) and database and database != ":memory:":
+            Path(database).parent.mkdir(parents=True, exist_ok=True)
+        engine, async_engine = models.create_engines(url)
+
+    upgrade_database(engine)
+    instrument(engine)
+    instrument(async_engine.sync_engine)
+    tenant = Tenant(name, engine, async_engine)
+
+    # Databases upgraded from before the materialized timetable tables: fill them once
+    with tenant.SessionLocal() as db:
+        if active_version_id(db) is not None and not db.query(models.TeacherTimetableEntry.id).first():
+            refresh_timetable_entries(db)
+            db.commit()
+    return tenant
+
+
+def open_tenants(names) -> dict:
+    """{name: Tenant} for the configured tenant names (the default tenant is always included)."""
+    return {name: open_tenant(name) for name in dict.fromkeys([DEFAULT_TENANT, *names])}
@@ -0,0 +1,88 @@
+# backend/tests/conftest.py
+"""
+The API under test runs on a copy of the bundled timetable.db: DATABASE_URL
+is pointed at the copy before main (and so models / config) is imported, and
+the tracked database is never written. Solver tests seed small problems into
+databases of their own (seeded_session).
+
+    cd backend && python -m pytest -q
+"""
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+BACKEND = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BACKEND))
+
+_workdir = Path(tempfile.mkdtemp(prefix="timetable-tests-"))
+shutil.copy(BACKEND / "timetable.db", _workdir / "timetable.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{_workdir / 'timetable.db'}"
+os.environ["TENANT_DATABASE_URL"] = f"sqlite:///{_workdir}/tenants/{{tenant}}.db"
+os.environ["TENANTS"] = "default"
+
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(_workdir, ignore_errors=True)
+
+
+@pytest.fixture(scope="session")
+def client():
+    from fastapi.testclient import TestClient
+    import main
+
+    with TestClient(main.app) as test_client:
+        yield test_client
+
+
+def seed_small_problem(db):
+    """
+    Two batches and one 3-credit course taught by two teachers: three joint
+    lectures and a tutorial per batch, on a Mon-Fri 9-12 grid of 1h slots.
+    Small enough for a solve to finish in about a second.
+    """
+    from models import Teacher, Batch, Room, Timeslot, Course, SchedulableEvent
+
+    teachers = [Teacher(name=f"Teacher {i}", max_hours=16) for i in (1, 2)]
+    batches = [Batch(name=f"Batch {i}", size=30) for i in (1, 2)]
+    course = Course(name="Course A", credit_hours=3, teachers=teachers)
+    db.add_all([
+        *teachers, *batches, course,
+        Room(name="Hall 1", capacity=70, room_type="Lecture_X"),
+        Room(name="Hall 2", capacity=70, room_type="Lecture_X"),
+        Room(name="Tutorial 1", capacity=40, room_type="Tutorial_Y"),
+        *[Timeslot(day=day, start_time=hour, end_time=hour + 1, duration=1, slot_type="Lecture")
+          for day in DAYS for hour in (9, 10, 11)],
+    ])
+    db.add_all(
+        [SchedulableEvent(name=f"Course A Lecture {i}", duration=1, required_room_type="Lecture_X",
+                          total_size=60, course=course, batches=batches) for i in (1, 2, 3)]
+        + [SchedulableEvent(name=f"Course A Tutorial ({b.name})", duration=1, required_room_type="Tutorial_Y",
+                            total_size=30, course=course, batches=[b]) for b in batches]
+    )
+    db.commit()
+
+
+@pytest.fixture
+def seeded_session(tmp_path):
+    """A session on a fresh, migrated and instrumented SQLite database holding seed_small_problem."""
+    import models
+    from migrate import upgrade_database
+    from query_stats import instrument
+    from sqlalchemy.orm import sessionmaker
+
+    engine, async_engine = models.create_engines(f"sqlite:///{tmp_path / 'seeded.db'}")
+    upgrade_database(engine)
+    instrument(engine)
+    db = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    seed_small_problem(db)
+    try:
+        yield db
+    finally:
+        db.close()
+        engine.dispose()
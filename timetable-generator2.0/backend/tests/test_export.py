@@ -0,0 +1,105 @@
+# backend/tests/test_export.py
+import csv
+import gzip
+import io
+import json
+
+import pytest
+
+import main
+import models
+from export import EXPORT_FIELDS, accepts_gzip
+from migrate import upgrade_database
+from models import ScheduledClass, Batch, event_batches_table
+from tenants import Tenant
+from versions import active_version_id
+
+PLAIN = {"Accept-Encoding": "identity"}
+
+
+@pytest.fixture(scope="module")
+def expected():
+    """{scheduled class id: names of its batches} of the active version, in id order."""
+    with main.tenants["default"].SessionLocal() as db:
+        rows = (
+            db.query(ScheduledClass.id, Batch.name)
+            .outerjoin(event_batches_table, event_batches_table.c.event_id == ScheduledClass.event_id)
+            .outerjoin(Batch, Batch.id == event_batches_table.c.batch_id)
+            .filter(ScheduledClass.version_id == active_version_id(db))
+            .order_by(ScheduledClass.id, event_batches_table.c.batch_id)
+        )
+        classes = {}
+        for class_id, batch_name in rows:
+            classes.setdefault(class_id, [])
+            if batch_name is not None:
+                classes[class_id].append(batch_name)
+    assert classes, "the bundled database has a published timetable"
+    return classes
+
+
+def test_ndjson_has_one_line_per_class(client, expected):
+    response = client.get("/timetable/export/", headers=PLAIN)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert "content-encoding" not in response.headers
+    classes = [json.loads(line) for line in response.content.decode().splitlines()]
+    assert [list(c) for c in classes] == [EXPORT_FIELDS] * len(expected)
+    assert {c["id"]: c["batches"] for c in classes} == expected
+    assert [c["id"] for c in classes] == list(expected)
+
+
+def test_csv_has_a_header_and_batches_joined_with_semicolons(client, expected):
+    response = client.get("/timetable/export/?format=csv", headers=PLAIN)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    rows = list(csv.reader(io.StringIO(response.content.decode())))
+    assert rows[0] == EXPORT_FIELDS
+    assert [(int(row[0]), row[-1]) for row in rows[1:]] == [(i, ";".join(b)) for i, b in expected.items()]
+
+    ndjson = [json.loads(line) for line in client.get("/timetable/export/", headers=PLAIN).content.splitlines()]
+    assert [row[:-1] for row in rows[1:]] == [[str(c[f]) for f in EXPORT_FIELDS[:-1]] for c in ndjson]
+
+
+@pytest.mark.parametrize("export_format", ["ndjson", "csv"])
+def test_gzip_body_decompresses_to_the_plain_body(client, export_format):
+    plain = client.get(f"/timetable/export/?format={export_format}", headers=PLAIN).content
+    with client.stream("GET", f"/timetable/export/?format={export_format}",
+                       headers={"Accept-Encoding": "gzip"}) as response:
+        assert response.headers["content-encoding"] == "gzip"
+        assert "Accept-Encoding" in response.headers["vary"]
+        compressed = b"".join(response.iter_raw())
+    assert len(compressed) < len(plain)
+    assert gzip.decompress(compressed) == plain
+
+
+@pytest.mark.parametrize("header, accepted", [
+    ("gzip", True),
+    ("GZIP", True),
+    ("deflate, gzip;q=0.5", True),
+    ("gzip;q=1.0, identity", True),
+    ("gzip;q=0", False),
+    ("gzip; q=0.0", False),
+    ("deflate, gzip;q=0", False),
+    ("identity", False),
+    ("", False),
+])
+def test_accepts_gzip(header, accepted):
+    assert accepts_gzip(header) is accepted
+
+
+def test_unknown_format_is_rejected(client):
+    assert client.get("/timetable/export/?format=xml").status_code == 400
+
+
+def test_no_active_version_is_not_found(client, tmp_path):
+    engine, async_engine = models.create_engines(f"sqlite:///{tmp_path / 'empty.db'}")
+    upgrade_database(engine)
+    main.tenants["empty"] = Tenant("empty", engine, async_engine)
+    try:
+        response = client.get("/timetable/export/", headers={"X-Tenant": "empty", **PLAIN})
+        assert response.status_code == 404
+        assert response.json()["detail"] == "No timetable found. Please generate one first."
+    finally:
+        del main.tenants["empty"]
+        client.portal.call(async_engine.dispose)  # its connections belong to the client's event loop
+        engine.dispose()
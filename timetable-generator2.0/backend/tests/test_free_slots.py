@@ -0,0 +1,123 @@
+# backend/tests/test_free_slots.py
+"""
+Free slots from the occupancy index's bitmasks against the per-hour set
+scan they replaced, and common free blocks of entities with known overlaps.
+"""
+import random
+
+import pytest
+
+import main
+from models import ScheduledClass, Timeslot, event_batches_table
+from occupancy import DAYS, OccupancyIndex, hour_runs
+from versions import in_active_version
+
+
+def scan_free_slots(busy_hours, all_timeslots, min_duration=1):
+    """The former format_free_slots: a walk over each day's hours and a (day, hour) busy set."""
+    final_timetable = []
+    for day in DAYS:
+        day_hours = sorted({ts.start_time for ts in all_timeslots if ts.day == day})
+        if not day_hours:
+            continue
+        free_blocks = []
+        start = None
+        for hour in range(min(day_hours), max(day_hours) + 1):
+            is_free = (day, hour) not in busy_hours
+            next_is_busy = (day, hour + 1) in busy_hours
+            if is_free and start is None:
+                start = hour
+            if start is not None and (not is_free or next_is_busy or hour == max(day_hours)):
+                end = hour + 1 if is_free else hour
+                free_blocks.append((start, end))
+                start = None
+        free_blocks = [(start, end) for start, end in free_blocks if end - start >= min_duration]
+        final_timetable.append({"day": day, "timeslots": [
+            {"id": i + 1, "start_time": start, "end_time": end, "duration": end - start, "slot_type": "",
+             "scheduled_classes": []}
+            for i, (start, end) in enumerate(free_blocks)
+        ]})
+    return final_timetable
+
+
+@pytest.fixture(scope="module")
+def bundled():
+    """(busy (day, hour) sets per (kind, id) of the active version, all timeslots)."""
+    with main.tenants["default"].SessionLocal() as db:
+        rows = (
+            db.query(ScheduledClass.teacher_id, ScheduledClass.room_id, event_batches_table.c.batch_id,
+                     Timeslot.day, Timeslot.start_time, Timeslot.end_time)
+            .join(Timeslot, Timeslot.id == ScheduledClass.timeslot_id)
+            .outerjoin(event_batches_table, event_batches_table.c.event_id == ScheduledClass.event_id)
+            .filter(in_active_version(ScheduledClass.version_id))
+            .all()
+        )
+        all_timeslots = db.query(Timeslot.day, Timeslot.start_time).all()
+    busy = {}
+    for teacher_id, room_id, batch_id, day, start_time, end_time in rows:
+        for entity in [("teacher", teacher_id), ("room", room_id), ("batch", batch_id)]:
+            busy.setdefault(entity, set()).update((day, h) for h in range(start_time, end_time))
+    assert busy
+    return busy, all_timeslots
+
+
+def test_batch_free_slots_match_the_per_hour_scan(client, bundled):
+    busy, all_timeslots = bundled
+    for batch in client.get("/batches/").json():
+        free = client.get(f"/batches/{batch['id']}/free-slots/").json()
+        assert free["timetable"] == scan_free_slots(busy.get(("batch", batch["id"]), set()), all_timeslots)
+
+
+@pytest.mark.parametrize("min_duration", [1, 2, 3])
+def test_common_free_slots_match_the_per_hour_scan(client, bundled, min_duration):
+    busy, all_timeslots = bundled
+    batch_id = client.get("/batches/").json()[0]["id"]
+    for teacher in client.get("/teachers/").json():
+        for room in client.get("/rooms/").json()[:2]:
+            entities = [("batch", batch_id), ("teacher", teacher["id"]), ("room", room["id"])]
+            common = client.get("/free-slots/common/", params={
+                "batch_ids": batch_id, "teacher_ids": teacher["id"], "room_ids": room["id"],
+                "min_duration": min_duration,
+            }).json()
+            expected = scan_free_slots(set().union(*(busy.get(e, set()) for e in entities)), all_timeslots,
+                                       min_duration)
+            assert common["timetable"] == expected
+
+
+def test_hour_runs_are_the_runs_of_set_bits():
+    masks = list(range(1 << 10)) + [random.Random(seed).getrandbits(120) for seed in range(200)]
+    for mask in masks:
+        bits = [bit for bit in range(mask.bit_length()) if mask >> bit & 1]
+        runs = []
+        for bit in bits:
+            if runs and runs[-1][1] == bit:
+                runs[-1][1] = bit + 1
+            else:
+                runs.append([bit, bit + 1])
+        assert list(hour_runs(mask)) == [tuple(run) for run in runs]
+
+
+def placement(day, start_time, end_time, teacher_id=None, batch_ids=()):
+    return {"event_id": 1, "teacher_id": teacher_id, "room_id": None, "timeslot_id": 1, "day": day,
+            "start_time": start_time, "end_time": end_time, "batch_ids": list(batch_ids)}
+
+
+def test_common_free_blocks_with_a_known_overlap():
+    index = OccupancyIndex(version_id=1, revision=0, day_span=24)
+    index.window = index.span("Monday", 9, 17) | index.span("Tuesday", 9, 17)
+    index.add_class(1, placement("Monday", 9, 11, batch_ids=[1]))
+    index.add_class(2, placement("Monday", 10, 12, teacher_id=7))
+    index.add_class(3, placement("Monday", 14, 15, teacher_id=7))
+    index.add_class(4, placement("Tuesday", 9, 10, batch_ids=[1]))
+
+    def blocks(entities, min_duration=1):
+        return {day["day"]: [(slot["start_time"], slot["end_time"]) for slot in day["timeslots"]]
+                for day in index.free_days(index.busy_mask(entities), min_duration)}
+
+    assert blocks([("batch", 1)]) == {"Monday": [(11, 17)], "Tuesday": [(10, 17)]}
+    both = [("batch", 1), ("teacher", 7)]
+    assert blocks(both) == {"Monday": [(12, 14), (15, 17)], "Tuesday": [(10, 17)]}
+    assert blocks(both, min_duration=2) == {"Monday": [(12, 14), (15, 17)], "Tuesday": [(10, 17)]}
+    assert blocks(both, min_duration=3) == {"Monday": [], "Tuesday": [(10, 17)]}
+    assert blocks(both, min_duration=8) == {"Monday": [], "Tuesday": []}
+    assert blocks([("teacher", 99)]) == {"Monday": [(9, 17)], "Tuesday": [(9, 17)]}
@@ -0,0 +1,81 @@
+# backend/tests/test_generation.py
+import asyncio
+
+import pytest
+
+from generation import GenerationCoordinator, WorkerSlots
+
+
+def test_worker_slots_take_turns_across_datasets():
+    async def scenario():
+        slots = WorkerSlots(1)
+        served = []
+
+        async def solve(dataset, n):
+            await slots.acquire(dataset)
+            served.append(f"{dataset}{n}")
+            await asyncio.sleep(0)
+            slots.release(dataset)
+
+        # "a" queues three solves before "b" and "c" ask for one each
+        await asyncio.gather(solve("a", 1), solve("a", 2), solve("a", 3), solve("b", 1), solve("c", 1))
+        return served, slots.free
+
+    served, free = asyncio.run(scenario())
+    assert served == ["a1", "b1", "c1", "a2", "a3"]
+    assert free == 1
+
+
+def test_cancelled_waiter_gives_up_its_place():
+    async def scenario():
+        slots = WorkerSlots(1)
+        await slots.acquire("a")
+        waiter = asyncio.ensure_future(slots.acquire("b"))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        slots.release("a")
+        return slots.free, slots.waiting("b")
+
+    assert asyncio.run(scenario()) == (1, 0)
+
+
+def test_stats_tell_solves_on_a_worker_from_those_waiting_for_one():
+    async def scenario():
+        generations = GenerationCoordinator(max_concurrent=1, workers=1)
+        finish = asyncio.Event()
+
+        async def generate(dataset):
+            async with generations.worker(dataset):
+                await finish.wait()
+            return dataset
+
+        runs = [asyncio.ensure_future(generations.run(dataset, key, lambda d=dataset: generate(d)))
+                for dataset, key in [("a", "p1"), ("b", "p1"), ("a", "p2")]]
+        for _ in range(5):
+            await asyncio.sleep(0)
+        stats = {dataset: generations.stats(dataset) for dataset in ("a", "b")}
+        finish.set()
+        return stats, await asyncio.gather(*runs)
+
+    stats, results = asyncio.run(scenario())
+    assert results == ["a", "b", "a"]
+    assert stats["a"] == {"max_concurrent": 1, "running": 1, "waiting_for_worker": 0, "queued": 1,
+                          "waiting_requests": 2}
+    assert stats["b"] == {"max_concurrent": 1, "running": 0, "waiting_for_worker": 1, "queued": 0,
+                          "waiting_requests": 1}
+
+
+def test_generation_metrics(client):
+    metrics = client.get("/metrics/generation/").json()
+    assert metrics["tenants"]["default"] == {"max_concurrent": 1, "running": 0, "waiting_for_worker": 0,
+                                             "queued": 0, "waiting_requests": 0}
+
+
+@pytest.mark.parametrize("limit", ["batch_max_daily_hours", "batch_max_consecutive_hours",
+                                   "teacher_max_daily_hours", "teacher_max_consecutive_hours"])
+@pytest.mark.parametrize("value", [0, -1])
+def test_load_limits_below_one_hour_are_rejected(client, limit, value):
+    response = client.post(f"/generate-timetable/?{limit}={value}")
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"] == ["query", limit]
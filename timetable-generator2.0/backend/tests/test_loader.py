@@ -0,0 +1,56 @@
+# backend/tests/test_loader.py
+"""
+load_problem reads everything the solvers use in a fixed number of
+statements (10), and the solvers never go back to the database afterwards.
+"""
+from functools import partial
+
+import pytest
+
+import grid_solver
+import main
+import solver
+from loader import load_problem, plain_problem
+from models import Batch, Course, SchedulableEvent
+from query_stats import count_queries, query_budget
+
+LOAD_QUERIES = 10
+
+
+@pytest.mark.parametrize("solve", [solver.create_timetable_solver, grid_solver.create_grid_timetable_solver])
+def test_load_and_solve_within_budget(seeded_session, solve):
+    with query_budget(LOAD_QUERIES):
+        db_data = load_problem(seeded_session)
+        solution = solve(db_data, time_limit_seconds=20.0)
+
+    assert solution
+    assert set(solution) == {event.id for event in db_data["events"]}
+
+
+@pytest.mark.parametrize("solve", [solver.create_timetable_solver, grid_solver.create_grid_timetable_solver])
+def test_plain_problem_solves_in_the_solver_pool(seeded_session, solve):
+    db_data = load_problem(seeded_session)
+    problem = plain_problem(db_data)
+    event = problem["events"][0]
+    assert any(teacher is event.course.teachers[0] for teacher in problem["teachers"])  # shared, not copied twice
+
+    solution = main.solver_executor.submit(partial(solve, problem, time_limit_seconds=20.0)).result()
+    assert set(solution) == {event.id for event in db_data["events"]}
+
+
+def test_load_queries_do_not_grow_with_the_data(seeded_session):
+    with count_queries() as small:
+        load_problem(seeded_session)
+
+    course = seeded_session.query(Course).one()
+    for i in range(20):
+        batch = Batch(name=f"Extra batch {i}", size=20)
+        seeded_session.add(SchedulableEvent(name=f"Extra lecture {i}", duration=1, required_room_type="Lecture_X",
+                                            total_size=20, course=course, batches=[batch]))
+    seeded_session.commit()
+    seeded_session.expunge_all()
+
+    with count_queries() as large:
+        db_data = load_problem(seeded_session)
+    assert len(db_data["events"]) == 25
+    assert large.count == small.count == LOAD_QUERIES
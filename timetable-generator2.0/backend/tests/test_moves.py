@@ -0,0 +1,221 @@
+# backend/tests/test_moves.py
+import sys
+import threading
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+import main
+from materialized import refresh_timetable_entries
+from occupancy import build_occupancy_index
+from versions import timetable_changed, timetable_state, bump_revision
+from models import TeacherTimetableEntry, BatchTimetableEntry, Timeslot, ScheduledClass
+from moves import PlacementRules, apply_placements, editing_occupancy
+
+ENTRY_TABLES = [(TeacherTimetableEntry, TeacherTimetableEntry.teacher_id),
+                (BatchTimetableEntry, BatchTimetableEntry.batch_id)]
+
+
+def entry_rows(db):
+    """{(kind, entity id): {entry row id: entry contents}}."""
+    rows = {}
+    for model, entity_column in ENTRY_TABLES:
+        columns = [c for c in model.__table__.columns if c.name != "id"]
+        for row_id, entity_id, *values in db.query(model.id, entity_column, *columns):
+            rows.setdefault((model.__tablename__, entity_id), {})[row_id] = tuple(map(str, values))
+    return rows
+
+
+@contextmanager
+def entry_rows_written(engine):
+    """Counts the entry table rows deleted and inserted on `engine` while the block runs."""
+    written = {"deleted": 0, "inserted": 0}
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        if "timetable_entries" in statement:
+            verb = statement.lstrip().split(None, 1)[0].upper()
+            if verb in ("DELETE", "INSERT"):
+                written["deleted" if verb == "DELETE" else "inserted"] += max(cursor.rowcount, 0)
+
+    event.listen(engine, "after_cursor_execute", count)
+    try:
+        yield written
+    finally:
+        event.remove(engine, "after_cursor_execute", count)
+
+
+def contents(rows):
+    return sorted(value for entity_rows in rows.values() for value in entity_rows.values())
+
+
+@pytest.fixture
+def db():
+    session = main.tenants["default"].SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def occupancy(db):
+    return main.load_occupancy(db, "default")
+
+
+def first_valid_move(client, occupancy):
+    for class_id in sorted(occupancy.classes):
+        response = client.patch(f"/scheduled-classes/{class_id}?dry_run=true&alternatives=1", json={})
+        if response.json()["alternatives"]:
+            return class_id, response.json()["alternatives"][0]
+    pytest.skip("no class of the bundled timetable can move")
+
+
+def test_move_rewrites_only_the_affected_entries(client, db, occupancy):
+    class_id, target = first_valid_move(client, occupancy)
+    moved = occupancy.classes[class_id]
+    affected = ({("teacher_timetable_entries", moved["teacher_id"]),
+                 ("teacher_timetable_entries", target["teacher_id"])}
+                | {("batch_timetable_entries", batch_id) for batch_id in moved["batch_ids"]})
+    before = entry_rows(db)
+    etag = client.get("/timetable/full/").headers["etag"]
+    db.rollback()
+
+    with entry_rows_written(main.tenants["default"].engine) as written:
+        response = client.patch(f"/scheduled-classes/{class_id}", json=target)
+    assert response.status_code == 200, response.text
+
+    after = entry_rows(db)
+    affected_rows = sum(len(before.get(entity, {})) for entity in affected)
+    assert written["deleted"] == affected_rows  # rows of other teachers and batches are left alone
+    assert written["inserted"] == sum(len(after.get(entity, {})) for entity in affected)
+    assert written["inserted"] < sum(map(len, after.values()))
+    for entity, rows in before.items():
+        if entity not in affected:
+            assert after[entity] == rows
+    refresh_timetable_entries(db)
+    assert contents(after) == contents(entry_rows(db))  # what a full refresh writes
+    db.rollback()
+
+    assert client.get("/timetable/full/").headers["etag"] != etag
+    assert main.load_occupancy(db, "default") is occupancy  # updated in place, not rebuilt
+    assert occupancy.classes[class_id]["timeslot_id"] == target["timeslot_id"]
+    assert client.get("/timetable/conflicts/").json() == []
+
+
+def test_clashing_move_is_rejected(client, occupancy):
+    first, second = sorted(occupancy.classes)[:2]
+    other = occupancy.classes[second]
+    response = client.patch(f"/scheduled-classes/{first}",
+                            json={"room_id": other["room_id"], "timeslot_id": other["timeslot_id"]})
+    assert response.status_code == 409
+    assert f"already has scheduled class {second} then" in response.json()["detail"]
+
+
+def test_dry_run_alternatives_are_valid(client, occupancy):
+    class_id = sorted(occupancy.classes)[0]
+    alternatives = client.patch(f"/scheduled-classes/{class_id}?dry_run=true&alternatives=5", json={}).json()
+    for target in alternatives["alternatives"]:
+        check = client.patch(f"/scheduled-classes/{class_id}?dry_run=true&alternatives=0", json=target).json()
+        assert check["valid"], check["problems"]
+
+
+def test_index_reads_during_moves(db, occupancy):
+    index = build_occupancy_index(db, occupancy.version_id, occupancy.revision)
+    original = dict(index.classes)
+    class_ids = sorted(original)
+    errors = []
+    done = threading.Event()
+
+    def moves():
+        try:
+            for _ in range(200):
+                for class_id, other_id in zip(class_ids, class_ids[1:] + class_ids[:1]):
+                    other = original[other_id]
+                    index.move_class(class_id, dict(original[class_id], room_id=other["room_id"],
+                                                    day=other["day"], start_time=other["start_time"],
+                                                    end_time=other["end_time"]))
+                for class_id in class_ids:
+                    index.move_class(class_id, original[class_id])
+        finally:
+            done.set()
+
+    def reads():
+        try:
+            while not done.is_set():
+                index.conflicts()
+                for placement in original.values():
+                    index.clashes(placement)
+                    index.booked_hours("teacher", placement["teacher_id"], class_ids[:3])
+        except Exception as exc:
+            errors.append(exc)
+
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        threads = [threading.Thread(target=moves)] + [threading.Thread(target=reads) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(switch_interval)
+
+    assert errors == []
+    rebuilt = build_occupancy_index(db, occupancy.version_id, occupancy.revision)
+    assert index.classes == rebuilt.classes
+    assert index.busy == rebuilt.busy
+    assert index.entity_classes == rebuilt.entity_classes
+
+
+def test_move_needs_a_timeslot_of_the_event_slot_type(client, db, occupancy):
+    class_id = sorted(occupancy.classes)[0]
+    current = occupancy.classes[class_id]
+    lab_hour = client.post("/timeslots/", json={"day": current["day"], "start_time": 20, "end_time": 21,
+                                                "duration": 1, "slot_type": "Lab"}).json()
+    try:
+        check = client.patch(f"/scheduled-classes/{class_id}?dry_run=true&alternatives=20",
+                             json={"timeslot_id": lab_hour["id"]}).json()
+        assert not check["valid"]
+        assert any(f"Timeslot {lab_hour['id']} is a 1h Lab slot" in problem for problem in check["problems"])
+        assert all(target["timeslot_id"] != lab_hour["id"] for target in check["alternatives"])
+        pin = client.post("/pins/", json={"event_id": current["event_id"], "timeslot_id": lab_hour["id"]})
+        assert pin.status_code == 400  # pins apply the same rule
+    finally:
+        db.delete(db.get(Timeslot, lab_hour["id"]))
+        timetable_changed(db)
+        db.commit()
+
+
+def test_move_is_not_written_after_a_concurrent_change(client, db, occupancy):
+    class_id, target = first_valid_move(client, occupancy)
+    timeslot_id = occupancy.classes[class_id]["timeslot_id"]
+    with editing_occupancy(db, main.occupancy_indexes, "default") as index:
+        rules = PlacementRules(db, index)
+        placement = rules.placement(class_id, **target)
+        assert rules.problems(class_id, placement, {class_id}) == []
+        with main.tenants["default"].SessionLocal() as other:  # a publish, or an edit on another worker
+            bump_revision(other)
+            other.commit()
+        assert not apply_placements(db, index, {class_id: placement})
+
+    assert db.get(ScheduledClass, class_id).timeslot_id == timeslot_id
+    assert index.classes[class_id]["timeslot_id"] == timeslot_id
+    assert timetable_state(db) == (index.version_id, index.revision + 1)
+
+
+@pytest.mark.parametrize("body", ["empty", "current"])
+def test_move_to_the_current_placement_writes_nothing(client, db, occupancy, body):
+    class_id = sorted(occupancy.classes)[0]
+    current = occupancy.classes[class_id]
+    move = {} if body == "empty" else {field: current[field] for field in ("teacher_id", "room_id", "timeslot_id")}
+    etag = client.get("/timetable/full/").headers["etag"]
+    state = timetable_state(db)
+    db.rollback()
+
+    with entry_rows_written(main.tenants["default"].engine) as written:
+        response = client.patch(f"/scheduled-classes/{class_id}", json=move)
+    assert response.status_code == 200, response.text
+    assert written == {"deleted": 0, "inserted": 0}
+    assert timetable_state(db) == state
+    assert client.get("/timetable/full/").headers["etag"] == etag
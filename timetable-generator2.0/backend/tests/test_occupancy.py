@@ -0,0 +1,102 @@
+# backend/tests/test_occupancy.py
+"""/rooms/available/ and /timetable/conflicts/, answered from the occupancy index."""
+import pytest
+
+import main
+from models import Room, ScheduledClass, Timeslot, event_batches_table
+from versions import active_version_id, in_active_version, timetable_changed
+
+
+@pytest.fixture
+def db():
+    session = main.tenants["default"].SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+def busy_room_ids(db, timeslot):
+    """Rooms with a class of the active version at hours overlapping `timeslot`, straight from the tables."""
+    return {
+        room_id for room_id, in db.query(ScheduledClass.room_id)
+        .join(Timeslot, Timeslot.id == ScheduledClass.timeslot_id)
+        .filter(in_active_version(ScheduledClass.version_id), Timeslot.day == timeslot.day,
+                Timeslot.start_time < timeslot.end_time, timeslot.start_time < Timeslot.end_time)
+    }
+
+
+@pytest.mark.parametrize("filters", [{}, {"min_capacity": 50}, {"room_type": "Tutorial_Y"},
+                                     {"room_type": "Lecture_X", "min_capacity": 70}])
+def test_available_rooms_leave_out_busy_rooms(client, db, filters):
+    rooms = db.query(Room).order_by(Room.id).all()
+    some_busy = False
+    for timeslot in db.query(Timeslot).order_by(Timeslot.id):
+        busy = busy_room_ids(db, timeslot)
+        some_busy |= bool(busy)
+        expected = [room.id for room in rooms if room.id not in busy
+                    and room.capacity >= filters.get("min_capacity", 0)
+                    and room.room_type == filters.get("room_type", room.room_type)]
+        available = client.get("/rooms/available/", params={"timeslot_id": timeslot.id, **filters}).json()
+        assert [room["id"] for room in available] == expected, timeslot.id
+    assert some_busy
+
+
+def test_available_rooms_of_an_unknown_timeslot(client):
+    assert client.get("/rooms/available/?timeslot_id=999999").status_code == 404
+
+
+@pytest.fixture
+def double_booked(db):
+    """Adds classes to the active version on top of existing ones; removed again afterwards."""
+    added = []
+
+    def add(event_id, teacher_id, room_id, timeslot_id):
+        scheduled = ScheduledClass(version_id=active_version_id(db), event_id=event_id, teacher_id=teacher_id,
+                                   room_id=room_id, timeslot_id=timeslot_id)
+        db.add(scheduled)
+        timetable_changed(db)
+        db.commit()
+        added.append(scheduled.id)
+        return scheduled.id
+
+    yield add
+    for class_id in added:
+        db.delete(db.get(ScheduledClass, class_id))
+    timetable_changed(db)
+    db.commit()
+
+
+def batch_ids(db, event_id):
+    return sorted(b for b, in db.query(event_batches_table.c.batch_id)
+                  .filter(event_batches_table.c.event_id == event_id))
+
+
+def test_conflicts_of_a_class_booked_twice(client, db, double_booked):
+    assert client.get("/timetable/conflicts/").json() == []
+    first = db.query(ScheduledClass).filter(in_active_version(ScheduledClass.version_id)) \
+        .order_by(ScheduledClass.id).first()
+    second = double_booked(first.event_id, first.teacher_id, first.room_id, first.timeslot_id)
+
+    pair = [first.id, second]
+    assert client.get("/timetable/conflicts/").json() == (
+        [{"kind": "batch", "entity_id": b, "class_ids": pair} for b in batch_ids(db, first.event_id)]
+        + [{"kind": "teacher", "entity_id": first.teacher_id, "class_ids": pair},
+           {"kind": "room", "entity_id": first.room_id, "class_ids": pair}]
+    )
+
+
+def test_conflicts_of_a_shared_room(client, db, double_booked):
+    classes = db.query(ScheduledClass).filter(in_active_version(ScheduledClass.version_id)) \
+        .order_by(ScheduledClass.id).all()
+    first = classes[0]
+    # an event whose batches have no class in the timeslot, and no teacher: only the room is shared
+    booked = {b for c in classes if c.timeslot_id == first.timeslot_id for b in batch_ids(db, c.event_id)}
+    other = next(c for c in classes if not set(batch_ids(db, c.event_id)) & booked)
+    second = double_booked(other.event_id, None, first.room_id, first.timeslot_id)
+
+    assert client.get("/timetable/conflicts/").json() == [
+        {"kind": "room", "entity_id": first.room_id, "class_ids": [first.id, second]},
+    ]
+    assert first.room_id not in [room["id"] for room in
+                                 client.get(f"/rooms/available/?timeslot_id={first.timeslot_id}").json()]
@@ -0,0 +1,103 @@
+# backend/tests/test_pins.py
+import pytest
+
+import main
+from models import Room
+
+
+@pytest.fixture
+def lecture(client):
+    """A 1h Lecture_X event of the bundled data, with rooms and timeslots that do and don't suit it."""
+    event = next(e for e in client.get("/schedulable-events/").json()
+                 if e["duration"] == 1 and e["required_room_type"] == "Lecture_X")
+    rooms = client.get("/rooms/").json()
+    timeslots = client.get("/timeslots/").json()
+    small = client.post("/rooms/", json={"name": "Small lecture room", "capacity": event["total_size"] - 1,
+                                         "room_type": "Lecture_X"}).json()
+    yield {
+        "event": event,
+        "room": next(r for r in rooms if r["room_type"] == "Lecture_X" and r["capacity"] >= event["total_size"]),
+        "wrong_type_room": next(r for r in rooms if r["room_type"] != "Lecture_X"),
+        "small_room": small,
+        "timeslot": next(ts for ts in timeslots if ts["duration"] == 1 and ts["slot_type"] == "Lecture"),
+        "long_timeslot": next(ts for ts in timeslots if ts["duration"] == 2),
+    }
+    with main.tenants["default"].SessionLocal() as db:  # the API has no room delete
+        db.delete(db.get(Room, small["id"]))
+        db.commit()
+
+
+@pytest.mark.parametrize("room, timeslot, status", [
+    ("room", "timeslot", 200),
+    ("room", None, 200),
+    ("wrong_type_room", None, 400),
+    ("small_room", None, 400),
+    (None, "long_timeslot", 400),
+])
+def test_pins_must_fit_the_event(client, lecture, room, timeslot, status):
+    response = client.post("/pins/", json={"event_id": lecture["event"]["id"],
+                                           "room_id": lecture[room]["id"] if room else None,
+                                           "timeslot_id": lecture[timeslot]["id"] if timeslot else None})
+    assert response.status_code == status, response.text
+    if status == 200:
+        client.delete(f"/pins/{response.json()['id']}")
+
+
+@pytest.fixture
+def two_lectures(client, lecture):
+    """Two 1h Lecture_X events with no batch in common, a third sharing the first one's batches, a teacher."""
+    events = [e for e in client.get("/schedulable-events/").json()
+              if e["duration"] == 1 and e["required_room_type"] == "Lecture_X"]
+    first = lecture["event"]
+    batches = {b["id"] for b in first["batches"]}
+    apart = next(e for e in events if not batches & {b["id"] for b in e["batches"]})
+    together = next(e for e in events if e["id"] != first["id"] and batches & {b["id"] for b in e["batches"]})
+    created = []
+
+    def pin(event, **fields):
+        response = client.post("/pins/", json={"event_id": event["id"], **fields})
+        if response.status_code == 200:
+            created.append(response.json()["id"])
+        return response
+
+    yield dict(lecture, first=first, apart=apart, together=together, pin=pin,
+               teacher=client.get("/teachers/").json()[0])
+    for pin_id in created:
+        client.delete(f"/pins/{pin_id}")
+
+
+@pytest.mark.parametrize("other, shared, status", [
+    ("apart", "room", 400),
+    ("apart", "teacher", 400),
+    ("together", None, 400),  # a batch of both
+    ("apart", None, 200),
+    ("first", "room", 200),  # re-pinning the same event replaces its pin
+])
+def test_pins_must_not_clash_with_other_pins(two_lectures, other, shared, status):
+    pins = two_lectures
+    slot = {"room_id": pins["room"]["id"], "teacher_id": pins["teacher"]["id"], "timeslot_id": pins["timeslot"]["id"]}
+    assert pins["pin"](pins["first"], **slot).status_code == 200
+
+    fields = {"timeslot_id": slot["timeslot_id"]}
+    if shared:
+        fields[f"{shared}_id"] = slot[f"{shared}_id"]
+    response = pins["pin"](pins[other], **fields)
+    assert response.status_code == status, response.text
+    if status == 400:
+        assert f"Event {pins['first']['id']} is pinned to" in response.json()["detail"]
+
+
+@pytest.mark.parametrize("kind", ["teachers", "rooms"])
+def test_pins_must_not_fall_in_unavailability(client, two_lectures, kind):
+    pins = two_lectures
+    timeslot = pins["timeslot"]
+    entity = pins["teacher"] if kind == "teachers" else pins["room"]
+    window = client.post(f"/{kind}/{entity['id']}/unavailability/",
+                         json={"day": timeslot["day"], "start_time": timeslot["start_time"],
+                               "end_time": timeslot["end_time"]}).json()
+    try:
+        response = pins["pin"](pins["first"], timeslot_id=timeslot["id"], **{f"{kind[:-1]}_id": entity["id"]})
+        assert response.status_code == 400, response.text
+        assert "unavailable" in response.json()["detail"]
+    finally:
+        client.delete(f"/{kind}/{entity['id']}/unavailability/{window['id']}")
@@ -0,0 +1,58 @@
+# backend/tests/test_query_budgets.py
+"""
+Statement budgets of the read endpoints on the bundled dataset. The numbers
+do not depend on how many teachers, batches or classes there are, so an N+1
+pattern (a lazy load per row) breaks them at once.
+"""
+import pytest
+
+import main
+from query_stats import query_budget
+
+# path -> statements for a response rendered from the database (not from timetable_cache)
+BUDGETS = {
+    "/timetable/full/": 7,
+    "/teachers/{teacher_id}/timetable/": 3,
+    "/batches/{batch_id}/timetable/": 3,
+    "/batches/{batch_id}/free-slots/": 2,
+    "/timetables/?batch_ids={batch_id}&teacher_ids={teacher_id}&include=free_slots": 4,
+    "/free-slots/common/?batch_ids={batch_id}&teacher_ids={teacher_id}": 3,
+    "/schedulable-events/": 4,
+    "/schedulable-events/?fields=id,name,course,batches": 4,
+}
+
+
+@pytest.fixture(scope="module")
+def ids(client):
+    return {
+        "teacher_id": client.get("/teachers/").json()[0]["id"],
+        "batch_id": client.get("/batches/").json()[0]["id"],
+    }
+
+
+@pytest.mark.parametrize("path, budget", BUDGETS.items())
+def test_rendered_response_within_budget(client, ids, path, budget):
+    path = path.format(**ids)
+    client.get(path)  # builds the occupancy index if an earlier test moved the revision
+    main.timetable_cache.clear()
+
+    with query_budget(budget):
+        response = client.get(path)
+    assert response.status_code == 200
+
+
+@pytest.mark.parametrize("path", [p for p in BUDGETS if "timetable" in p or "free-slots" in p])
+def test_cached_response_reads_only_the_timetable_state(client, ids, path):
+    path = path.format(**ids)
+    client.get(path)
+
+    with query_budget(1):
+        response = client.get(path)
+    assert response.status_code == 200
+
+
+def test_budget_overrun_fails(client, ids):
+    main.timetable_cache.clear()
+    with pytest.raises(AssertionError, match="over the budget of 1"):
+        with query_budget(1):
+            client.get("/timetable/full/")
@@ -0,0 +1,42 @@
+# backend/tests/test_render_json.py
+"""render_json must send the bytes JSONResponse(jsonable_encoder(...)) would."""
+import pytest
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+import main
+from models import Batch, Teacher
+from response_cache import render_json
+
+
+@pytest.fixture(scope="module")
+def payloads():
+    """The full, every teacher's and every batch's timetable payload of the bundled database."""
+    with main.tenants["default"].SessionLocal() as db:
+        views = [("full", main.build_full_timetable(db))]
+        views += [(f"teacher {t}", main.build_teacher_timetable(db, t)) for t, in db.query(Teacher.id)]
+        views += [(f"batch {b}", main.build_batch_timetable(db, b)) for b, in db.query(Batch.id)]
+    assert any(view["timetable"] for name, view in views if name != "full")
+    return views
+
+
+def test_views_render_to_the_json_response_bytes(payloads):
+    for name, payload in payloads:
+        assert render_json(payload) == JSONResponse(jsonable_encoder(payload)).body, name
+
+
+def test_served_views_are_those_bytes(client, payloads):
+    paths = {"full": "/timetable/full/", "teacher": "/teachers/{}/timetable/", "batch": "/batches/{}/timetable/"}
+    for name, payload in payloads:
+        kind, _, entity_id = name.partition(" ")
+        body = client.get(paths[kind].format(entity_id)).content
+        assert body == JSONResponse(jsonable_encoder(payload)).body, name
+
+
+@pytest.mark.parametrize("payload", [
+    {"message": "Timetable for Ünïcode – “quoted” ✓", "timetable": []},
+    {"escapes": "tab\t newline\n quote\" backslash\\ control\x01", "empty": {}, "none": None, "flag": False},
+    [0, -1, 2 ** 40, "", [[]]],
+])
+def test_edge_values_render_the_same(payload):
+    assert render_json(payload) == JSONResponse(jsonable_encoder(payload)).body
@@ -0,0 +1,50 @@
+# backend/tests/test_timetables.py
+import pytest
+
+
+@pytest.fixture(scope="module")
+def entity_ids(client):
+    batch_ids = [b["id"] for b in client.get("/batches/").json()]
+    teacher_ids = [t["id"] for t in client.get("/teachers/").json()]
+    assert batch_ids and teacher_ids
+    return batch_ids, teacher_ids
+
+
+def test_each_view_equals_its_single_endpoint(client, entity_ids):
+    batch_ids, teacher_ids = entity_ids
+    response = client.get("/timetables/", params={"batch_ids": ",".join(map(str, batch_ids)),
+                                                   "teacher_ids": ",".join(map(str, teacher_ids)),
+                                                   "include": "free_slots"})
+    assert response.status_code == 200
+    views = response.json()
+    assert list(views["batches"]) == [str(i) for i in batch_ids]
+    assert list(views["teachers"]) == [str(i) for i in teacher_ids]
+    for batch_id in batch_ids:
+        batch = views["batches"][str(batch_id)]
+        assert batch["timetable"] == client.get(f"/batches/{batch_id}/timetable/").json()
+        assert batch["free_slots"] == client.get(f"/batches/{batch_id}/free-slots/").json()
+    for teacher_id in teacher_ids:
+        assert views["teachers"][str(teacher_id)] == {
+            "timetable": client.get(f"/teachers/{teacher_id}/timetable/").json(),
+        }
+
+
+def test_free_slots_only_when_included(client, entity_ids):
+    batch_id = entity_ids[0][0]
+    views = client.get(f"/timetables/?batch_ids={batch_id}").json()
+    assert list(views["batches"][str(batch_id)]) == ["timetable"]
+    assert views["teachers"] == {}
+
+
+@pytest.mark.parametrize("query", ["batch_ids=999999", "teacher_ids=999999"])
+def test_unknown_ids_are_not_found(client, query):
+    response = client.get(f"/timetables/?{query}")
+    assert response.status_code == 404
+    assert response.json()["detail"] == f"Not found: {query.split('_')[0]} 999999"
+
+
+@pytest.mark.parametrize("include", ["rooms", "free_slots,rooms"])
+def test_unknown_include_is_rejected(client, entity_ids, include):
+    response = client.get(f"/timetables/?batch_ids={entity_ids[0][0]}&include={include}")
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Unknown include ['rooms']. Use: free_slots"
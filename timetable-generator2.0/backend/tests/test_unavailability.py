@@ -0,0 +1,18 @@
+# backend/tests/test_unavailability.py
+import pytest
+
+
+@pytest.mark.parametrize("kind", ["teachers", "rooms"])
+@pytest.mark.parametrize("window, status", [
+    ({"day": "Monday", "start_time": -1, "end_time": 2}, 400),
+    ({"day": "Monday", "start_time": 20, "end_time": 25}, 400),
+    ({"day": "Monday", "start_time": 3, "end_time": 3}, 400),
+    ({"day": "Sunday", "start_time": 9, "end_time": 10}, 400),
+    ({"day": "Monday", "start_time": 0, "end_time": 24}, 200),
+])
+def test_window_hours_are_validated(client, kind, window, status):
+    entity_id = client.get(f"/{kind}/").json()[0]["id"]
+    response = client.post(f"/{kind}/{entity_id}/unavailability/", json=window)
+    assert response.status_code == status, response.text
+    if status == 200:
+        client.delete(f"/{kind}/{entity_id}/unavailability/{response.json()['id']}")
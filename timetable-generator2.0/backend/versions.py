@@ -0,0 +1,90 @@
+# backend/versions.py
+from sqlalchemy import insert, select, update
+from sqlalchemy.orm import Session
+
+from materialized import refresh_timetable_entries
+from models import TimetableVersion, ActiveTimetable, ScheduledClass
+
+
+def active_version_id(db: Session):
+    """Id of the published timetable version, or None before the first generation."""
+    return db.query(ActiveTimetable.version_id).scalar()
+
+
+def timetable_state(db: Session):
+    """(version_id, revision) of the published timetable, (None, 0) before the first generation."""
+    row = db.query(ActiveTimetable.version_id, ActiveTimetable.revision).first()
+    return tuple(row) if row else (None, 0)
+
+
+def in_active_version(version_column):
+    """
+    Filter on the active version inside the reading statement itself, so one
+    query cannot mix the rows of two versions around a publish.
+    """
+    return version_column == select(ActiveTimetable.version_id).where(ActiveTimetable.id == 1).scalar_subquery()
+
+
+def activate_version(db: Session, version_id: int):
+    """
+    Points readers at `version_id`, bumps the revision and rebuilds the
+    version's materialized entries. Nothing is visible until the caller
+    commits, so the switch is atomic.
+    """
+    pointer = db.get(ActiveTimetable, 1)
+    if pointer is None:
+        db.add(ActiveTimetable(id=1, version_id=version_id, revision=0))
+    else:
+        pointer.version_id = version_id
+        pointer.revision = ActiveTimetable.revision + 1
+    refresh_timetable_entries(db, version_id)
+
+
+def timetable_changed(db: Session):
+    """
+    Call after edits to data the published timetable shows (names, course
+    teachers, timeslots): bumps the revision, which moves every response cache
+    key, and rebuilds the materialized entries. Does not commit.
+    """
+    bump_revision(db)
+    refresh_timetable_entries(db)
+
+
+def bump_revision(db: Session):
+    """Moves every response cache key to new content; for edits that refresh their own entries. Does not commit."""
+    db.query(ActiveTimetable).update({ActiveTimetable.revision: ActiveTimetable.revision + 1},
+                                     synchronize_session=False)
+
+
+def advance_revision(db: Session, version_id, revision: int) -> bool:
+    """
+    bump_revision only from (version_id, revision), the state the caller
+    checked its change against: False, with nothing written, when a publish
+    or an edit from any worker got there first. Does not commit.
+    """
+    result = db.execute(
+        update(ActiveTimetable)
+        .where(ActiveTimetable.version_id == version_id, ActiveTimetable.revision == revision)
+        .values(revision=ActiveTimetable.revision + 1)
+    )
+    return result.rowcount == 1
+
+
+def publish_solution(db: Session, solution, engine: str):
+    """
+    Stores a solver solution (event_id -> (teacher_id, room_id, timeslot_id))
+    as a new version with one executemany insert and activates it, in the
+    caller's transaction. Earlier versions are kept for rollback.
+    Returns the new version id.
+    """
+    version = TimetableVersion(engine=engine, num_classes=len(solution))
+    db.add(version)
+    db.flush()
+
+    db.execute(insert(ScheduledClass), [
+        {"version_id": version.id, "event_id": event_id, "teacher_id": teacher_id,
+         "room_id": room_id, "timeslot_id": timeslot_id}
+        for event_id, (teacher_id, room_id, timeslot_id) in solution.items()
+    ])
+    activate_version(db, version.id)
+    return version.id
@@ -33,6 +33,15 @@ export async function fetchFullTimetable() {
   return API.get("/timetable/full/")
 }
 
+// Several batch / teacher timetables in one request, keyed by id
+export async function fetchTimetables({ batchIds = [], teacherIds = [], includeFreeSlots = false } = {}) {
+  const params = {}
+  if (batchIds.length) params.batch_ids = batchIds.join(',')
+  if (teacherIds.length) params.teacher_ids = teacherIds.join(',')
+  if (includeFreeSlots) params.include = 'free_slots'
+  return API.get('/timetables/', { params })
+}
+
 // ================================
 // CREATE FUNCTIONS
 // ================================